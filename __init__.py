@@ -1,20 +1,27 @@
 import logging
+import time
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr
 from .const import DOMAIN
-from .telegram_bot import PillsReminderBot
+from .runtime import RUNTIME, PillsRuntime
+from .services import async_register_services, async_unregister_services
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    hass.data.setdefault(DOMAIN, {})
+    started = time.perf_counter()
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    runtime = domain_data.get(RUNTIME)
+    if runtime is None:
+        runtime = domain_data[RUNTIME] = PillsRuntime(hass)
     
     try:
-        bot = PillsReminderBot(hass, {**entry.data, **entry.options})
+        # Записи с одним токеном делят бот, поллер и хранилища
+        bot = await runtime.async_acquire(entry)
         
         # Сначала сохраняем бота
-        hass.data[DOMAIN][entry.entry_id] = {
+        domain_data[entry.entry_id] = {
             'bot': bot,
             'sensors': {},
             'coordinator': None  # Будет заполнено из sensor.py
@@ -23,23 +30,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # Настройка платформы сенсоров
         await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
         
-        # Запускаем бота после настройки сенсоров
+        # Запускаем бота после настройки сенсоров (уже запущенный бот не перезапускается).
+        # Данные и Telegram подключаются в фоне - загрузка HA их не ждет
         await bot.start()
         
+        await async_register_services(hass)
+        
         entry.async_on_unload(entry.add_update_listener(update_listener))
         
+        elapsed = time.perf_counter() - started
+        bot.metrics.record_startup('setup_entry', elapsed)
+        _LOGGER.debug(f"Pills reminder entry set up in {elapsed * 1000:.1f} ms")
         return True
     except Exception as err:
         _LOGGER.error("Failed to setup pills reminder bot: %s", err)
+        domain_data.pop(entry.entry_id, None)
+        await runtime.async_release(entry.entry_id)
         return False
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_unload(entry, "sensor")
     
-    data = hass.data[DOMAIN].pop(entry.entry_id)
-    if 'bot' in data:
-        await data['bot'].stop()
+    domain_data = hass.data[DOMAIN]
+    domain_data.pop(entry.entry_id, None)
+    runtime = domain_data[RUNTIME]
+    await runtime.async_release(entry.entry_id)
+    
+    if not runtime.entry_count:
+        await async_unregister_services(hass)
     return True
 
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # Чат и адрес API применяются к работающему боту, перезагрузка - только при смене токена
+    if await hass.data[DOMAIN][RUNTIME].async_apply_options(entry):
+        return
     await hass.config_entries.async_reload(entry.entry_id)
\ No newline at end of file
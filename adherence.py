@@ -0,0 +1,231 @@
+"""Инкрементальная статистика соблюдения режима: серии, окна 30/90 дней, задержки."""
+import logging
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from .history_stats import to_naive_local
+
+_LOGGER = logging.getLogger(__name__)
+
+ADHERENCE_WINDOWS = (30, 90)
+_KEEP_DAYS = max(ADHERENCE_WINDOWS)
+
+# Верхние границы корзин гистограммы задержек, в минутах
+LATENCY_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480, 720, 1440)
+# Количество повторных напоминаний: 0, 1, 2, 3 и "4 и больше"
+MAX_NAG_BUCKET = 4
+
+
+def dose_delay_minutes(entry):
+    """Задержка подтверждения относительно запланированного времени (в минутах).
+
+    Если в записи есть latency_seconds, используется она. Для старых записей
+    запланированное время берется из time_taken (ЧЧ:ММ) в день нажатия;
+    если оно позже нажатия, значит прием был запланирован накануне.
+    """
+    if entry.get('latency_seconds') is not None:
+        return max(entry['latency_seconds'], 0) / 60
+    try:
+        confirmed = to_naive_local(datetime.fromisoformat(entry['date']))
+        hour, minute = (int(part) for part in entry['time_taken'].split(':'))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    scheduled = confirmed.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if scheduled > confirmed:
+        scheduled -= timedelta(days=1)
+    return (confirmed - scheduled).total_seconds() / 60
+
+
+class LatencyHistogram:
+    """Гистограмма задержек подтверждения с фиксированными корзинами"""
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+
+    def add(self, minutes):
+        self.counts[bisect_left(LATENCY_BUCKETS, minutes)] += 1
+        self.total += 1
+
+    def percentile(self, fraction):
+        """Оценка перцентиля (в минутах) линейной интерполяцией внутри корзины"""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0
+                if index == len(LATENCY_BUCKETS):
+                    return float(lower)
+                upper = LATENCY_BUCKETS[index]
+                return round(lower + (upper - lower) * (target - cumulative) / count, 1)
+            cumulative += count
+        return float(LATENCY_BUCKETS[-1])
+
+    def as_dict(self):
+        result = {}
+        for index, count in enumerate(self.counts):
+            label = f"<={LATENCY_BUCKETS[index]}" if index < len(LATENCY_BUCKETS) else f">{LATENCY_BUCKETS[-1]}"
+            result[label] = count
+        return result
+
+
+class PillAdherence:
+    """Статистика одной витаминки пользователя, обновляемая при каждой записи"""
+
+    __slots__ = ('days', 'streak_end', 'streak_length', 'closed_longest',
+                 'delay_total', 'delay_count', 'latency', 'nags', '_window_cache')
+
+    def __init__(self):
+        self.days = {}  # {ordinal дня: [принято, всего]}
+        self.streak_end = None
+        self.streak_length = 0
+        # Рекорд среди завершенных серий; текущая учитывается в longest_streak
+        self.closed_longest = 0
+        self.delay_total = 0.0
+        self.delay_count = 0
+        self.latency = LatencyHistogram()
+        self.nags = [0] * (MAX_NAG_BUCKET + 1)
+        self._window_cache = {}
+
+    def record(self, day, taken, delay_minutes=None, nag_count=None):
+        counts = self.days.setdefault(day, [0, 0])
+        counts[1] += 1
+        if taken:
+            counts[0] += 1
+            if delay_minutes is not None:
+                self.delay_total += delay_minutes
+                self.delay_count += 1
+                self.latency.add(delay_minutes)
+        if nag_count is not None:
+            self.nags[min(nag_count, MAX_NAG_BUCKET)] += 1
+
+        # День засчитывается в серию, только если все дозы приняты. Серия,
+        # прерванная пропуском, уходит в рекорд без дня с пропуском
+        if counts[0] != counts[1]:
+            if self.streak_end is not None and self.streak_end >= day - 1:
+                closed = self.streak_length - (1 if self.streak_end == day else 0)
+                self.closed_longest = max(self.closed_longest, closed)
+                self.streak_length = 0
+                self.streak_end = None
+        elif self.streak_end != day:
+            if self.streak_end == day - 1:
+                self.streak_length += 1
+            else:
+                self.closed_longest = max(self.closed_longest, self.streak_length)
+                self.streak_length = 1
+            self.streak_end = day
+
+        oldest = day - _KEEP_DAYS
+        for stale_day in [d for d in self.days if d <= oldest]:
+            del self.days[stale_day]
+        self._window_cache.clear()
+
+    @property
+    def longest_streak(self):
+        return max(self.closed_longest, self.streak_length)
+
+    def current_streak(self, today):
+        if self.streak_end is not None and self.streak_end >= today - 1:
+            return self.streak_length
+        return 0
+
+    def adherence(self, days, today):
+        cache_key = (days, today)
+        if cache_key not in self._window_cache:
+            taken = total = 0
+            for day in range(today - days + 1, today + 1):
+                counts = self.days.get(day)
+                if counts:
+                    taken += counts[0]
+                    total += counts[1]
+            self._window_cache[cache_key] = round(taken / total * 100, 1) if total else None
+        return self._window_cache[cache_key]
+
+    def average_delay(self):
+        if not self.delay_count:
+            return None
+        return round(self.delay_total / self.delay_count, 1)
+
+
+class AdherenceTracker:
+    """Статистика соблюдения по парам (user_id, pill_name).
+
+    Строится один раз из истории при запуске бота, после чего обновляется
+    каждой новой записью о приеме, поэтому сенсорам не нужно пересчитывать
+    историю при каждом обновлении координатора.
+    """
+
+    def __init__(self):
+        self._pills = {}
+        self._users = {}
+
+    def rebuild(self, history):
+        self._pills = {}
+        self._users = {}
+        for entry in sorted(history, key=lambda x: x.get('date', '')):
+            self.record_entry(entry)
+
+    def record_entry(self, entry):
+        try:
+            day = to_naive_local(datetime.fromisoformat(entry['date'])).toordinal()
+        except (KeyError, TypeError, ValueError):
+            return
+        key = (str(entry.get('user_id')), entry.get('pill_name'))
+        pill = self._pills.get(key)
+        if pill is None:
+            pill = self._pills[key] = PillAdherence()
+        taken = entry.get('status') == 'taken'
+        delay_minutes = dose_delay_minutes(entry) if taken else None
+        pill.record(day, taken, delay_minutes, entry.get('nag_count'))
+        if delay_minutes is not None:
+            user_latency = self._users.get(key[0])
+            if user_latency is None:
+                user_latency = self._users[key[0]] = LatencyHistogram()
+            user_latency.add(delay_minutes)
+
+    def remove(self, user_id, pill_name=None):
+        user_id = str(user_id)
+        for key in [k for k in self._pills if k[0] == user_id and (pill_name is None or k[1] == pill_name)]:
+            del self._pills[key]
+        if pill_name is None:
+            self._users.pop(user_id, None)
+
+    def user_snapshot(self, user_id):
+        latency = self._users.get(str(user_id))
+        if latency is None:
+            return {'latency_p50': None, 'latency_p95': None}
+        return {
+            'latency_p50': latency.percentile(0.5),
+            'latency_p95': latency.percentile(0.95),
+        }
+
+    def snapshot(self, user_id, pill_name, today=None):
+        today = (today or datetime.now().date()).toordinal()
+        pill = self._pills.get((str(user_id), pill_name))
+        if pill is None:
+            return {
+                'current_streak': 0,
+                'longest_streak': 0,
+                'adherence_30d': None,
+                'adherence_90d': None,
+                'avg_delay': None,
+                'latency_p50': None,
+                'latency_p95': None,
+                'latency_histogram': {},
+                'nag_counts': [],
+            }
+        return {
+            'current_streak': pill.current_streak(today),
+            'longest_streak': pill.longest_streak,
+            'adherence_30d': pill.adherence(30, today),
+            'adherence_90d': pill.adherence(90, today),
+            'avg_delay': pill.average_delay(),
+            'latency_p50': pill.latency.percentile(0.5),
+            'latency_p95': pill.latency.percentile(0.95),
+            'latency_histogram': pill.latency.as_dict(),
+            'nag_counts': list(pill.nags),
+        }
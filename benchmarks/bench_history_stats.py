@@ -0,0 +1,96 @@
+"""Статистика сенсоров: циклы по записям истории против HistoryColumns и AdherenceTracker.
+
+Счетчики и последний прием координатор берет из HistoryColumns, серии и
+соблюдение за 30/90 дней - из AdherenceTracker, который строится один раз
+и дальше обновляется каждой записью.
+
+Запуск: python benchmarks/bench_history_stats.py [--users N] [--pills M] [--days D]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+from synthetic import generate_history, pill_name, user_id  # noqa: E402
+
+stubs.install()
+from pills_reminder.adherence import AdherenceTracker  # noqa: E402
+from pills_reminder.history_stats import HistoryColumns  # noqa: E402
+
+
+def loop_stats(history, user_id, pill_name):
+    """Прежняя реализация из PillsDataCoordinator._process_user_pill_data"""
+    now = datetime.now()
+    today = now.date()
+    week_ago = now - timedelta(days=7)
+    user_pill_history = [
+        entry for entry in history
+        if entry.get('user_id') == str(user_id) and entry.get('pill_name') == pill_name
+    ]
+    today_entries = [e for e in user_pill_history if datetime.fromisoformat(e['date']).date() == today]
+    week_entries = [e for e in user_pill_history if datetime.fromisoformat(e['date']) >= week_ago]
+    taken_entries = [e for e in user_pill_history if e['status'] == 'taken']
+    return (
+        sum(1 for e in today_entries if e['status'] == 'taken'),
+        sum(1 for e in week_entries if e['status'] == 'taken'),
+        max(taken_entries, key=lambda x: x['date'])['date'] if taken_entries else None,
+    )
+
+
+def run(users, pills, days, repeat):
+    history = generate_history(users, pills, days)
+    keys = [(user_id(u), pill_name(p)) for u in range(users) for p in range(pills)]
+    results = {'entries': len(history), 'users': users, 'pills': pills, 'days': days}
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for uid, name in keys:
+            loop_stats(history, uid, name)
+    results['loop_refresh_s'] = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    columns = HistoryColumns().sync(history)
+    results['columns_build_s'] = time.perf_counter() - started
+
+    now = datetime.now()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        columns.sync(history)
+        columns.counts(since=now.replace(hour=0, minute=0, second=0, microsecond=0))
+        columns.counts(since=now - timedelta(days=7))
+        columns.last_taken()
+    results['vectorized_refresh_s'] = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    tracker = AdherenceTracker()
+    tracker.rebuild(history)
+    results['adherence_build_s'] = time.perf_counter() - started
+
+    # Новая запись о приеме и обновление сенсоров всех пар, как после mark_as_taken
+    entry = dict(history[-1], date=now.isoformat(), status='taken')
+    started = time.perf_counter()
+    for _ in range(repeat):
+        tracker.record_entry(entry)
+        for uid, name in keys:
+            tracker.snapshot(uid, name)
+    results['adherence_refresh_s'] = (time.perf_counter() - started) / repeat
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--pills', type=int, default=4)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.users, args.pills, args.days, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""Локальная замена api.telegram.org для нагрузочного тестирования.
+
+Реализует getUpdates (long polling), sendMessage, editMessageText,
+answerCallbackQuery и setMyCommands. Исходящие сообщения ограничиваются
+по частоте на чат; при превышении сервер отвечает 429 с retry_after, как
+настоящий Bot API.
+
+Отдельный запуск:
+    python benchmarks/fake_telegram.py --port 8081
+
+Служебные эндпоинты:
+    POST /_updates  - добавить апдейты (JSON-объект или список)
+    GET  /_stats    - счетчики запросов и ответов 429
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+
+class FakeTelegramServer:
+    """Состояние фейкового Bot API: очередь апдейтов, сообщения и лимиты"""
+
+    def __init__(self, per_chat_limit=20, per_chat_window=1.0, global_limit=30, global_window=1.0):
+        self.per_chat_limit = per_chat_limit
+        self.per_chat_window = per_chat_window
+        self.global_limit = global_limit
+        self.global_window = global_window
+        self.updates = []
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.updates_event = asyncio.Event()
+        self.messages = defaultdict(list)
+        self.message_waiters = defaultdict(list)
+        self.commands = []
+        self.stats = defaultdict(int)
+        self._chat_sends = defaultdict(deque)
+        self._global_sends = deque()
+
+    # --- Управление из нагрузочного теста ---
+
+    def push_update(self, update):
+        update = dict(update)
+        update["update_id"] = next(self.update_ids)
+        self.updates.append(update)
+        self.updates_event.set()
+        return update["update_id"]
+
+    def push_message(self, chat_id, user_id, text, chat_type="private", username=None):
+        return self.push_update({
+            "message": {
+                "message_id": next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": chat_type},
+                "from": {"id": user_id, "first_name": f"User {user_id}", "username": username or f"user{user_id}"},
+                "text": text,
+            }
+        })
+
+    def push_callback(self, chat_id, user_id, message_id, data):
+        return self.push_update({
+            "callback_query": {
+                "id": str(next(self.update_ids)),
+                "from": {"id": user_id, "first_name": f"User {user_id}", "username": f"user{user_id}"},
+                "message": {"message_id": message_id, "chat": {"id": chat_id, "type": "supergroup"}},
+                "data": data,
+            }
+        })
+
+    async def wait_for_message(self, chat_id, after=0.0, timeout=30):
+        """Ждет первое сообщение в чат, отправленное позже момента after (time.monotonic)"""
+        chat_id = str(chat_id)
+        for message in self.messages[chat_id]:
+            if message["_received"] > after:
+                return message
+        future = asyncio.get_running_loop().create_future()
+        self.message_waiters[chat_id].append((after, future))
+        return await asyncio.wait_for(future, timeout)
+
+    # --- Bot API ---
+
+    def _rate_limited(self, chat_id):
+        now = time.monotonic()
+        chat_sends = self._chat_sends[chat_id]
+        for sends, window in ((chat_sends, self.per_chat_window), (self._global_sends, self.global_window)):
+            while sends and now - sends[0] > window:
+                sends.popleft()
+        if len(chat_sends) >= self.per_chat_limit:
+            return max(1, int(self.per_chat_window - (now - chat_sends[0])) + 1)
+        if len(self._global_sends) >= self.global_limit:
+            return max(1, int(self.global_window - (now - self._global_sends[0])) + 1)
+        chat_sends.append(now)
+        self._global_sends.append(now)
+        return 0
+
+    def _store_message(self, method, payload):
+        chat_id = str(payload.get("chat_id"))
+        message_id = payload.get("message_id") or next(self.message_ids)
+        message = {
+            "method": method,
+            "message_id": message_id,
+            "chat_id": chat_id,
+            "text": payload.get("text"),
+            "reply_markup": payload.get("reply_markup"),
+            "_received": time.monotonic(),
+        }
+        self.messages[chat_id].append(message)
+        waiters = self.message_waiters[chat_id]
+        for waiter in [w for w in waiters if w[0] < message["_received"]]:
+            waiters.remove(waiter)
+            if not waiter[1].done():
+                waiter[1].set_result(message)
+        return message
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        self.stats[method] += 1
+        if request.method == "GET":
+            payload = {key: value for key, value in request.query.items()}
+        else:
+            payload = await request.json() if request.can_read_body else {}
+
+        if method == "getUpdates":
+            return web.json_response({"ok": True, "result": await self._get_updates(payload)})
+        if method in ("sendMessage", "editMessageText"):
+            retry_after = self._rate_limited(str(payload.get("chat_id")))
+            if retry_after:
+                self.stats["429"] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                }, status=429)
+            message = self._store_message(method, payload)
+            return web.json_response({"ok": True, "result": {
+                "message_id": message["message_id"],
+                "chat": {"id": payload.get("chat_id")},
+                "text": payload.get("text"),
+            }})
+        if method == "answerCallbackQuery":
+            return web.json_response({"ok": True, "result": True})
+        if method == "setMyCommands":
+            self.commands = payload.get("commands", [])
+            return web.json_response({"ok": True, "result": True})
+        return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+
+    async def _get_updates(self, payload):
+        offset = int(payload.get("offset", 0) or 0)
+        timeout = float(payload.get("timeout", 0) or 0)
+        if offset:
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates and timeout:
+            self.updates_event.clear()
+            try:
+                await asyncio.wait_for(self.updates_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self.updates[:100])
+
+    async def handle_push(self, request):
+        payload = await request.json()
+        updates = payload if isinstance(payload, list) else [payload]
+        return web.json_response({"ok": True, "result": [self.push_update(update) for update in updates]})
+
+    async def handle_stats(self, request):
+        return web.json_response(dict(self.stats))
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        app.router.add_post("/_updates", self.handle_push)
+        app.router.add_get("/_stats", self.handle_stats)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Запускает сервер и возвращает базовый URL для CONF_API_URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--per-chat-limit", type=int, default=20)
+    parser.add_argument("--global-limit", type=int, default=30)
+    args = parser.parse_args()
+
+    async def serve():
+        server = FakeTelegramServer(per_chat_limit=args.per_chat_limit, global_limit=args.global_limit)
+        url = await server.start(args.host, args.port)
+        print(f"Fake Telegram Bot API listening on {url}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
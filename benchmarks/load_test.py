@@ -0,0 +1,155 @@
+"""Сквозной нагрузочный тест: бот против локального фейкового Bot API.
+
+Каждый виртуальный пользователь проходит /setup (7 шагов), сохраняет
+напоминание и нажимает "✅ Выпил" в канале. Для каждого шага измеряется
+время от появления апдейта в getUpdates до ответа бота
+(poll_updates -> handle_update -> send_message).
+
+Пример:
+    python benchmarks/load_test.py --users 1000 --concurrency 50 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aiohttp  # noqa: E402
+
+import stubs  # noqa: E402
+from fake_telegram import FakeTelegramServer  # noqa: E402
+
+CHANNEL_ID = -100500
+FIRST_USER_ID = 500000
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+
+class Workload:
+    def __init__(self, server, timeout):
+        self.server = server
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.errors = 0
+
+    async def _step(self, name, chat_id, push):
+        started = time.monotonic()
+        push()
+        message = await self.server.wait_for_message(chat_id, after=started, timeout=self.timeout)
+        self.latencies[name].append((time.monotonic() - started) * 1000)
+        return message
+
+    async def run_user(self, user_id):
+        server = self.server
+        try:
+            await self._step("setup", user_id, lambda: server.push_message(user_id, user_id, "/setup"))
+            for name, text in (
+                ("pill_name", f"Витамин {user_id % 7}"),
+                ("dosage", "1 таблетка"),
+                ("description", "-"),
+                ("duration_days", "30"),
+                ("times_per_day", "1"),
+            ):
+                await self._step(name, user_id, lambda text=text: server.push_message(user_id, user_id, text))
+            confirmation = await self._step("time", user_id, lambda: server.push_message(user_id, user_id, "08:00"))
+
+            save_data = next(
+                button["callback_data"]
+                for row in confirmation["reply_markup"]["inline_keyboard"]
+                for button in row
+                if button["callback_data"].startswith("save_reminder_")
+            )
+            reminder_id = save_data.split("_")[2]
+            await self._step("save_reminder", user_id, lambda: server.push_callback(
+                user_id, user_id, confirmation["message_id"], save_data))
+
+            await self._step("taken", CHANNEL_ID, lambda: server.push_callback(
+                CHANNEL_ID, user_id, 1, f"taken_{user_id}_{reminder_id}_0"))
+        except (asyncio.TimeoutError, StopIteration, KeyError, TypeError):
+            self.errors += 1
+
+
+async def run_load_test(args):
+    stubs.install()
+    telegram_bot = sys.modules[f"{stubs.PACKAGE_NAME}.telegram_bot"]
+    const = sys.modules[f"{stubs.PACKAGE_NAME}.const"]
+
+    server = FakeTelegramServer(per_chat_limit=args.per_chat_limit, global_limit=args.global_limit)
+    api_url = await server.start()
+
+    hass = stubs.FakeHass()
+    hass.session = aiohttp.ClientSession()
+    bot = telegram_bot.PillsReminderBot(hass, {
+        const.CONF_BOT_TOKEN: "123:load",
+        const.CONF_CHAT_ID: str(CHANNEL_ID),
+        const.CONF_API_URL: api_url,
+    })
+    await bot.start()
+
+    workload = Workload(server, args.timeout)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(user_id):
+        async with semaphore:
+            await workload.run_user(user_id)
+
+    started = time.monotonic()
+    await asyncio.gather(*(limited(FIRST_USER_ID + index) for index in range(args.users)))
+    elapsed = time.monotonic() - started
+
+    await bot.stop()
+    await hass.cancel_tasks()
+    await hass.session.close()
+    await server.stop()
+
+    all_samples = [sample for samples in workload.latencies.values() for sample in samples]
+    return {
+        'params': {k: getattr(args, k) for k in ('users', 'concurrency', 'per_chat_limit', 'global_limit')},
+        'elapsed_s': round(elapsed, 3),
+        'updates': len(all_samples),
+        'throughput_updates_per_s': round(len(all_samples) / elapsed, 2) if elapsed else None,
+        'errors': workload.errors,
+        'latency_ms': {
+            'all': {'p50': _percentile(all_samples, 0.5), 'p95': _percentile(all_samples, 0.95),
+                    'mean': round(statistics.fmean(all_samples), 2) if all_samples else None},
+            **{
+                step: {'p50': _percentile(samples, 0.5), 'p95': _percentile(samples, 0.95)}
+                for step, samples in workload.latencies.items()
+            },
+        },
+        'server': dict(server.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--per-chat-limit', type=int, default=20)
+    parser.add_argument('--global-limit', type=int, default=30)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help="файл для JSON с результатами")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    report = asyncio.run(run_load_test(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
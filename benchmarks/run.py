@@ -0,0 +1,219 @@
+"""Бенчмарк горячих путей бота и координатора на синтетических данных.
+
+Пример:
+    python benchmarks/run.py --users 20 --pills 4 --days 365 --courses 5 --output bench.json
+    python benchmarks/run.py --compare bench.json
+
+Результат - JSON с параметрами и временем каждой операции (мс), пригодный
+для сравнения между прогонами; --compare завершается с ошибкой, если
+медиана какой-либо операции выросла больше чем на --threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+from synthetic import generate_dataset, pill_name, reminder_id, user_id  # noqa: E402
+
+ENTRY_ID = "bench_entry"
+CHAT_ID = "-100123456"
+
+
+async def _noop_sleep(*args, **kwargs):
+    return None
+
+
+async def _timed(func, repeat):
+    samples = []
+    for iteration in range(repeat):
+        started = time.perf_counter()
+        await func(iteration)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+async def run_benchmarks(args):
+    package = stubs.install()
+    telegram_bot = sys.modules[f"{stubs.PACKAGE_NAME}.telegram_bot"]
+    sensor = sys.modules.get(f"{stubs.PACKAGE_NAME}.sensor") or __import__(
+        f"{stubs.PACKAGE_NAME}.sensor", fromlist=["sensor"]
+    )
+    const = sys.modules[f"{stubs.PACKAGE_NAME}.const"]
+
+    token = "123:bench"
+    dataset = generate_dataset(args.users, args.pills, args.days, args.courses,
+                               prefix=telegram_bot.storage_prefix(token))
+    hass = stubs.FakeHass()
+    entry = stubs.FakeConfigEntry(ENTRY_ID, {const.CONF_BOT_TOKEN: token, const.CONF_CHAT_ID: CHAT_ID})
+
+    def reset():
+        hass.load_dataset(dataset)
+        # Хранилища держат данные в памяти - после подмены файлов читаем их заново
+        for store in (bot.storage, bot.users_storage, bot.archive_storage, bot.journal_storage):
+            store._loaded = False
+
+    bot = telegram_bot.PillsReminderBot(hass, {**entry.data, **entry.options})
+    reset()
+    bot.entry_ids.add(ENTRY_ID)
+    hass.data[const.DOMAIN] = {ENTRY_ID: {'bot': bot, 'sensors': {}, 'coordinator': None}}
+    coordinator = sensor.PillsDataCoordinator(hass, entry)
+    hass.data[const.DOMAIN][ENTRY_ID]['coordinator'] = coordinator
+    await bot.messages.async_load(hass)
+    await bot.load_adherence()
+    await bot.load_schedule()
+    # Измеряем стоимость отправки, а не паузы лимитов Bot API
+    bot.outbox.per_chat_interval = bot.outbox.global_interval = 0
+    bot.outbox.start()
+
+    users = [user_id(u) for u in range(args.users)]
+    results = {}
+
+    async def cold_load(i):
+        # Данные, которые новый бот читает при запуске (без сети)
+        fresh = telegram_bot.PillsReminderBot(hass, {**entry.data, **entry.options})
+        await asyncio.gather(*(store.async_load() for store in (
+            fresh.storage, fresh.users_storage, fresh.archive_storage, fresh.journal_storage,
+        )))
+        await fresh.load_adherence()
+        await fresh.load_schedule()
+    results['startup_load'] = await _timed(cold_load, args.repeat)
+
+    async def update_data(i):
+        await coordinator._async_update_data()
+    results['_async_update_data'] = await _timed(update_data, args.repeat)
+
+    async def check_reminders(i):
+        bot.active_reminders.clear()
+        await bot.check_and_send_reminders()
+    results['check_and_send_reminders'] = await _timed(check_reminders, args.repeat)
+
+    # Время, совпадающее со слотом приема, чтобы измерить и отправку
+    fire_time = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    class _FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return fire_time if tz is None else fire_time.astimezone(tz)
+
+    users_snapshot = await bot.users_storage.async_load() or {}
+
+    async def check_reminders_firing(i):
+        bot.active_reminders.clear()
+        bot.next_due.rebuild(users_snapshot, (fire_time - timedelta(minutes=1)).astimezone(timezone.utc))
+        with mock.patch.object(telegram_bot, "datetime", _FixedDatetime):
+            await bot.check_and_send_reminders()
+        # Снимаем задачи повторных напоминаний (вместе с ними и очередь отправки)
+        await hass.cancel_tasks()
+        await bot.outbox.stop()
+        bot.outbox.start()
+    results['check_and_send_reminders_firing'] = await _timed(check_reminders_firing, args.repeat)
+    bot.active_reminders.clear()
+
+    async def mark_taken(i):
+        uid = users[i % len(users)]
+        await bot.mark_as_taken(CHAT_ID, uid, 1, int(uid), reminder_id(int(uid) - 100000, 0), 0)
+    with mock.patch.object(bot, "update_sensors", _noop_sleep):
+        results['mark_as_taken'] = await _timed(mark_taken, args.repeat)
+
+    async def user_history(i):
+        await bot.get_user_history(users[i % len(users)], active_only=True)
+    results['get_user_history'] = await _timed(user_history, args.repeat)
+
+    async def user_archive(i):
+        await bot.get_archive_page(users[i % len(users)], i % 3)
+    results['get_archive_page'] = await _timed(user_archive, args.repeat)
+
+    async def next_course(i):
+        await bot.get_next_course_number(users[i % len(users)], pill_name(0))
+    results['get_next_course_number'] = await _timed(next_course, args.repeat)
+
+    async def archive(i):
+        reset()
+        uid = users[i % len(users)]
+        await bot.archive_reminder(int(uid), uid, 1, reminder_id(int(uid) - 100000, i % args.pills))
+    with mock.patch.object(telegram_bot.asyncio, "sleep", _noop_sleep), \
+            mock.patch.object(bot, "update_sensors", _noop_sleep), \
+            mock.patch.object(bot, "handle_manage_command", _noop_sleep):
+        results['archive_reminder'] = await _timed(archive, args.repeat)
+
+    await hass.cancel_tasks()
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=stubs.PACKAGE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('median_ms'):
+            continue
+        ratio = result['median_ms'] / previous['median_ms']
+        marker = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:40s} {previous['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms  x{ratio:5.2f}  {marker}",
+              file=sys.stderr)
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--pills', type=int, default=3)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--courses', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help="файл для JSON с результатами")
+    parser.add_argument('--compare', help="JSON предыдущего прогона для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.25, help="допустимый рост медианы (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmarks(args))
+    report = {
+        'params': {k: getattr(args, k) for k in ('users', 'pills', 'days', 'courses', 'repeat')},
+        'python': platform.python_version(),
+        'revision': _git_revision(),
+        'created': datetime.now().isoformat(),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get('params') != report['params']:
+            print("warning: parameters differ from baseline", file=sys.stderr)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Заглушки Home Assistant, Store и aiohttp для запуска интеграции вне HA.
+
+install() регистрирует минимальные модули homeassistant.* в sys.modules и
+загружает каталог интеграции как пакет pills_reminder.
+"""
+import asyncio
+import copy
+import enum
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import types
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "pills_reminder"
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200):
+        self.status = status
+        self._payload = payload
+
+    async def json(self, *args, **kwargs):
+        return self._payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """aiohttp.ClientSession, отвечающий как Bot API без сетевых запросов"""
+
+    def __init__(self):
+        self.requests = []
+        self._message_ids = itertools.count(1)
+
+    def _respond(self, method, url, payload):
+        self.requests.append((method, url))
+        api_method = url.rsplit("/", 1)[-1]
+        if api_method == "getUpdates":
+            return FakeResponse({"ok": True, "result": []})
+        if api_method in ("sendMessage", "editMessageText"):
+            return FakeResponse({"ok": True, "result": {"message_id": next(self._message_ids)}})
+        return FakeResponse({"ok": True, "result": True})
+
+    def post(self, url, json=None, **kwargs):
+        return self._respond("POST", url, json)
+
+    def get(self, url, params=None, **kwargs):
+        return self._respond("GET", url, params)
+
+
+class FakeStore:
+    """In-memory Store: сохраняет JSON-строку, чтобы стоимость (де)сериализации была реальной"""
+
+    def __init__(self, hass, version, key, *args, **kwargs):
+        self.hass = hass
+        self.version = version
+        self.key = key
+        self.path = os.path.join(hass.config.config_dir, ".storage", key)
+
+    async def async_load(self):
+        raw = self.hass.storage_files.get(self.key)
+        return json.loads(raw) if raw is not None else None
+
+    async def async_save(self, data):
+        self.hass.storage_files[self.key] = json.dumps(data)
+
+    def async_delay_save(self, data_func, delay=0):
+        self.hass.storage_files[self.key] = json.dumps(data_func())
+
+    async def async_remove(self):
+        self.hass.storage_files.pop(self.key, None)
+
+
+class FakeConfig:
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+        self.time_zone = "UTC"
+
+    def path(self, *parts):
+        return os.path.join(self.config_dir, *parts)
+
+
+class FakeBus:
+    def __init__(self):
+        self.listeners = {}
+
+    def async_listen(self, event_type, listener):
+        self.listeners.setdefault(event_type, []).append(listener)
+        return lambda: self.listeners[event_type].remove(listener)
+
+    def async_listen_once(self, event_type, listener):
+        return self.async_listen(event_type, listener)
+
+    async def async_fire(self, event_type, event=None):
+        for listener in list(self.listeners.get(event_type, [])):
+            result = listener(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+
+class FakeHass:
+    def __init__(self, config_dir="/tmp/pills_reminder_bench"):
+        self.data = {}
+        self.bus = FakeBus()
+        self.storage_files = {}
+        self.config = FakeConfig(config_dir)
+        self.session = FakeSession()
+        self.tasks = set()
+        self.loop = asyncio.get_event_loop()
+
+    def async_create_task(self, coro, *args, **kwargs):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def async_create_background_task(self, coro, *args, **kwargs):
+        return self.async_create_task(coro)
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def load_dataset(self, dataset):
+        for key, data in dataset.items():
+            self.storage_files[key] = json.dumps(copy.deepcopy(data))
+
+    async def cancel_tasks(self):
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+class FakeConfigEntry:
+    def __init__(self, entry_id, data, options=None):
+        self.entry_id = entry_id
+        self.data = data
+        self.options = options or {}
+
+    def async_on_unload(self, func):
+        return func
+
+    def add_update_listener(self, listener):
+        return lambda: None
+
+
+class FakeDeviceRegistry:
+    def __init__(self):
+        self.devices = {}
+
+    def async_get(self, device_id):
+        return self.devices.get(device_id)
+
+    def async_get_device(self, identifiers=None, **kwargs):
+        return None
+
+    def async_remove_device(self, device_id):
+        self.devices.pop(device_id, None)
+
+
+class FakeEntityRegistry:
+    def __init__(self):
+        self.entities = {}
+
+    def async_get(self, entity_id):
+        return self.entities.get(entity_id)
+
+    def async_remove(self, entity_id):
+        self.entities.pop(entity_id, None)
+
+
+class DataUpdateCoordinator:
+    def __init__(self, hass, logger, name=None, update_interval=None, **kwargs):
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.data = None
+        self._listeners = []
+
+    async def async_refresh(self):
+        self.data = await self._async_update_data()
+        for listener in list(self._listeners):
+            listener()
+
+    async def async_config_entry_first_refresh(self):
+        await self.async_refresh()
+
+    async def async_request_refresh(self):
+        await self.async_refresh()
+
+    def async_add_listener(self, update_callback, context=None):
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+
+class UpdateFailed(Exception):
+    pass
+
+
+class SensorEntity:
+    hass = None
+    entity_id = None
+
+    def async_on_remove(self, func):
+        pass
+
+    def async_write_ha_state(self):
+        pass
+
+    async def async_remove(self, *, force_remove=False):
+        pass
+
+
+class SensorDeviceClass(enum.Enum):
+    TIMESTAMP = "timestamp"
+
+
+class EntityCategory(enum.Enum):
+    CONFIG = "config"
+    DIAGNOSTIC = "diagnostic"
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    """Регистрирует заглушки и возвращает загруженный пакет интеграции"""
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+
+    device_registry = FakeDeviceRegistry()
+    entity_registry = FakeEntityRegistry()
+
+    _module("homeassistant")
+    _module("homeassistant.core", HomeAssistant=FakeHass, callback=lambda func: func,
+            ServiceCall=object, Event=object)
+    _module("homeassistant.const", EntityCategory=EntityCategory,
+            EVENT_HOMEASSISTANT_STOP="homeassistant_stop")
+    _module("homeassistant.config_entries", ConfigEntry=FakeConfigEntry)
+    _module("homeassistant.helpers")
+    _module("homeassistant.helpers.storage", Store=FakeStore)
+    _module("homeassistant.helpers.aiohttp_client", async_get_clientsession=lambda hass: hass.session)
+    _module("homeassistant.helpers.device_registry", async_get=lambda hass: device_registry,
+            async_entries_for_config_entry=lambda registry, entry_id: [],
+            EVENT_DEVICE_REGISTRY_UPDATED="device_registry_updated")
+    _module("homeassistant.helpers.entity_registry", async_get=lambda hass: entity_registry,
+            async_entries_for_config_entry=lambda registry, entry_id: [],
+            EVENT_ENTITY_REGISTRY_UPDATED="entity_registry_updated")
+    _module("homeassistant.helpers.entity", EntityCategory=EntityCategory)
+    _module("homeassistant.helpers.config_validation", slug=str, string=str, boolean=bool,
+            positive_int=int, isdir=str, path=str)
+    _module("homeassistant.helpers.entity_platform", AddEntitiesCallback=object)
+    _module("homeassistant.helpers.update_coordinator", DataUpdateCoordinator=DataUpdateCoordinator,
+            UpdateFailed=UpdateFailed)
+    _module("homeassistant.components")
+    _module("homeassistant.components.sensor", SensorEntity=SensorEntity, SensorDeviceClass=SensorDeviceClass)
+    _module("homeassistant.components.diagnostics",
+            async_redact_data=lambda data, keys: {k: ("**REDACTED**" if k in keys else v) for k, v in data.items()})
+
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, os.path.join(PACKAGE_DIR, "__init__.py"), submodule_search_locations=[PACKAGE_DIR]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = package
+    spec.loader.exec_module(package)
+    return package
@@ -0,0 +1,119 @@
+"""Генератор синтетических данных: N пользователей × M витаминок × D дней истории × архивные курсы."""
+import random
+from datetime import datetime, timedelta
+
+PILL_NAMES = ["Витамин D", "Омега-3", "Магний", "Цинк", "Железо", "Витамин C", "B12", "Кальций"]
+
+
+def pill_name(index):
+    base = PILL_NAMES[index % len(PILL_NAMES)]
+    return base if index < len(PILL_NAMES) else f"{base} {index // len(PILL_NAMES) + 1}"
+
+
+def user_id(index):
+    return str(100000 + index)
+
+
+def reminder_id(user_index, pill_index):
+    return str(1700000000 + user_index * 1000 + pill_index)
+
+
+def generate_history(users, pills, days, doses_per_day=2, seed=1, now=None):
+    """Список записей истории в формате PillsReminderBot.mark_as_taken"""
+    rnd = random.Random(seed)
+    now = now or datetime.now()
+    history = []
+    for day in range(days, 0, -1):
+        for user in range(users):
+            for pill in range(pills):
+                for dose in range(doses_per_day):
+                    hour = (8 + dose * 12) % 24
+                    date = (now - timedelta(days=day)).replace(hour=hour, minute=rnd.randint(0, 59))
+                    history.append({
+                        'date': date.isoformat(),
+                        'status': 'taken' if rnd.random() < 0.85 else 'skipped',
+                        'user_id': user_id(user),
+                        'reminder_id': reminder_id(user, pill),
+                        'pill_name': pill_name(pill),
+                        'dosage': '1 таблетка',
+                        'course_number': 1,
+                        'time_index': dose,
+                        'time_taken': f"{hour:02d}:00",
+                        'action_by': int(user_id(user)),
+                    })
+    return history
+
+
+def generate_users(users, pills, doses_per_day=2, days=30, now=None):
+    """Данные хранилища pills_reminder_users"""
+    now = now or datetime.now()
+    users_data = {}
+    for user in range(users):
+        reminders = {}
+        for pill in range(pills):
+            times = [{"time": f"{(8 + dose * 12) % 24:02d}:00"} for dose in range(doses_per_day)]
+            reminders[reminder_id(user, pill)] = {
+                "pill_name": pill_name(pill),
+                "dosage": "1 таблетка",
+                "description": "для бенчмарка",
+                "duration_days": days + 30,
+                "times_per_day": doses_per_day,
+                "times": times,
+                "course_number": 1,
+                "active": True,
+                "created": (now - timedelta(days=days)).isoformat(),
+            }
+        users_data[user_id(user)] = {
+            "username": f"user{user}",
+            "first_name": f"User {user}",
+            "chat_id": int(user_id(user)),
+            "reminders": reminders,
+        }
+    return users_data
+
+
+def generate_archive(users, pills, courses, course_days=30, doses_per_day=2, seed=2, now=None):
+    """Данные хранилища pills_reminder_archive: courses завершенных курсов на витаминку"""
+    rnd = random.Random(seed)
+    now = now or datetime.now()
+    archive = []
+    for user in range(users):
+        for pill in range(pills):
+            for course in range(courses):
+                end = now - timedelta(days=(courses - course) * course_days)
+                start = end - timedelta(days=course_days)
+                history = generate_history(1, 1, course_days, doses_per_day, seed=rnd.random(), now=end)
+                for entry in history:
+                    entry.update({'user_id': user_id(user), 'pill_name': pill_name(pill)})
+                taken = sum(1 for entry in history if entry['status'] == 'taken')
+                archive.append({
+                    'user_id': user_id(user),
+                    'reminder_id': f"a{reminder_id(user, pill)}{course}",
+                    'reminder_data': {
+                        "pill_name": pill_name(pill),
+                        "dosage": "1 таблетка",
+                        "description": "",
+                        "duration_days": course_days,
+                        "times_per_day": doses_per_day,
+                        "times": [{"time": f"{(8 + d * 12) % 24:02d}:00"} for d in range(doses_per_day)],
+                        "course_number": course + 1,
+                        "created": start.isoformat(),
+                    },
+                    'history': history,
+                    'start_date': start.isoformat(),
+                    'end_date': end.isoformat(),
+                    'total_taken': taken,
+                    'total_skipped': len(history) - taken,
+                    'archived_at': end.isoformat(),
+                })
+    return archive
+
+
+def generate_dataset(users, pills, days, courses, doses_per_day=2, prefix="pills_reminder"):
+    """Содержимое хранилищ бота; prefix - результат telegram_bot.storage_prefix(token)"""
+    now = datetime.now()
+    return {
+        f'{prefix}_users': generate_users(users, pills, doses_per_day, days, now),
+        f'{prefix}_global': {'history': generate_history(users, pills, days, doses_per_day, now=now)},
+        f'{prefix}_archive': {'archive': generate_archive(users, pills, courses, doses_per_day=doses_per_day, now=now)},
+    }
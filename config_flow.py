@@ -12,6 +12,9 @@ class PillsReminderConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
         
         if user_input is not None:
+            # Один токен - одна запись: бот с общим поллером и хранилищами
+            # шлет напоминания в чат своей записи
+            self._async_abort_entries_match({CONF_BOT_TOKEN: user_input[CONF_BOT_TOKEN]})
             return self.async_create_entry(
                 title=f"Pills Reminder Bot",
                 data=user_input
@@ -41,15 +44,34 @@ class PillsReminderOptionsFlow(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
+        errors = {}
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            token = user_input.get(CONF_BOT_TOKEN)
+            if token and any(
+                entry.entry_id != self.config_entry.entry_id
+                and {**entry.data, **entry.options}.get(CONF_BOT_TOKEN) == token
+                for entry in self.hass.config_entries.async_entries(DOMAIN)
+            ):
+                errors[CONF_BOT_TOKEN] = "already_configured"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
         data_schema = vol.Schema({
             vol.Optional(CONF_BOT_TOKEN, default=self.config_entry.data.get(CONF_BOT_TOKEN, "")): str,
             vol.Optional(CONF_CHAT_ID, default=self.config_entry.data.get(CONF_CHAT_ID, "")): str,
+            vol.Optional(
+                CONF_API_URL,
+                default=self.config_entry.options.get(CONF_API_URL, self.config_entry.data.get(CONF_API_URL, DEFAULT_API_URL))
+            ): str,
+            vol.Optional(
+                CONF_NAG_MODE,
+                default=self.config_entry.options.get(CONF_NAG_MODE, DEFAULT_NAG_MODE)
+            ): vol.In(NAG_MODES),
         })
 
         return self.async_show_form(
             step_id="init",
-            data_schema=data_schema
+            data_schema=data_schema,
+            errors=errors
         )
\ No newline at end of file
@@ -1,7 +1,18 @@
 DOMAIN = "pills_reminder"
 CONF_BOT_TOKEN = "bot_token"
 CONF_CHAT_ID = "chat_id"
+CONF_API_URL = "api_url"
+CONF_NAG_MODE = "nag_mode"
 CONF_USER_ID = "user_id"
 CONF_USERNAME = "username"
 CONF_PILL_NAME = "pill_name"
-CONF_REMINDER_TIME = "reminder_time"
\ No newline at end of file
+CONF_REMINDER_TIME = "reminder_time"
+
+DEFAULT_API_URL = "https://api.telegram.org"
+
+# Повторные напоминания: новое сообщение, правка исходного или его перенос вниз чата
+NAG_MODE_REPOST = "repost"
+NAG_MODE_EDIT = "edit"
+NAG_MODE_BUMP = "bump"
+NAG_MODES = [NAG_MODE_REPOST, NAG_MODE_EDIT, NAG_MODE_BUMP]
+DEFAULT_NAG_MODE = NAG_MODE_REPOST
@@ -0,0 +1,42 @@
+"""Diagnostics support for Pills Reminder."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import CONF_BOT_TOKEN, CONF_CHAT_ID, DOMAIN
+
+TO_REDACT = {CONF_BOT_TOKEN, CONF_CHAT_ID}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    bot = entry_data.get('bot')
+    coordinator = entry_data.get('coordinator')
+    
+    diagnostics = {
+        'entry': {
+            'data': async_redact_data(dict(entry.data), TO_REDACT),
+            'options': async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    
+    if bot:
+        users_data = await bot.users_storage.async_load() or {}
+        history_data = await bot.storage.async_load() or {'history': []}
+        archive_data = await bot.archive_storage.async_load() or {'archive': []}
+        diagnostics.update({
+            'metrics': bot.metrics.as_dict(),
+            'render_cache': bot.renders.as_dict(),
+            'counts': {
+                'users': len(users_data),
+                'reminders': sum(len(user.get('reminders', {})) for user in users_data.values()),
+                'history_entries': len(history_data.get('history', [])),
+                'archived_courses': len(archive_data.get('archive', [])),
+                'active_reminders': len(bot.active_reminders),
+                'send_queue': len(bot.outbox),
+                'send_queue_rate_limited': bot.outbox.rate_limited,
+                'setup_sessions': len(bot.wizard),
+                'entities': len(coordinator.entities) if coordinator and coordinator.entities is not None else 0,
+            },
+        })
+    
+    return diagnostics
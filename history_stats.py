@@ -0,0 +1,180 @@
+"""Колоночное представление истории приемов на NumPy.
+
+Здесь только счетчики и выборки для координатора и /history. Серии,
+соблюдение за 30/90 дней и задержки считает AdherenceTracker (adherence.py).
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_SKIPPED = 0
+STATUS_TAKEN = 1
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_naive_local(value):
+    """Приводит datetime к наивному локальному времени"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def to_seconds(value):
+    """Секунды от эпохи для наивного локального datetime (без учета DST)"""
+    return (to_naive_local(value) - _EPOCH).total_seconds()
+
+
+def from_seconds(seconds):
+    return _EPOCH + timedelta(seconds=float(seconds))
+
+
+def _entry_key(entry):
+    return (entry.get('date'), entry.get('user_id'), entry.get('reminder_id'), entry.get('time_index'))
+
+
+class HistoryColumns:
+    """История приемов в виде массивов NumPy.
+
+    Каждая запись истории - строка из колонок: время (секунды от эпохи),
+    индекс пользователя, индекс витаминки и статус. Агрегаты сенсоров
+    (counts, last_taken) считаются группировкой по ключу
+    user_idx * n_pills + pill_idx. Серии и окна соблюдения здесь не
+    считаются: их инкрементально ведет AdherenceTracker.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.users = []
+        self.pills = []
+        self._user_index = {}
+        self._pill_index = {}
+        self.timestamp = np.empty(0, dtype=np.float64)
+        self.user_idx = np.empty(0, dtype=np.int32)
+        self.pill_idx = np.empty(0, dtype=np.int32)
+        self.status = np.empty(0, dtype=np.int8)
+        self.position = np.empty(0, dtype=np.int64)
+        self._synced_len = 0
+        self._synced_head = None
+        self._synced_tail = None
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def sync(self, history):
+        """Синхронизирует колонки со списком истории.
+
+        Если список только дополнился в конце, разбираются лишь новые записи,
+        иначе колонки строятся заново.
+        """
+        count = len(history)
+        appended_only = (
+            self._synced_len
+            and count >= self._synced_len
+            and _entry_key(history[0]) == self._synced_head
+            and _entry_key(history[self._synced_len - 1]) == self._synced_tail
+        )
+        if appended_only:
+            tail_start = self._synced_len
+        else:
+            self._reset()
+            tail_start = 0
+
+        if count > tail_start:
+            self._extend(history, tail_start)
+
+        self._synced_len = count
+        self._synced_head = _entry_key(history[0]) if history else None
+        self._synced_tail = _entry_key(history[-1]) if history else None
+        return self
+
+    def _index_of(self, index, values, key):
+        idx = index.get(key)
+        if idx is None:
+            idx = len(values)
+            index[key] = idx
+            values.append(key)
+        return idx
+
+    def _extend(self, history, start):
+        timestamps, users, pills, statuses, positions = [], [], [], [], []
+        for position in range(start, len(history)):
+            entry = history[position]
+            try:
+                date = to_naive_local(datetime.fromisoformat(entry['date']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            timestamps.append((date - _EPOCH).total_seconds())
+            users.append(self._index_of(self._user_index, self.users, str(entry.get('user_id'))))
+            pills.append(self._index_of(self._pill_index, self.pills, entry.get('pill_name')))
+            statuses.append(STATUS_TAKEN if entry.get('status') == 'taken' else STATUS_SKIPPED)
+            positions.append(position)
+
+        self.timestamp = np.concatenate((self.timestamp, np.asarray(timestamps, dtype=np.float64)))
+        self.user_idx = np.concatenate((self.user_idx, np.asarray(users, dtype=np.int32)))
+        self.pill_idx = np.concatenate((self.pill_idx, np.asarray(pills, dtype=np.int32)))
+        self.status = np.concatenate((self.status, np.asarray(statuses, dtype=np.int8)))
+        self.position = np.concatenate((self.position, np.asarray(positions, dtype=np.int64)))
+
+    def _group_keys(self):
+        return self.user_idx.astype(np.int64) * max(len(self.pills), 1) + self.pill_idx
+
+    def _key_of(self, group_key):
+        user_idx, pill_idx = divmod(int(group_key), max(len(self.pills), 1))
+        return self.users[user_idx], self.pills[pill_idx]
+
+    def _mask(self, user_id=None, pill_name=None, since=None, until=None):
+        mask = np.ones(len(self), dtype=bool)
+        if user_id is not None:
+            user_idx = self._user_index.get(str(user_id))
+            if user_idx is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.user_idx == user_idx
+        if pill_name is not None:
+            pill_idx = self._pill_index.get(pill_name)
+            if pill_idx is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.pill_idx == pill_idx
+        if since is not None:
+            mask &= self.timestamp >= to_seconds(since)
+        if until is not None:
+            mask &= self.timestamp < to_seconds(until)
+        return mask
+
+    def select(self, user_id=None, pill_name=None, since=None, until=None):
+        """Позиции подходящих записей в исходном списке истории"""
+        return self.position[self._mask(user_id, pill_name, since, until)]
+
+    def counts(self, since=None, until=None, user_id=None):
+        """Возвращает {(user_id, pill_name): (taken, skipped)}"""
+        mask = self._mask(user_id=user_id, since=since, until=until)
+        keys = self._group_keys()[mask]
+        if not len(keys):
+            return {}
+        size = len(self.users) * max(len(self.pills), 1)
+        total = np.bincount(keys, minlength=size)
+        taken = np.bincount(keys, weights=self.status[mask], minlength=size).astype(np.int64)
+        return {
+            self._key_of(key): (int(taken[key]), int(total[key] - taken[key]))
+            for key in np.flatnonzero(total)
+        }
+
+    def last_taken(self):
+        """Возвращает {(user_id, pill_name): datetime} последнего приема"""
+        mask = self.status == STATUS_TAKEN
+        keys = self._group_keys()[mask]
+        if not len(keys):
+            return {}
+        timestamps = self.timestamp[mask]
+        order = np.lexsort((timestamps, keys))
+        sorted_keys = keys[order]
+        last = np.flatnonzero(np.append(sorted_keys[1:] != sorted_keys[:-1], True))
+        return {
+            self._key_of(sorted_keys[i]): from_seconds(timestamps[order[i]])
+            for i in last
+        }
@@ -0,0 +1,59 @@
+"""Учет фоновых задач бота для корректной остановки."""
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Сколько секунд остановка бота ждет обработчиков и отправки очереди
+SHUTDOWN_TIMEOUT = 10
+
+
+class TaskTracker:
+    """Все задачи, запущенные ботом, с видом задачи.
+
+    Виды: poller, scheduler, handler (обработка апдейта), send (отправка
+    напоминания планировщиком), nag (повторные напоминания). После stopping = True поллер и планировщик не берут
+    новую работу, а остановка дожидается оставшихся задач с дедлайном.
+    """
+
+    def __init__(self, hass):
+        self.hass = hass
+        self.stopping = False
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def spawn(self, coro, kind):
+        task = self.hass.async_create_task(coro)
+        self._tasks[task] = kind
+        task.add_done_callback(self._forget)
+        return task
+
+    def _forget(self, task):
+        self._tasks.pop(task, None)
+
+    def counts(self):
+        result = {}
+        for kind in self._tasks.values():
+            result[kind] = result.get(kind, 0) + 1
+        return result
+
+    def cancel(self, *kinds):
+        for task, kind in list(self._tasks.items()):
+            if kind in kinds:
+                task.cancel()
+
+    async def wait(self, timeout):
+        """Ждет завершения задач не дольше timeout; возвращает число незавершенных"""
+        tasks = list(self._tasks)
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=max(timeout, 0))
+        return len(pending)
+
+    async def cancel_all(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
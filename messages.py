@@ -0,0 +1,128 @@
+"""Шаблоны сообщений бота: разбираются один раз, выбираются по языку пользователя."""
+import html
+import json
+import logging
+import os
+from string import Formatter
+
+_LOGGER = logging.getLogger(__name__)
+
+MESSAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "messages")
+DEFAULT_LOCALE = "ru"
+
+
+class Markup(str):
+    """Готовый HTML (отрисованный шаблон или фрагмент) - повторно не экранируется"""
+
+
+def escape(value):
+    """Значение для сообщения с parse_mode HTML"""
+    if isinstance(value, Markup):
+        return value
+    return Markup(html.escape(str(value), quote=False))
+
+
+def normalize_locale(language_code):
+    """Язык из language_code Telegram: en-US -> en"""
+    if not language_code:
+        return None
+    return str(language_code).split("-")[0].lower()
+
+
+class Template:
+    """Шаблон str.format, разобранный на литералы и поля при загрузке.
+
+    Отрисовка - склейка частей без повторного разбора; подставляемые
+    значения экранируются, кроме Markup (вложенных фрагментов). Для текста
+    без разметки (кнопки, описания команд) convert=str.
+    """
+
+    __slots__ = ("key", "parts")
+
+    def __init__(self, key, text):
+        self.key = key
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"Template {key}: format specs are not supported")
+            if field == "":
+                raise ValueError(f"Template {key}: positional fields are not supported")
+            self.parts.append((literal, field))
+
+    def render(self, values, convert=escape):
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(convert(values[field]))
+        return Markup("".join(out)) if convert is escape else "".join(out)
+
+
+class MessageCatalog:
+    """Шаблоны по языкам из messages/<язык>.json.
+
+    Ключа нет в языке пользователя - берется шаблон DEFAULT_LOCALE, поэтому
+    перевод может быть неполным. Файлы читаются один раз при запуске бота.
+    """
+
+    def __init__(self, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        self._templates = {}  # {locale: {key: Template}}
+
+    @property
+    def locales(self):
+        return sorted(self._templates)
+
+    def load(self, directory=MESSAGES_DIR):
+        """Читает и разбирает все файлы каталога (блокирующий вызов - из исполнителя)"""
+        templates = {}
+        for filename in sorted(os.listdir(directory)):
+            locale, extension = os.path.splitext(filename)
+            if extension != ".json":
+                continue
+            with open(os.path.join(directory, filename), encoding="utf-8") as file:
+                raw = json.load(file)
+            templates[locale] = {key: Template(key, text) for key, text in raw.items()}
+        if self.default_locale not in templates:
+            raise ValueError(f"No messages for default locale {self.default_locale}")
+        self._templates = templates
+        _LOGGER.debug(f"Loaded message templates: {', '.join(self.locales)}")
+        return self
+
+    async def async_load(self, hass):
+        await hass.async_add_executor_job(self.load)
+
+    def locale_of(self, user_data, language_code=None):
+        """Язык пользователя, если для него есть шаблоны, иначе язык по умолчанию.
+
+        Пока профиль не сохранен (до первого напоминания), язык берется
+        из language_code Telegram.
+        """
+        locale = (user_data or {}).get("language") or normalize_locale(language_code)
+        return locale if locale in self._templates else self.default_locale
+
+    def _template(self, locale, key):
+        template = self._templates.get(locale, {}).get(key)
+        if template is None:
+            template = self._templates[self.default_locale][key]
+        return template
+
+    def render(self, locale, key, **values):
+        return self._template(locale, key).render(values)
+
+    def plain(self, locale, key, **values):
+        """Текст без HTML: кнопки и описания команд, значения не экранируются"""
+        return self._template(locale, key).render(values, str)
+
+    def pill(self, locale, pill_name, dosage="", course_number=1):
+        """Общий фрагмент: название, дозировка и номер курса"""
+        return self.render(
+            locale, "pill",
+            pill_name=pill_name,
+            dosage=self.render(locale, "pill_dosage", dosage=dosage) if dosage else "",
+            course=self.render(locale, "pill_course", course_number=course_number) if course_number > 1 else "",
+        )
+
+    def pill_of(self, locale, reminder):
+        return self.pill(locale, reminder.get("pill_name", ""), reminder.get("dosage", ""),
+                         reminder.get("course_number", 1))
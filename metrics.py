@@ -0,0 +1,249 @@
+"""Счетчики и таймеры горячих путей бота для диагностических сенсоров."""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+
+from homeassistant.helpers.storage import Store
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TimingStats:
+    """Количество, суммарное, последнее и максимальное время в секундах"""
+
+    __slots__ = ('count', 'total', 'last', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.average * 1000, 2),
+            'last_ms': round(self.last * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class StorageStats:
+    __slots__ = ('loads', 'saves', 'bytes', 'errors')
+
+    def __init__(self):
+        self.loads = TimingStats()
+        self.saves = TimingStats()
+        self.bytes = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            'loads': self.loads.as_dict(),
+            'saves': self.saves.as_dict(),
+            'bytes': self.bytes,
+            'errors': self.errors,
+        }
+
+
+class ApiStats:
+    __slots__ = ('timing', 'statuses', 'retries', 'errors')
+
+    def __init__(self):
+        self.timing = TimingStats()
+        self.statuses = defaultdict(int)
+        self.retries = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            **self.timing.as_dict(),
+            'statuses': dict(self.statuses),
+            'retries': self.retries,
+            'errors': self.errors,
+        }
+
+
+class BotMetrics:
+    """Метрики одного экземпляра PillsReminderBot"""
+
+    def __init__(self):
+        self.handlers = defaultdict(TimingStats)
+        self.handler_errors = defaultdict(int)
+        self.storage = defaultdict(StorageStats)
+        self.telegram = defaultdict(ApiStats)
+        self.scheduler_lag = TimingStats()
+        self.coordinator_refresh = TimingStats()
+        self.startup = {}
+        self.started = time.time()
+
+    @staticmethod
+    def route_of(update):
+        """Маршрут апдейта: команда, шаг диалога или префикс callback_data"""
+        if "callback_query" in update:
+            parts = []
+            for part in update["callback_query"].get("data", "").split("_"):
+                if not part or part[0].isdigit() or part[0] == "-":
+                    break
+                parts.append(part)
+            return "callback:" + ("_".join(parts) or "unknown")
+        if "message" in update:
+            text = update["message"].get("text", "")
+            if text.startswith("/"):
+                return "command:" + text.split()[0].split("@")[0]
+            return "message"
+        return "other"
+
+    def record_handler(self, route, seconds, failed=False):
+        self.handlers[route].add(seconds)
+        if failed:
+            self.handler_errors[route] += 1
+
+    def record_api(self, method, seconds, status=None, retry=False, failed=False):
+        stats = self.telegram[method]
+        stats.timing.add(seconds)
+        if status is not None:
+            stats.statuses[str(status)] += 1
+        if retry:
+            stats.retries += 1
+        if failed:
+            stats.errors += 1
+
+    def record_startup(self, phase, seconds):
+        """Длительность этапа запуска (настройка записи, загрузка хранилищ, готовность)"""
+        self.startup[phase] = round(seconds * 1000, 2)
+
+    def handler_summary(self):
+        count = sum(stats.count for stats in self.handlers.values())
+        total = sum(stats.total for stats in self.handlers.values())
+        return round(total / count * 1000, 2) if count else 0.0
+
+    def api_summary(self):
+        count = sum(stats.timing.count for stats in self.telegram.values())
+        total = sum(stats.timing.total for stats in self.telegram.values())
+        return round(total / count * 1000, 2) if count else 0.0
+
+    def storage_summary(self):
+        return sum(stats.saves.count + stats.loads.count for stats in self.storage.values())
+
+    def as_dict(self):
+        return {
+            'uptime_s': round(time.time() - self.started),
+            'handlers': {route: stats.as_dict() for route, stats in self.handlers.items()},
+            'handler_errors': dict(self.handler_errors),
+            'storage': {key: stats.as_dict() for key, stats in self.storage.items()},
+            'telegram': {method: stats.as_dict() for method, stats in self.telegram.items()},
+            'scheduler_lag': self.scheduler_lag.as_dict(),
+            'coordinator_refresh': self.coordinator_refresh.as_dict(),
+            'startup_ms': dict(self.startup),
+        }
+
+
+class PillsStore(Store):
+    """Store с данными в памяти и записью времени и объема загрузок и сохранений.
+
+    Файл читается один раз: бот и координатор получают один и тот же
+    объект, а async_save обновляет его и записывает на диск. revision
+    растет с каждой записью, слушатели вызываются после нее.
+
+    revision_of(user_id) - ревизия данных одного пользователя: запись с
+    changed=[user_id] меняет только ее, а запись без changed (изменения
+    нескольких пользователей, импорт) - ревизии всех пользователей.
+    """
+
+    def __init__(self, hass, key, metrics=None):
+        super().__init__(hass, 1, key)
+        self.metrics = metrics
+        self._loaded = False
+        self._cached = None
+        self._load_lock = asyncio.Lock()
+        self.revision = 0
+        self._full_revision = 0
+        self._user_revisions = {}
+        self._listeners = []
+
+    def async_add_listener(self, listener):
+        """listener(store) вызывается после каждой записи; возвращает функцию отписки"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def revision_of(self, user_id):
+        return max(self._user_revisions.get(str(user_id), 0), self._full_revision)
+
+    def _notify(self, changed=None):
+        self.revision += 1
+        if changed is None:
+            self._full_revision = self.revision
+        else:
+            for user_id in changed:
+                self._user_revisions[str(user_id)] = self.revision
+        for listener in list(self._listeners):
+            listener(self)
+
+    def _file_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    async def async_load(self):
+        if self._loaded:
+            return self._cached
+        # Параллельные первые загрузки (бот и координатор при старте) читают файл один раз
+        async with self._load_lock:
+            if not self._loaded:
+                self._cached = await self._async_load_file()
+                self._loaded = True
+        return self._cached
+
+    async def _async_load_file(self):
+        if self.metrics is None:
+            return await super().async_load()
+        stats = self.metrics.storage[self.key]
+        started = time.perf_counter()
+        try:
+            return await super().async_load()
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.loads.add(time.perf_counter() - started)
+            stats.bytes = self._file_size()
+
+    async def async_save(self, data, changed=None):
+        """Сохраняет данные; changed - пользователи, чьи данные изменились (None - все)"""
+        self._cached = data
+        self._loaded = True
+        # Память уже содержит новые данные - читатели видят их, не дожидаясь диска
+        self._notify(changed)
+        if self.metrics is None:
+            return await super().async_save(data)
+        stats = self.metrics.storage[self.key]
+        started = time.perf_counter()
+        try:
+            return await super().async_save(data)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.saves.add(time.perf_counter() - started)
+            stats.bytes = self._file_size()
+
+    async def async_remove(self):
+        self._cached = None
+        self._loaded = False
+        self._notify()
+        await super().async_remove()
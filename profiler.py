@@ -0,0 +1,49 @@
+"""Профилирование интеграции по запросу без перезапуска Home Assistant."""
+import asyncio
+import cProfile
+import logging
+import os
+from datetime import datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_DIR = "pills_reminder_profiles"
+
+_lock = asyncio.Lock()
+
+
+async def async_profile(hass, duration, name=None):
+    """Профилирует цикл событий HA в течение duration секунд.
+
+    Все задачи бота (poll_updates, reminder_scheduler, повторы напоминаний)
+    и обновления координатора выполняются в потоке цикла событий, поэтому
+    cProfile, включенный в этом потоке, видит их все. Результат сохраняется
+    в <config>/pills_reminder_profiles/*.prof - файл открывается snakeviz,
+    а flameprof или gprof2dot строят по нему flamegraph.
+    """
+    if _lock.locked():
+        raise RuntimeError("Profiling is already running")
+
+    async with _lock:
+        profiler = cProfile.Profile()
+        _LOGGER.info(f"Profiling pills_reminder for {duration} s")
+        try:
+            profiler.enable()
+        except ValueError as err:
+            # В потоке уже работает другой профилировщик (например, profiler.start HA)
+            raise RuntimeError(f"Another profiler is active: {err}") from err
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+
+        filename = f"{name or 'profile'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+        path = hass.config.path(PROFILE_DIR, filename)
+        await hass.async_add_executor_job(_dump_stats, profiler, path)
+        _LOGGER.warning(f"Pills reminder profile saved to {path}")
+        return path
+
+
+def _dump_stats(profiler, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
@@ -0,0 +1,109 @@
+"""Индекс устройств записи интеграции по пользователю и лекарству."""
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def pill_slug(pill_name):
+    """Лекарство в идентификаторах устройств и unique_id сенсоров"""
+    return pill_name.replace(' ', '_').replace('-', '_').lower()
+
+
+class RegistryIndex:
+    """Устройства одной записи по ключу (user_id, slug лекарства).
+
+    Строится один раз из реестра устройств для config entry и дальше
+    обновляется его событиями, поэтому поиск и сверка устройств стоят
+    O(изменений), а не O(всех устройств HA). Ключ (user_id, None) -
+    устройство пользователя, (None, None) - общее устройство записи.
+    Сущности не индексируются: HA удаляет их вместе с устройством.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        self.hass = hass
+        self.entry_id = entry_id
+        self._user_prefix = f"{entry_id}_user_"
+        self._devices = {}  # {key: device_id}
+        self._device_keys = {}  # {device_id: key}
+        self._user_keys = {}  # {user_id: set(keys)}
+        self._unsubscribe = []
+
+    def _key_of(self, device):
+        for domain, identifier in device.identifiers:
+            if domain != DOMAIN:
+                continue
+            if identifier == self.entry_id:
+                return (None, None)
+            if identifier.startswith(self._user_prefix):
+                user_id, _, slug = identifier[len(self._user_prefix):].partition("_")
+                return (user_id, slug or None)
+        return None
+
+    @callback
+    def async_setup(self):
+        """Заполняет индекс из реестра устройств и подписывается на его изменения"""
+        device_registry = dr.async_get(self.hass)
+        for device in dr.async_entries_for_config_entry(device_registry, self.entry_id):
+            self._add_device(device)
+        self._unsubscribe = [
+            self.hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_updated),
+        ]
+        _LOGGER.debug(f"Registry index built: {len(self._devices)} devices")
+
+    @callback
+    def async_stop(self):
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+
+    def _add_device(self, device):
+        key = self._key_of(device)
+        if key is None:
+            return
+        self._discard_device(device.id)
+        self._devices[key] = device.id
+        self._device_keys[device.id] = key
+        if key[0] is not None:
+            self._user_keys.setdefault(key[0], set()).add(key)
+
+    def _discard_device(self, device_id):
+        key = self._device_keys.pop(device_id, None)
+        if key is None:
+            return
+        if self._devices.get(key) == device_id:
+            del self._devices[key]
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+    @callback
+    def _async_device_updated(self, event):
+        action = event.data.get("action")
+        device_id = event.data.get("device_id")
+        if action == "remove":
+            self._discard_device(device_id)
+            return
+        device = dr.async_get(self.hass).async_get(device_id)
+        if device and self.entry_id in device.config_entries:
+            self._add_device(device)
+        else:
+            self._discard_device(device_id)
+
+    def device_id(self, user_id, pill_name=None):
+        return self._devices.get((str(user_id), pill_slug(pill_name) if pill_name else None))
+
+    def users(self):
+        """Пользователи, у которых есть устройства"""
+        return set(self._user_keys)
+
+    def user_device_ids(self, user_id):
+        """Устройство пользователя и устройства всех его лекарств"""
+        return [self._devices[key] for key in self._user_keys.get(str(user_id), ())]
+
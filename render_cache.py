@@ -0,0 +1,91 @@
+"""Кэш отрисованных ответов бота по версиям данных."""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Курсов на странице /archive и лимит текста страницы: Telegram принимает
+# до 4096 символов, запас оставлен на заголовок и подвал страницы
+ARCHIVE_PAGE_COURSES = 5
+PAGE_TEXT_LIMIT = 3500
+
+
+class RenderCache:
+    """Ответы /status, /manage, /history и /archive по (пользователь, вид).
+
+    Ответ хранится вместе с версией - кортежем ревизий данных пользователя
+    в хранилищах (PillsStore.revision_of) и других входов отрисовки (дата,
+    ближайшие срабатывания). Запись данных пользователя увеличивает его
+    ревизию, поэтому следующий запрос перерисует ответ, а отметки приема
+    других пользователей его кэш не сбрасывают. На вид хранится одна версия, так
+    что размер кэша ограничен числом пользователей.
+    """
+
+    def __init__(self):
+        self._entries = {}  # {(user_id, view): (version, value)}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, user_id, view, version):
+        entry = self._entries.get((str(user_id), view))
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, user_id, view, version, value):
+        self._entries[(str(user_id), view)] = (version, value)
+        return value
+
+    def invalidate(self, user_id):
+        """Удаляет ответы пользователя (после очистки его данных)"""
+        for key in [key for key in self._entries if key[0] == str(user_id)]:
+            del self._entries[key]
+
+    def as_dict(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def split_block(block, limit=PAGE_TEXT_LIMIT):
+    """Делит блок длиннее limit на части, по возможности по строкам.
+
+    Строка длиннее limit режется по символам, но не внутри HTML-сущности
+    (&amp;): текст в блоках уже экранирован, поэтому каждый & ее начинает.
+    """
+    parts = []
+    while len(block) > limit:
+        cut = block.rfind("\n", 0, limit) + 1
+        if cut <= 0:
+            cut = limit
+            entity = block.rfind("&", max(cut - 8, 0), cut)
+            if entity > 0 and ";" not in block[entity:cut]:
+                cut = entity
+        parts.append(block[:cut])
+        block = block[cut:]
+    parts.append(block)
+    return parts
+
+
+def paginate(blocks, per_page=ARCHIVE_PAGE_COURSES, limit=PAGE_TEXT_LIMIT):
+    """Раскладывает блоки текста по страницам: не больше per_page блоков и limit символов.
+
+    Возвращает страницы - списки (индекс блока, текст). Блок длиннее limit
+    делится split_block, и каждая его часть занимает отдельную страницу.
+    """
+    pages = []
+    current = []
+    size = 0
+    for index, block in enumerate(blocks):
+        for part in split_block(block, limit):
+            if current and (len(current) >= per_page or size + len(part) > limit):
+                pages.append(current)
+                current = []
+                size = 0
+            current.append((index, part))
+            size += len(part)
+    if current:
+        pages.append(current)
+    return pages
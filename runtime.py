@@ -0,0 +1,125 @@
+"""Общий рантайм интеграции: один бот (поллер, планировщик, очередь отправки) на токен."""
+import asyncio
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_BOT_TOKEN
+from .telegram_bot import PillsReminderBot
+
+_LOGGER = logging.getLogger(__name__)
+
+RUNTIME = "runtime"
+# Сколько секунд бот без записей живет до остановки: перезагрузка записи
+# успевает подхватить тот же бот без переподключения и перечитывания хранилищ
+RELEASE_GRACE = 10
+
+
+class PillsRuntime:
+    """Боты по токенам с подсчетом ссылок от записей интеграции.
+
+    Хранится в hass.data[DOMAIN][RUNTIME]. Перезагрузка записи получает
+    тот же PillsReminderBot, поэтому Telegram опрашивается один раз, а
+    хранилища (по id бота из токена) не делят несколько процессов записи.
+    Чат и настройки у бота одни, поэтому вторая запись с тем же токеном
+    не подключается (config flow такую и не создает).
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._bots = {}
+        self._entries = {}
+        self._pending_stops = {}
+        self._legacy_migrated = False
+        self._lock = asyncio.Lock()
+        # При остановке HA записи не выгружаются - останавливаем боты сами,
+        # чтобы дослать очередь и сохранить активные приемы
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_on_stop)
+
+    @property
+    def entry_count(self):
+        return len(self._entries)
+
+    def bots(self):
+        return list(self._bots.values())
+
+    def bot_for_entry(self, entry_id):
+        token = self._entries.get(entry_id)
+        return self._bots.get(token) if token else None
+
+    async def async_acquire(self, entry: ConfigEntry) -> PillsReminderBot:
+        """Возвращает бот для записи, создавая его для нового токена"""
+        config = {**entry.data, **entry.options}
+        token = config[CONF_BOT_TOKEN]
+        async with self._lock:
+            pending_stop = self._pending_stops.pop(token, None)
+            if pending_stop:
+                pending_stop.cancel()
+
+            bot = self._bots.get(token)
+            if bot is None:
+                bot = PillsReminderBot(self.hass, config)
+                if not self._legacy_migrated:
+                    await bot.migrate_legacy_storage()
+                    self._legacy_migrated = True
+                self._bots[token] = bot
+            else:
+                other_entries = bot.entry_ids - {entry.entry_id}
+                if other_entries:
+                    raise ValueError(
+                        f"Bot token is already used by entry {', '.join(sorted(other_entries))}"
+                    )
+                bot.apply_config(config)
+
+            self._entries[entry.entry_id] = token
+            bot.entry_ids.add(entry.entry_id)
+            return bot
+
+    async def async_apply_options(self, entry: ConfigEntry) -> bool:
+        """Применяет новые настройки записи к работающему боту без перезагрузки.
+
+        Возвращает False, если изменился токен - тогда нужна перезагрузка записи.
+        """
+        config = {**entry.data, **entry.options}
+        async with self._lock:
+            token = self._entries.get(entry.entry_id)
+            if token is None or token != config[CONF_BOT_TOKEN]:
+                return False
+            self._bots[token].apply_config(config)
+        _LOGGER.info("Applied new options to running pills reminder bot")
+        return True
+
+    async def async_release(self, entry_id):
+        """Отключает запись от бота; бот без записей останавливается после RELEASE_GRACE"""
+        async with self._lock:
+            token = self._entries.pop(entry_id, None)
+            bot = self._bots.get(token)
+            if bot is None:
+                return
+            bot.entry_ids.discard(entry_id)
+            if bot.entry_ids:
+                return
+            self._pending_stops[token] = self.hass.loop.call_later(
+                RELEASE_GRACE, lambda: self.hass.async_create_task(self._async_stop_idle(token))
+            )
+
+    async def _async_stop_idle(self, token):
+        async with self._lock:
+            self._pending_stops.pop(token, None)
+            bot = self._bots.get(token)
+            if bot is None or bot.entry_ids:
+                return
+            del self._bots[token]
+        await bot.stop()
+        _LOGGER.info("Stopped idle pills reminder bot")
+
+    async def _async_on_stop(self, event):
+        async with self._lock:
+            for handle in self._pending_stops.values():
+                handle.cancel()
+            self._pending_stops.clear()
+            bots = list(self._bots.values())
+            self._bots.clear()
+        await asyncio.gather(*(bot.stop() for bot in bots))
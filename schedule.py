@@ -0,0 +1,467 @@
+"""Расписание напоминаний: таблица ближайших срабатываний для планировщика и сенсоров."""
+import heapq
+import itertools
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+EVENT_FIRE = "fire"
+EVENT_COURSE_END = "course_end"
+
+WEEKDAYS_ALL = 0b1111111
+WEEKDAY_NAMES = ("пн", "вт", "ср", "чт", "пт", "сб", "вс")
+MAX_EVERY_DAYS = 30
+MAX_TIMES_PER_DAY = 6
+# "Каждые N часов" разворачивается во времена одних суток, поэтому N делит 24:
+# иначе промежуток через полночь отличался бы от остальных (5 ч: 23:00 -> 08:00).
+# Интервалы короче 4 ч дали бы больше MAX_TIMES_PER_DAY приемов
+INTERVAL_HOURS = (4, 6, 8, 12, 24)
+
+_WEEKDAY_ALIASES = {
+    **{name: 1 << index for index, name in enumerate(WEEKDAY_NAMES)},
+    **{name: 1 << index for index, name in enumerate(("mon", "tue", "wed", "thu", "fri", "sat", "sun"))},
+    "будни": 0b0011111, "weekdays": 0b0011111,
+    "выходные": 0b1100000, "weekends": 0b1100000,
+}
+_TIME_RE = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_EVERY_HOURS_RE = re.compile(r"(?:каждые|каждый|every)\s+(\d+)\s*(?:часа|часов|час|ч|hours|hour|h)\b")
+_EVERY_DAYS_RE = re.compile(r"(?:каждые|каждый|every)\s+(\d+)\s*(?:дня|дней|день|дн|days|day|d)\b")
+_EVERY_OTHER_DAY_RE = re.compile(r"через\s+день|every\s+other\s+day")
+_UTC_OFFSET_RE = re.compile(r"^(?:utc|gmt)?\s*([+-])(\d{1,2})$")
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """ZoneInfo по имени IANA или None. Первая загрузка читает tzdata с диска,
+    поэтому из event loop новые зоны стоит загружать через executor."""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def preload_zones(names):
+    """Загружает зоны в кэш get_zone (для вызова через executor)"""
+    for name in names:
+        get_zone(name)
+
+
+def parse_timezone(text):
+    """Имя зоны из ввода пользователя: "Europe/Moscow", "UTC+3", "-5".
+
+    Смещения переводятся в зоны Etc/GMT (знак в них инвертирован).
+    Возвращает имя зоны или None.
+    """
+    text = text.strip()
+    match = _UTC_OFFSET_RE.match(text.lower())
+    if match:
+        hours = int(match.group(2))
+        if hours > 14:
+            return None
+        if hours == 0:
+            return "UTC"
+        return f"Etc/GMT{'-' if match.group(1) == '+' else '+'}{hours}"
+    return text if get_zone(text) else None
+
+
+def to_utc(wall, zone):
+    """Наивное локальное время зоны -> aware UTC.
+
+    В переход на летнее время (несуществующее время) fold=0 дает смещение
+    до перехода, то есть прием сдвигается вперед на величину скачка.
+    При переходе на зимнее время (время повторяется) fold=0 выбирает
+    первое наступление, поэтому прием срабатывает один раз.
+    """
+    return wall.replace(tzinfo=zone, fold=0).astimezone(timezone.utc)
+
+
+def aware(value, default_zone=None):
+    """datetime с часовым поясом: наивные значения записаны в зоне Home Assistant (default_zone).
+
+    Без default_zone наивное значение считается локальным временем процесса.
+    """
+    if value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=default_zone, fold=0) if default_zone else value.astimezone()
+
+
+def as_utc(value, default_zone=None):
+    """aware UTC для datetime; наивные значения - время зоны Home Assistant (см. aware)"""
+    return aware(value, default_zone).astimezone(timezone.utc)
+
+
+def created_at(reminder, default_zone=None):
+    """Момент создания напоминания (aware) или None.
+
+    Новые напоминания хранят created с часовым поясом; наивные значения
+    старых версий записаны в зоне Home Assistant (default_zone).
+    """
+    try:
+        created = datetime.fromisoformat(reminder["created"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return aware(created, default_zone)
+
+
+def created_date(reminder, zone=None, default_zone=None):
+    """Дата создания напоминания в зоне пользователя или None"""
+    created = created_at(reminder, default_zone)
+    if created is None:
+        return None
+    return created.astimezone(zone).date() if zone else created.date()
+
+
+def course_day(reminder, today, zone=None, default_zone=None):
+    """Номер дня курса (с 1) на дату today в зоне пользователя zone, не больше duration_days"""
+    created = created_date(reminder, zone, default_zone)
+    if created is None:
+        return 1
+    day = (today - created).days + 1
+    duration_days = reminder.get("duration_days")
+    return min(day, duration_days) if duration_days else day
+
+
+def parse_hhmm(text):
+    """ЧЧ:ММ -> минуты от полуночи или None"""
+    try:
+        hour, minute = (int(part) for part in text.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour * 60 + minute
+    return None
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def compile_schedule(reminder, weekdays=WEEKDAYS_ALL, every_days=1, interval_hours=None):
+    """Скомпилированное расписание для reminder['times'].
+
+    minutes выровнены по индексам times (None для нераспознанного времени),
+    weekdays - битовая маска (пн = бит 0), every_days с якорной датой anchor
+    задает прием раз в N дней. anchor - запасное значение: таблица
+    срабатываний берет дату created в зоне пользователя.
+    """
+    created = reminder.get("created") or datetime.now(timezone.utc).isoformat()
+    return {
+        "minutes": [parse_hhmm(slot.get("time")) for slot in reminder.get("times", [])],
+        "weekdays": weekdays,
+        "every_days": every_days,
+        "interval_hours": interval_hours,
+        "anchor": created[:10],
+    }
+
+
+def schedule_of(reminder):
+    """Сохраненное расписание напоминания; для старых записей компилируется из times"""
+    schedule = reminder.get("schedule")
+    if schedule and len(schedule.get("minutes", [])) == len(reminder.get("times", [])):
+        return schedule
+    return compile_schedule(reminder)
+
+
+def parse_schedule_text(text):
+    """Разбирает расписание, введенное пользователем.
+
+    Понимает времена ЧЧ:ММ, дни недели (пн..вс, будни, выходные),
+    "через день", "каждые N дней" и "каждые N часов с ЧЧ:ММ".
+    Приемов в сутки не больше MAX_TIMES_PER_DAY - общее правило для
+    мастера, /add и импорта.
+    Возвращает (times, параметры для compile_schedule) или бросает ValueError.
+    """
+    text = text.lower().strip()
+    interval_hours = None
+    every_days = 1
+
+    match = _EVERY_HOURS_RE.search(text)
+    if match:
+        interval_hours = int(match.group(1))
+        if interval_hours not in INTERVAL_HOURS:
+            raise ValueError("interval_hours")
+        text = text[:match.start()] + " " + text[match.end():]
+    match = _EVERY_OTHER_DAY_RE.search(text)
+    if match:
+        every_days = 2
+        text = text[:match.start()] + " " + text[match.end():]
+    match = _EVERY_DAYS_RE.search(text)
+    if match:
+        every_days = int(match.group(1))
+        if not 1 <= every_days <= MAX_EVERY_DAYS:
+            raise ValueError("every_days")
+        text = text[:match.start()] + " " + text[match.end():]
+
+    minutes = []
+    for hour, minute in _TIME_RE.findall(text):
+        value = parse_hhmm(f"{hour}:{minute}")
+        if value is None:
+            raise ValueError("time")
+        minutes.append(value)
+    text = _TIME_RE.sub(" ", text)
+
+    weekdays = 0
+    for word in re.split(r"[\s,;]+", text):
+        if not word or word in ("с", "в", "from", "at"):
+            continue
+        if word not in _WEEKDAY_ALIASES:
+            raise ValueError(word)
+        weekdays |= _WEEKDAY_ALIASES[word]
+
+    if not minutes:
+        raise ValueError("time")
+    if interval_hours:
+        if len(minutes) != 1:
+            raise ValueError("interval_start")
+        start = minutes[0]
+        minutes = [(start + step * interval_hours * 60) % 1440 for step in range(24 // interval_hours)]
+
+    times = [{"time": format_minutes(value)} for value in sorted(set(minutes))]
+    if len(times) > MAX_TIMES_PER_DAY:
+        raise ValueError("times_per_day")
+    return times, {"weekdays": weekdays or WEEKDAYS_ALL, "every_days": every_days, "interval_hours": interval_hours}
+
+
+def describe_schedule(schedule, render):
+    """Короткое описание дней приема: "" для ежедневного расписания.
+
+    render(key, **values) - шаблон сообщения на языке пользователя.
+    """
+    parts = []
+    if schedule.get("interval_hours"):
+        parts.append(render("schedule_every_hours", hours=schedule["interval_hours"]))
+    every_days = schedule.get("every_days") or 1
+    if every_days == 2:
+        parts.append(render("schedule_every_other_day"))
+    elif every_days > 2:
+        parts.append(render("schedule_every_days", days=every_days))
+    weekdays = schedule.get("weekdays", WEEKDAYS_ALL)
+    if weekdays != WEEKDAYS_ALL:
+        names = render("weekdays_short").split(",")
+        parts.append(", ".join(name for index, name in enumerate(names) if weekdays >> index & 1))
+    return "; ".join(parts)
+
+
+def format_schedule(reminder, render):
+    """Времена приема и дни для сообщений: "08:00, 20:00 (пн, ср, пт)" """
+    times_display = [slot["time"] for slot in reminder.get("times", [])]
+    text = ", ".join(times_display) if times_display else render("not_specified")
+    description = describe_schedule(schedule_of(reminder), render)
+    return f"{text} ({description})" if description else text
+
+
+def _compiled_entry(reminder, zone=None, default_zone=None):
+    schedule = schedule_of(reminder)
+    # Интервал в днях отсчитывается от дня создания по календарю пользователя
+    anchor = created_date(reminder, zone, default_zone)
+    if anchor is None:
+        try:
+            anchor = date.fromisoformat(schedule.get("anchor") or "")
+        except ValueError:
+            anchor = None
+    anchor = anchor.toordinal() if anchor else None
+    return {
+        "slots": sorted((minutes, index) for index, minutes in enumerate(schedule["minutes"]) if minutes is not None),
+        "weekdays": schedule.get("weekdays", WEEKDAYS_ALL),
+        "every_days": schedule.get("every_days") or 1,
+        "anchor": anchor,
+    }
+
+
+def course_end(reminder, zone=None, default_zone=None):
+    """Момент окончания курса (aware UTC) или None для бесконечного.
+
+    Курс заканчивается в полночь после последнего, duration_days-го дня
+    по календарю пользователя (zone), а не во время создания: приемы
+    последнего дня срабатывают, приемы следующего - нет. Наивный created
+    записан в зоне Home Assistant (default_zone).
+    """
+    duration_days = reminder.get("duration_days")
+    if not duration_days:
+        return None
+    created = created_date(reminder, zone, default_zone)
+    if created is None:
+        return None
+    last_midnight = datetime.combine(created + timedelta(days=duration_days), time())
+    return to_utc(last_midnight, zone or default_zone or timezone.utc)
+
+
+def runs_on(compiled, day):
+    """Есть ли прием в день day по скомпилированному расписанию"""
+    if not compiled["weekdays"] >> day.weekday() & 1:
+        return False
+    if compiled["every_days"] > 1 and compiled["anchor"] is not None:
+        return (day.toordinal() - compiled["anchor"]) % compiled["every_days"] == 0
+    return True
+
+
+def next_fire(compiled, after, zone, ends_at=None):
+    """Ближайшее срабатывание строго после after (aware UTC): (время UTC, [time_index]) или (None, []).
+
+    Дни и времена приема отсчитываются по стенным часам зоны пользователя.
+    """
+    slots = compiled["slots"]
+    if not slots or not compiled["weekdays"]:
+        return None, []
+    local_day = after.astimezone(zone).date()
+    # Период совпадения маски дней недели и интервала в днях - не больше 7 * every_days
+    for day_offset in range(7 * compiled["every_days"] + 1):
+        day = local_day + timedelta(days=day_offset)
+        if not runs_on(compiled, day):
+            continue
+        # В день перехода на летнее время разные слоты могут дать один момент
+        candidates = {}
+        for minutes, index in slots:
+            fire_at = to_utc(datetime.combine(day, time(minutes // 60, minutes % 60)), zone)
+            if fire_at > after:
+                candidates.setdefault(fire_at, []).append(index)
+        if candidates:
+            fire_at = min(candidates)
+            if ends_at is not None and fire_at >= ends_at:
+                return None, []
+            return fire_at, candidates[fire_at]
+    return None, []
+
+
+class NextDueIndex:
+    """Ближайшие срабатывания по (user_id, reminder_id).
+
+    Таблица общая для планировщика и сенсоров: планировщик забирает из кучи
+    наступившие срабатывания, а сенсор next_due и /status читают то же время,
+    когда сообщение действительно будет отправлено. Запись пересчитывается
+    при изменении напоминания и после каждого срабатывания.
+
+    Все моменты хранятся в UTC, поэтому пользователи из разных зон делят
+    одну кучу; зона нужна только при расчете следующего срабатывания.
+    Когда у курса с duration_days не остается срабатываний, в кучу кладется
+    событие окончания курса в момент created + duration_days.
+    """
+
+    def __init__(self, default_zone=None):
+        self.default_zone = get_zone(default_zone) or timezone.utc
+        self._entries = {}
+        self._user_keys = {}
+        self._zones = {}
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def zone_of(self, user_id):
+        return self._zones.get(str(user_id), self.default_zone)
+
+    def set_timezone(self, user_id, zone_name, reminders=None, now=None):
+        """Меняет зону пользователя и пересчитывает его напоминания"""
+        user_id = str(user_id)
+        zone = get_zone(zone_name)
+        if zone is None:
+            self._zones.pop(user_id, None)
+        else:
+            self._zones[user_id] = zone
+        for reminder_id, reminder in (reminders or {}).items():
+            self.update(user_id, reminder_id, reminder, now)
+
+    def rebuild(self, users_data, now=None):
+        self._entries = {}
+        self._user_keys = {}
+        self._zones = {}
+        self._heap = []
+        for user_id, user_data in users_data.items():
+            self.set_timezone(user_id, user_data.get("timezone"), user_data.get("reminders"), now)
+
+    def update(self, user_id, reminder_id, reminder, now=None):
+        """Пересчитывает срабатывание напоминания после его изменения"""
+        key = (str(user_id), reminder_id)
+        if not reminder.get("active", True):
+            self._discard(key)
+            return None
+        self._user_keys.setdefault(key[0], set()).add(key)
+        entry = {
+            "pill_name": reminder.get("pill_name"),
+            "compiled": _compiled_entry(reminder, self.zone_of(key[0]), self.default_zone),
+            "ends_at": course_end(reminder, self.zone_of(key[0]), self.default_zone),
+        }
+        self._entries[key] = entry
+        return self._schedule(key, entry, as_utc(now or datetime.now(timezone.utc), self.default_zone))
+
+    def _schedule(self, key, entry, after):
+        fire_at, time_indexes = next_fire(entry["compiled"], after, self.zone_of(key[0]), entry["ends_at"])
+        entry["fire_at"] = fire_at
+        entry["time_indexes"] = time_indexes
+        event_at = fire_at if fire_at is not None else entry["ends_at"]
+        if event_at is None:
+            entry["sequence"] = None
+            return None
+        entry["sequence"] = next(self._sequence)
+        heapq.heappush(self._heap, (event_at, entry["sequence"], key))
+        return fire_at
+
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+    def remove(self, user_id, reminder_id=None):
+        user_id = str(user_id)
+        if reminder_id is not None:
+            self._discard((user_id, reminder_id))
+            return
+        for key in list(self._user_keys.get(user_id, ())):
+            self._discard(key)
+
+    def _discard_stale(self):
+        while self._heap:
+            fire_at, sequence, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry["sequence"] == sequence:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now):
+        """Забирает наступившие события и планирует следующие срабатывания.
+
+        Возвращает [(тип, user_id, reminder_id, [time_index], момент)], где тип -
+        EVENT_FIRE для приема или EVENT_COURSE_END для окончания курса.
+        Закончившийся курс из таблицы удаляется.
+        """
+        now = as_utc(now, self.default_zone)
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            event_at, _, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            if entry["fire_at"] is None:
+                due.append((EVENT_COURSE_END, key[0], key[1], [], event_at))
+                self._discard(key)
+            else:
+                due.append((EVENT_FIRE, key[0], key[1], entry["time_indexes"], event_at))
+                self._schedule(key, entry, max(event_at, now))
+            self._discard_stale()
+        return due
+
+    def seconds_until_next(self, now, maximum=60):
+        now = as_utc(now, self.default_zone)
+        self._discard_stale()
+        if not self._heap:
+            return maximum
+        return min(max((self._heap[0][0] - now).total_seconds(), 0), maximum)
+
+    def next_due(self, user_id, reminder_id):
+        entry = self._entries.get((str(user_id), reminder_id))
+        return entry["fire_at"] if entry else None
+
+    def next_due_for_pill(self, user_id, pill_name):
+        times = []
+        for key in self._user_keys.get(str(user_id), ()):
+            entry = self._entries[key]
+            if entry["pill_name"] == pill_name and entry["fire_at"]:
+                times.append(entry["fire_at"])
+        return min(times) if times else None
@@ -0,0 +1,167 @@
+"""Общая очередь исходящих сообщений с ограничением частоты по чатам."""
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bot API: не больше ~1 сообщения в секунду в чат и ~30 в секунду всего
+PER_CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1 / 25
+# Сколько раз запрос возвращается в очередь после ответа 429
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class SendQueue:
+    """Очередь запросов к Bot API, разнесенных по чатам.
+
+    У каждого чата своя очередь, поэтому медленный чат (группа с лимитом)
+    не задерживает отправку в остальные. Обработчик выбирает чаты по
+    очереди готовности, соблюдая интервал внутри чата и общий интервал для
+    всего бота, и отправляет запросы отдельными задачами, не дожидаясь
+    ответа. В чате одновременно выполняется не больше одного запроса.
+
+    Ответ 429 не ждется в обработчике: запрос возвращается в начало очереди
+    своего чата, а чат - в очередь готовности через retry_after секунд.
+    После MAX_RATE_LIMIT_RETRIES повторов future получает ответ 429.
+    """
+
+    def __init__(self, hass, request, per_chat_interval=PER_CHAT_INTERVAL, global_interval=GLOBAL_INTERVAL):
+        self.hass = hass
+        self._request = request
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = global_interval
+        self._chats = {}
+        self._busy = {}  # {chat_id: задача отправки}
+        self._ready = []
+        self._sequence = itertools.count()
+        self._next_chat_at = {}
+        self._next_global_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+        self.rate_limited = 0
+
+    def __len__(self):
+        return sum(len(items) for items in self._chats.values()) + len(self._busy)
+
+    def start(self):
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._run())
+
+    async def drain(self, timeout):
+        """Ждет отправки всего, что уже в очереди, не дольше timeout секунд"""
+        if self._task is None:
+            return self._idle.is_set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), max(timeout, 0))
+            return True
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"Send queue not drained in time, {len(self)} requests dropped")
+            return False
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._busy.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._busy.clear()
+        # Неотправленные запросы отменяются, чтобы ожидающие не зависли
+        for items in self._chats.values():
+            for item in items:
+                if not item[2].done():
+                    item[2].cancel()
+        self._chats.clear()
+        self._ready.clear()
+        self._idle.set()
+
+    def submit(self, method, data):
+        """Ставит запрос в очередь чата data['chat_id'] и возвращает future с ответом API"""
+        future = asyncio.get_running_loop().create_future()
+        chat_id = str(data.get("chat_id"))
+        items = self._chats.get(chat_id)
+        if items is None:
+            items = self._chats[chat_id] = deque()
+        items.append([method, data, future, 0])
+        self._idle.clear()
+        if len(items) == 1 and chat_id not in self._busy:
+            self._schedule(chat_id)
+        return future
+
+    def _schedule(self, chat_id):
+        ready_at = self._next_chat_at.get(chat_id, 0.0)
+        heapq.heappush(self._ready, (ready_at, next(self._sequence), chat_id))
+        self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            ready_at, _, chat_id = self._ready[0]
+            delay = max(ready_at, self._next_global_at) - loop.time()
+            if delay > 0:
+                # Новый чат может оказаться готов раньше - просыпаемся и по событию
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._ready)
+            item = self._chats[chat_id].popleft()
+            now = loop.time()
+            self._next_global_at = now + self.global_interval
+            self._next_chat_at[chat_id] = now + self.per_chat_interval
+            self._busy[chat_id] = self.hass.async_create_task(self._send(chat_id, item))
+
+    async def _send(self, chat_id, item):
+        method, data, future, attempt = item
+        try:
+            result = await self._request(method, data)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as err:
+            if not future.done():
+                future.set_exception(err)
+        else:
+            retry_after = self._retry_after(result)
+            if retry_after is not None and attempt < MAX_RATE_LIMIT_RETRIES and not future.done():
+                # Лимит чата: запрос снова первый в очереди, чат ждет retry_after
+                self.rate_limited += 1
+                _LOGGER.debug(f"Telegram rate limit on {method} to chat {chat_id}, retrying in {retry_after}s")
+                item[3] = attempt + 1
+                self._chats[chat_id].appendleft(item)
+                self._next_chat_at[chat_id] = max(
+                    self._next_chat_at.get(chat_id, 0.0), asyncio.get_running_loop().time() + retry_after
+                )
+            elif not future.done():
+                future.set_result(result)
+        finally:
+            self._done(chat_id)
+
+    def _done(self, chat_id):
+        self._busy.pop(chat_id, None)
+        if self._chats.get(chat_id):
+            self._schedule(chat_id)
+        else:
+            self._chats.pop(chat_id, None)
+            if not self._chats:
+                self._idle.set()
+
+    @staticmethod
+    def _retry_after(result):
+        """Секунды ожидания из ответа 429 или None"""
+        if not isinstance(result, dict) or result.get("error_code") != 429:
+            return None
+        return (result.get("parameters") or {}).get("retry_after", 1)
@@ -1,16 +1,47 @@
 import logging
-from datetime import datetime, timedelta
+import time as monotonic_time
+from datetime import datetime, time, timedelta
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.storage import Store
-from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers import device_registry as dr
 from .const import DOMAIN
+from .history_stats import HistoryColumns
+from .registry_index import RegistryIndex, pill_slug
+from .schedule import course_day
 
 _LOGGER = logging.getLogger(__name__)
 
+PILL_SENSOR_TYPES = [
+    'taken_today',
+    'taken_week',
+    'skipped_today',
+    'skipped_week',
+    'compliance_week',
+    'last_taken',
+    'next_due',
+    'course_progress',
+    'current_streak',
+    'longest_streak',
+    'adherence_30d',
+    'adherence_90d',
+    'avg_delay',
+    'latency_p50',
+    'latency_p95',
+]
+
+DIAGNOSTIC_SENSOR_TYPES = [
+    'handler_latency',
+    'telegram_api_latency',
+    'storage_operations',
+    'scheduler_lag',
+    'coordinator_refresh',
+    'active_reminders_queue',
+]
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -23,39 +54,101 @@ async def async_setup_entry(
     if config_entry.entry_id in hass.data[DOMAIN]:
         hass.data[DOMAIN][config_entry.entry_id]['coordinator'] = coordinator
     
-    coordinator.async_add_entities_callback = async_add_entities
+    coordinator.entities = PillsEntityManager(coordinator, config_entry, async_add_entities)
     
-    await coordinator.async_config_entry_first_refresh()
+    # Индекс устройств записи поддерживается событиями реестров
+    coordinator.registry_index.async_setup()
+    config_entry.async_on_unload(coordinator.registry_index.async_stop)
     
     sensors = []
     
     # Создаем общий сенсор статистики
     sensors.append(PillsStatisticsSensor(coordinator, config_entry))
-    
-    # Создаем сенсоры для каждого пользователя и его лекарств
-    for user_id, user_data in coordinator.data.get('users', {}).items():
-        # Общие сенсоры пользователя
-        sensors.extend([
-            UserStatisticsSensor(coordinator, config_entry, user_id),
-            UserComplianceSensor(coordinator, config_entry, user_id),
-        ])
-        
-        # Сенсоры для каждого лекарства пользователя
-        for pill_name in user_data.get('pills', {}):
-            sensors.extend([
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'taken_today'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'taken_week'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'skipped_today'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'skipped_week'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'compliance_week'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'last_taken'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'next_due'),
-                UserPillSensor(coordinator, config_entry, user_id, pill_name, 'course_progress'),
-            ])
+    sensors.extend(
+        PillsDiagnosticSensor(coordinator, config_entry, sensor_type)
+        for sensor_type in DIAGNOSTIC_SENSOR_TYPES
+    )
     
     async_add_entities(sensors)
+    
+    # Первое обновление идет в фоне, чтобы загрузка HA не ждала чтения истории:
+    # сенсоры пользователей и лекарств создаются им как для новых пользователей
+    hass.async_create_background_task(
+        coordinator.async_refresh(), f"{DOMAIN}_first_refresh_{config_entry.entry_id}"
+    )
     _LOGGER.info(f"Created {len(sensors)} sensors for pills reminder")
 
+class PillsEntityManager:
+    """Живые сенсоры пользователей и лекарств одной записи.
+
+    Сенсоры хранятся по пользователю и лекарству (None - сенсоры самого
+    пользователя). Новые копятся и добавляются в HA одним вызовом за
+    обновление координатора; при удалении лекарства или пользователя
+    объекты снимаются через async_remove, и их слушатели координатора
+    отписываются.
+    """
+
+    def __init__(self, coordinator, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+        self.coordinator = coordinator
+        self.config_entry = config_entry
+        self._async_add_entities = async_add_entities
+        self._entities = {}  # {user_id: {pill_name или None: [sensors]}}
+        self._pending = []
+
+    def __len__(self):
+        return sum(len(sensors) for pills in self._entities.values() for sensors in pills.values())
+
+    def _queue(self, user_id, pill_name, sensors):
+        user_entities = self._entities.setdefault(user_id, {})
+        if pill_name in user_entities:
+            return
+        user_entities[pill_name] = sensors
+        self._pending.extend(sensors)
+
+    def add_user(self, user_id):
+        self._queue(user_id, None, [
+            UserStatisticsSensor(self.coordinator, self.config_entry, user_id),
+            UserComplianceSensor(self.coordinator, self.config_entry, user_id),
+        ])
+
+    def add_pill(self, user_id, pill_name):
+        self._queue(user_id, pill_name, [
+            UserPillSensor(self.coordinator, self.config_entry, user_id, pill_name, sensor_type)
+            for sensor_type in PILL_SENSOR_TYPES
+        ])
+
+    def flush(self):
+        """Добавляет накопленные сенсоры в HA одним пакетом"""
+        if not self._pending:
+            return 0
+        sensors, self._pending = self._pending, []
+        self._async_add_entities(sensors)
+        return len(sensors)
+
+    async def async_remove_pill(self, user_id, pill_name):
+        user_entities = self._entities.get(user_id, {})
+        await self._async_remove(user_entities.pop(pill_name, []))
+        if not user_entities:
+            self._entities.pop(user_id, None)
+
+    async def async_remove_user(self, user_id):
+        for sensors in self._entities.pop(user_id, {}).values():
+            await self._async_remove(sensors)
+
+    async def _async_remove(self, sensors):
+        if not sensors:
+            return
+        removed = {id(sensor) for sensor in sensors}
+        self._pending = [sensor for sensor in self._pending if id(sensor) not in removed]
+        for sensor in sensors:
+            # Еще не добавленный в HA сенсор достаточно забыть
+            if sensor.hass is None:
+                continue
+            try:
+                await sensor.async_remove(force_remove=True)
+            except Exception as err:
+                _LOGGER.error(f"Error removing sensor {sensor.entity_id}: {err}")
+
 class PillsDataCoordinator(DataUpdateCoordinator):
     """Data coordinator for pills reminder."""
     
@@ -67,32 +160,63 @@ class PillsDataCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(minutes=1),
         )
         self.config_entry = config_entry
-        self.storage = Store(hass, 1, f"pills_reminder_global")
-        self.users_storage = Store(hass, 1, f"pills_reminder_users")
-        self.async_add_entities_callback = None
+        # До первого обновления сенсоры показывают пустые данные
+        self.data = {}
+        self.entities = None
         self._known_user_pills = {}  # {user_id: set(pill_names)}
         self._known_users = set()  # Отслеживаем известных пользователей
+        self._history_columns = HistoryColumns()
+        self._history_revision = None
+        self._users_revision = None
+        self.registry_index = RegistryIndex(hass, config_entry.entry_id)
 
     async def _async_update_data(self):
-        """Fetch data from storage."""
+        """Fetch data from the bot's in-memory state."""
+        started = monotonic_time.perf_counter()
         try:
-            history_data = await self.storage.async_load() or {'history': []}
-            users_data = await self.users_storage.async_load() or {}
+            return await self._async_fetch_data()
+        finally:
+            bot = self._get_bot()
+            if bot:
+                bot.metrics.coordinator_refresh.add(monotonic_time.perf_counter() - started)
+
+    async def _async_fetch_data(self):
+        try:
+            # Данные читаются из памяти бота (диск не трогаем), ревизии растут с каждой записью
+            snapshot = await self._get_bot().async_snapshot()
+            users_data = snapshot['users']
+            revisions = snapshot['revisions']
+            
+            # Агрегаты по всей истории считаются одним векторным проходом
+            now = datetime.now()
+            if revisions['history'] != self._history_revision:
+                self._history_columns.sync(snapshot['history'])
+                self._history_revision = revisions['history']
+            aggregates = {
+                'today': self._history_columns.counts(since=datetime.combine(now.date(), time.min)),
+                'week': self._history_columns.counts(since=now - timedelta(days=7)),
+                'last_taken': self._history_columns.last_taken(),
+            }
             
             # Обрабатываем данные по пользователям
             users_pills_data = {}
             all_stats = {'total_users': 0, 'total_pills': 0, 'total_taken_today': 0, 'total_skipped_today': 0}
             
-            # Проверяем на новых пользователей
-            current_users = set(users_data.keys())
-            new_users = current_users - self._known_users
-            deleted_users = self._known_users - current_users
-            
-            # Удаляем устройства для удаленных пользователей
-            if deleted_users:
-                await self._cleanup_deleted_users(deleted_users)
-            
-            self._known_users = current_users.copy()
+            # Состав пользователей и лекарств сверяется только после записи напоминаний
+            users_changed = revisions['users'] != self._users_revision
+            self._users_revision = revisions['users']
+            if users_changed:
+                # Пользователь без напоминаний (последний курс закончен или
+                # в архиве) теряет сенсоры и устройства, как удаленный; после
+                # перезапуска такие устройства находятся по индексу реестра
+                current_users = {user_id for user_id, user_data in users_data.items() if user_data.get('reminders')}
+                deleted_users = (self._known_users | self.registry_index.users()) - current_users
+                
+                # Удаляем сенсоры и устройства удаленных пользователей
+                if deleted_users:
+                    await self._cleanup_deleted_users(deleted_users)
+                
+                self._known_users = current_users.copy()
             
             for user_id, user_data in users_data.items():
                 if not user_data.get('reminders'):
@@ -107,36 +231,15 @@ class PillsDataCoordinator(DataUpdateCoordinator):
                     if pill_name and reminder.get('active', True):
                         user_pills.add(pill_name)
                 
-                # Инициализируем известные лекарства для нового пользователя
-                if user_id not in self._known_user_pills:
-                    self._known_user_pills[user_id] = set()
-                
-                # Проверяем на удаленные лекарства
-                deleted_pills = self._known_user_pills[user_id] - user_pills
-                if deleted_pills:
-                    await self._cleanup_deleted_pills(user_id, deleted_pills)
-                
-                # Проверяем на новые лекарства для этого пользователя
-                new_pills = user_pills - self._known_user_pills[user_id]
-                
-                # Создаем сенсоры для нового пользователя или новых лекарств
-                if user_id in new_users and self.async_add_entities_callback:
-                    # Новый пользователь - создаем все сенсоры
-                    await self._create_sensors_for_new_user(user_id, user_pills)
-                    self._known_user_pills[user_id].update(user_pills)
-                elif new_pills and self.async_add_entities_callback:
-                    # Новые лекарства для существующего пользователя
-                    await self._create_sensors_for_new_user_pills(user_id, new_pills)
-                    self._known_user_pills[user_id].update(new_pills)
-                
-                self._known_user_pills[user_id] = user_pills.copy()
+                if users_changed:
+                    await self._reconcile_user_pills(user_id, user_pills, user_data)
                 
                 # Обрабатываем данные пользователя
                 user_pills_data = {}
                 user_stats = {'taken_today': 0, 'skipped_today': 0, 'taken_week': 0, 'skipped_week': 0}
                 
                 for pill_name in user_pills:
-                    pill_data = await self._process_user_pill_data(user_id, pill_name, history_data, user_data)
+                    pill_data = await self._process_user_pill_data(user_id, pill_name, aggregates, user_data)
                     user_pills_data[pill_name] = pill_data
                     
                     # Добавляем к общей статистике пользователя
@@ -149,6 +252,9 @@ class PillsDataCoordinator(DataUpdateCoordinator):
                 total_week = user_stats['taken_week'] + user_stats['skipped_week']
                 user_stats['compliance_week'] = round((user_stats['taken_week'] / total_week * 100) if total_week > 0 else 100, 1)
                 user_stats['active_reminders'] = len([r for r in user_data.get('reminders', {}).values() if r.get('active', True)])
+                bot = self._get_bot()
+                if bot:
+                    user_stats.update(bot.adherence.user_snapshot(user_id))
                 
                 users_pills_data[user_id] = {
                     'username': username,
@@ -164,37 +270,55 @@ class PillsDataCoordinator(DataUpdateCoordinator):
             
             all_stats['total_users'] = len(users_pills_data)
             
+            if self.entities is not None:
+                added = self.entities.flush()
+                if added:
+                    _LOGGER.info(f"Created {added} sensors for new users and pills")
+            
             return {
                 'users': users_pills_data,
                 'total': all_stats,
+                'revisions': revisions,
                 'last_updated': datetime.now().isoformat()
             }
             
         except Exception as err:
             raise UpdateFailed(f"Error fetching pills data: {err}")
 
+    async def _reconcile_user_pills(self, user_id, user_pills, user_data):
+        """Заводит сенсоры новых лекарств пользователя и удаляет сенсоры и устройства удаленных"""
+        known_pills = self._known_user_pills.get(user_id, set())
+        
+        # Проверяем на удаленные лекарства
+        deleted_pills = known_pills - user_pills
+        if deleted_pills:
+            await self._cleanup_deleted_pills(user_id, deleted_pills)
+        
+        # Сенсоры нового пользователя и новых лекарств добавятся пакетом в конце обновления
+        if self.entities is not None:
+            self.entities.add_user(user_id)
+            for pill_name in user_pills - known_pills:
+                self.entities.add_pill(user_id, pill_name)
+        
+        self._known_user_pills[user_id] = user_pills.copy()
+
     async def _cleanup_deleted_users(self, deleted_user_ids):
         """Удаляет устройства для удаленных пользователей"""
         try:
             device_registry = dr.async_get(self.hass)
-            entity_registry = er.async_get(self.hass)
             
             for user_id in deleted_user_ids:
-                # Удаляем устройство пользователя
-                user_device_id = (DOMAIN, f"{self.config_entry.entry_id}_user_{user_id}")
-                device = device_registry.async_get_device(identifiers={user_device_id})
-                if device:
-                    device_registry.async_remove_device(device.id)
-                    _LOGGER.info(f"Removed user device for user {user_id}")
+                # Сначала снимаем сенсоры, чтобы они перестали получать обновления
+                if self.entities is not None:
+                    await self.entities.async_remove_user(user_id)
                 
-                # Удаляем устройства лекарств пользователя (если есть известные)
-                if user_id in self._known_user_pills:
-                    for pill_name in self._known_user_pills[user_id]:
-                        await self._cleanup_pill_device(user_id, pill_name)
+                # Устройство пользователя и все устройства его лекарств берем из индекса
+                for device_id in self.registry_index.user_device_ids(user_id):
+                    device_registry.async_remove_device(device_id)
+                _LOGGER.info(f"Removed devices for user {user_id}")
                 
                 # Очищаем из известных пользователей
-                if user_id in self._known_user_pills:
-                    del self._known_user_pills[user_id]
+                self._known_user_pills.pop(user_id, None)
                     
         except Exception as err:
             _LOGGER.error(f"Error cleaning up deleted users: {err}")
@@ -210,125 +334,44 @@ class PillsDataCoordinator(DataUpdateCoordinator):
     async def _cleanup_pill_device(self, user_id, pill_name):
         """Удаляет устройство конкретного лекарства"""
         try:
-            device_registry = dr.async_get(self.hass)
-            safe_pill_name = pill_name.replace(' ', '_').replace('-', '_').lower()
-            pill_device_id = (DOMAIN, f"{self.config_entry.entry_id}_user_{user_id}_{safe_pill_name}")
-            device = device_registry.async_get_device(identifiers={pill_device_id})
-            if device:
-                device_registry.async_remove_device(device.id)
+            if self.entities is not None:
+                await self.entities.async_remove_pill(user_id, pill_name)
+            device_id = self.registry_index.device_id(user_id, pill_name)
+            if device_id:
+                dr.async_get(self.hass).async_remove_device(device_id)
                 _LOGGER.info(f"Removed pill device for user {user_id}, pill {pill_name}")
         except Exception as err:
             _LOGGER.error(f"Error cleaning up pill device: {err}")
 
-    async def _create_sensors_for_new_user(self, user_id, user_pills):
-        """Create all sensors for new user."""
-        if not self.async_add_entities_callback:
-            return
-            
-        # Сначала загружаем данные пользователя для получения правильного username
-        users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(user_id, {})
-        
-        new_sensors = []
-        
-        # Общие сенсоры пользователя
-        new_sensors.extend([
-            UserStatisticsSensor(self, self.config_entry, user_id),
-            UserComplianceSensor(self, self.config_entry, user_id),
-        ])
-        
-        # Сенсоры для каждого лекарства
-        for pill_name in user_pills:
-            new_sensors.extend([
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'taken_today'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'taken_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'skipped_today'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'skipped_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'compliance_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'last_taken'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'next_due'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'course_progress'),
-            ])
-        
-        if new_sensors:
-            self.async_add_entities_callback(new_sensors)
-            username = user_data.get('username', f'User_{user_id}')
-            _LOGGER.info(f"Created {len(new_sensors)} sensors for new user {username}")
-
-    async def _create_sensors_for_new_user_pills(self, user_id, new_pills):
-        """Create sensors for new user pills."""
-        if not self.async_add_entities_callback:
-            return
-            
-        new_sensors = []
-        
-        for pill_name in new_pills:
-            new_sensors.extend([
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'taken_today'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'taken_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'skipped_today'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'skipped_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'compliance_week'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'last_taken'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'next_due'),
-                UserPillSensor(self, self.config_entry, user_id, pill_name, 'course_progress'),
-            ])
-        
-        if new_sensors:
-            self.async_add_entities_callback(new_sensors)
-            users_data = await self.users_storage.async_load() or {}
-            username = users_data.get(user_id, {}).get('username', f'User_{user_id}')
-            _LOGGER.info(f"Created sensors for new pills for {username}: {', '.join(new_pills)}")
-
-    async def _process_user_pill_data(self, user_id, pill_name, history_data, user_data):
+    async def _process_user_pill_data(self, user_id, pill_name, aggregates, user_data):
         """Process data for specific user's pill."""
-        now = datetime.now()
-        today = now.date()
-        week_ago = now - timedelta(days=7)
-        
-        # Фильтруем историю для конкретного пользователя и лекарства
-        user_pill_history = [
-            entry for entry in history_data.get('history', [])
-            if (entry.get('user_id') == str(user_id) and
-                entry.get('pill_name') == pill_name)
-        ]
-        
-        # Сегодняшняя статистика
-        today_entries = [
-            entry for entry in user_pill_history
-            if datetime.fromisoformat(entry['date']).date() == today
-        ]
-        taken_today = sum(1 for entry in today_entries if entry['status'] == 'taken')
-        skipped_today = sum(1 for entry in today_entries if entry['status'] == 'skipped')
-        
-        # Недельная статистика
-        week_entries = [
-            entry for entry in user_pill_history
-            if datetime.fromisoformat(entry['date']) >= week_ago
-        ]
-        taken_week = sum(1 for entry in week_entries if entry['status'] == 'taken')
-        skipped_week = sum(1 for entry in week_entries if entry['status'] == 'skipped')
+        key = (str(user_id), pill_name)
+        taken_today, skipped_today = aggregates['today'].get(key, (0, 0))
+        taken_week, skipped_week = aggregates['week'].get(key, (0, 0))
         
         # Процент соблюдения за неделю
         total_week = taken_week + skipped_week
         compliance_week = round((taken_week / total_week * 100) if total_week > 0 else 100, 1)
         
         # Последний прием
-        taken_entries = [
-            entry for entry in user_pill_history
-            if entry['status'] == 'taken'
-        ]
-        last_taken = None
-        if taken_entries:
-            last_taken = max(taken_entries, key=lambda x: x['date'])['date']
+        last_taken = aggregates['last_taken'].get(key)
+        if last_taken:
+            last_taken = last_taken.isoformat()
         
-        # Следующий прием
-        next_due = self._calculate_next_due(user_data, pill_name)
+        # Следующий прием берется из таблицы срабатываний планировщика
+        bot = self._get_bot()
+        next_due = bot.next_due.next_due_for_pill(user_id, pill_name) if bot else None
+        if next_due:
+            next_due = next_due.isoformat()
         
         # Прогресс курса
-        course_progress = self._calculate_course_progress(user_data, pill_name)
+        course_progress = self._calculate_course_progress(user_id, user_data, pill_name)
+        
+        # Серии и окна соблюдения поддерживаются ботом инкрементально
+        adherence = bot.adherence.snapshot(user_id, pill_name) if bot else {}
         
         return {
+            **adherence,
             'taken_today': taken_today,
             'taken_week': taken_week,
             'skipped_today': skipped_today,
@@ -341,49 +384,19 @@ class PillsDataCoordinator(DataUpdateCoordinator):
             'total_week': total_week,
         }
 
-    def _calculate_next_due(self, user_data, pill_name):
-        """Calculate next due time for pill."""
-        now = datetime.now()
-        
-        # Ищем активные напоминания для этого лекарства
-        for reminder_id, reminder in user_data.get('reminders', {}).items():
-            if (reminder.get('pill_name') == pill_name and
-                reminder.get('active', True)):
-                
-                times = reminder.get('times', [])
-                if times:
-                    # Найдем ближайшее время приема
-                    current_time = now.time()
-                    today_times = []
-                    tomorrow_times = []
-                    
-                    for time_slot in times:
-                        try:
-                            time_obj = datetime.strptime(time_slot.get('time', ''), "%H:%M").time()
-                            next_due = now.replace(
-                                hour=time_obj.hour,
-                                minute=time_obj.minute,
-                                second=0,
-                                microsecond=0
-                            )
-                            
-                            if next_due.time() > current_time:
-                                today_times.append(next_due)
-                            else:
-                                tomorrow_times.append(next_due + timedelta(days=1))
-                        except ValueError:
-                            continue
-                    
-                    # Возвращаем ближайшее время
-                    if today_times:
-                        return min(today_times).isoformat()
-                    elif tomorrow_times:
-                        return min(tomorrow_times).isoformat()
-        
+    def _get_bot(self):
+        entry_data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if isinstance(entry_data, dict):
+            return entry_data.get('bot')
         return None
 
-    def _calculate_course_progress(self, user_data, pill_name):
+    def _calculate_course_progress(self, user_id, user_data, pill_name):
         """Calculate course progress for pill."""
+        # День курса считается по дате в часовом поясе пользователя
+        bot = self._get_bot()
+        zone = bot.next_due.zone_of(user_id) if bot else None
+        default_zone = bot.next_due.default_zone if bot else None
+        today = datetime.now(zone).date()
         for reminder_id, reminder in user_data.get('reminders', {}).items():
             if (reminder.get('pill_name') == pill_name and
                 reminder.get('active', True)):
@@ -391,8 +404,7 @@ class PillsDataCoordinator(DataUpdateCoordinator):
                 duration_days = reminder.get('duration_days')
                 if duration_days:
                     try:
-                        start_date = datetime.fromisoformat(reminder.get('created', datetime.now().isoformat()))
-                        days_passed = (datetime.now() - start_date).days + 1
+                        days_passed = course_day(reminder, today, zone, default_zone)
                         days_left = max(0, duration_days - days_passed + 1)
                         
                         return {
@@ -465,6 +477,92 @@ class PillsStatisticsSensor(SensorEntity):
             self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
+class PillsDiagnosticSensor(SensorEntity):
+    """Diagnostic sensor with bot hot-path metrics."""
+    
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    
+    def __init__(self, coordinator: PillsDataCoordinator, config_entry: ConfigEntry, sensor_type: str):
+        self.coordinator = coordinator
+        self.config_entry = config_entry
+        self.sensor_type = sensor_type
+        self._attr_unique_id = f"{config_entry.entry_id}_diagnostics_{sensor_type}"
+        self._attr_name = f"Pills Reminder {sensor_type.replace('_', ' ').title()}"
+        
+        type_configs = {
+            'handler_latency': ("mdi:timer-cog-outline", 'ms'),
+            'telegram_api_latency': ("mdi:send-clock-outline", 'ms'),
+            'storage_operations': ("mdi:database-clock-outline", 'operations'),
+            'scheduler_lag': ("mdi:calendar-clock", 's'),
+            'coordinator_refresh': ("mdi:refresh", 'ms'),
+            'active_reminders_queue': ("mdi:tray-full", 'reminders'),
+        }
+        self._attr_icon, self._attr_native_unit_of_measurement = type_configs.get(sensor_type, ("mdi:bug", None))
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, self.config_entry.entry_id)},
+            "name": "Pills Reminder System",
+            "manufacturer": "Pills Reminder Bot",
+            "model": "Statistics Hub",
+            "sw_version": "1.0",
+        }
+
+    @property
+    def state(self):
+        bot = self.coordinator._get_bot()
+        if not bot:
+            return None
+        metrics = bot.metrics
+        
+        if self.sensor_type == 'handler_latency':
+            return metrics.handler_summary()
+        elif self.sensor_type == 'telegram_api_latency':
+            return metrics.api_summary()
+        elif self.sensor_type == 'storage_operations':
+            return metrics.storage_summary()
+        elif self.sensor_type == 'scheduler_lag':
+            return round(metrics.scheduler_lag.last, 1)
+        elif self.sensor_type == 'coordinator_refresh':
+            return round(metrics.coordinator_refresh.last * 1000, 1)
+        elif self.sensor_type == 'active_reminders_queue':
+            return len(bot.active_reminders)
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        bot = self.coordinator._get_bot()
+        if not bot:
+            return {}
+        metrics = bot.metrics
+        
+        if self.sensor_type == 'handler_latency':
+            return {'routes': {route: stats.as_dict() for route, stats in metrics.handlers.items()},
+                    'errors': dict(metrics.handler_errors)}
+        elif self.sensor_type == 'telegram_api_latency':
+            return {'methods': {method: stats.as_dict() for method, stats in metrics.telegram.items()}}
+        elif self.sensor_type == 'storage_operations':
+            return {'stores': {key: stats.as_dict() for key, stats in metrics.storage.items()},
+                    'startup_ms': dict(metrics.startup)}
+        elif self.sensor_type == 'scheduler_lag':
+            return metrics.scheduler_lag.as_dict()
+        elif self.sensor_type == 'coordinator_refresh':
+            return metrics.coordinator_refresh.as_dict()
+        elif self.sensor_type == 'active_reminders_queue':
+            return {'nags_sent': sum(info.get('nag_count', 0) for info in bot.active_reminders.values()),
+                    'send_queue': len(bot.outbox)}
+        return {}
+
+    @callback
+    def _handle_coordinator_update(self):
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
 class UserStatisticsSensor(SensorEntity):
     """User statistics sensor."""
     
@@ -516,6 +614,8 @@ class UserStatisticsSensor(SensorEntity):
             'skipped_week': stats.get('skipped_week', 0),
             'compliance_week': stats.get('compliance_week', 100),
             'active_reminders': stats.get('active_reminders', 0),
+            'latency_p50': stats.get('latency_p50'),
+            'latency_p95': stats.get('latency_p95'),
             'total_pills': len(user_data.get('pills', {})),
             'last_updated': self.coordinator.data.get('last_updated'),
             'friendly_name': f'{username} - принято сегодня',
@@ -608,8 +708,7 @@ class UserPillSensor(SensorEntity):
         self.sensor_type = sensor_type
         
         # Создаем безопасное имя для ID
-        safe_pill_name = pill_name.replace(' ', '_').replace('-', '_').lower()
-        self._attr_unique_id = f"{config_entry.entry_id}_user_{user_id}_{safe_pill_name}_{sensor_type}"
+        self._attr_unique_id = f"{config_entry.entry_id}_user_{user_id}_{pill_slug(pill_name)}_{sensor_type}"
         
         # Настройки для разных типов сенсоров
         self._setup_sensor_config()
@@ -664,6 +763,48 @@ class UserPillSensor(SensorEntity):
                 'unit': '%',
                 'device_class': None,
                 'suffix': 'прогресс курса'
+            },
+            'current_streak': {
+                'icon': "mdi:fire",
+                'unit': 'days',
+                'device_class': None,
+                'suffix': 'текущая серия'
+            },
+            'longest_streak': {
+                'icon': "mdi:trophy-outline",
+                'unit': 'days',
+                'device_class': None,
+                'suffix': 'лучшая серия'
+            },
+            'adherence_30d': {
+                'icon': "mdi:calendar-check",
+                'unit': '%',
+                'device_class': None,
+                'suffix': 'соблюдение за 30 дней'
+            },
+            'adherence_90d': {
+                'icon': "mdi:calendar-check-outline",
+                'unit': '%',
+                'device_class': None,
+                'suffix': 'соблюдение за 90 дней'
+            },
+            'avg_delay': {
+                'icon': "mdi:timer-sand",
+                'unit': 'min',
+                'device_class': None,
+                'suffix': 'средняя задержка приема'
+            },
+            'latency_p50': {
+                'icon': "mdi:timer-outline",
+                'unit': 'min',
+                'device_class': None,
+                'suffix': 'медиана задержки подтверждения'
+            },
+            'latency_p95': {
+                'icon': "mdi:timer-alert-outline",
+                'unit': 'min',
+                'device_class': None,
+                'suffix': '95-й перцентиль задержки подтверждения'
             }
         }
         
@@ -683,9 +824,8 @@ class UserPillSensor(SensorEntity):
     def device_info(self):
         user_data = self.coordinator.data.get('users', {}).get(self.user_id, {})
         username = user_data.get('username', f'User_{self.user_id}')
-        safe_pill_name = self.pill_name.replace(' ', '_').replace('-', '_').lower()
         return {
-            "identifiers": {(DOMAIN, f"{self.config_entry.entry_id}_user_{self.user_id}_{safe_pill_name}")},
+            "identifiers": {(DOMAIN, f"{self.config_entry.entry_id}_user_{self.user_id}_{pill_slug(self.pill_name)}")},
             "name": f"{username}: {self.pill_name}",
             "manufacturer": "Pills Reminder Bot",
             "model": "Pill Sensor",
@@ -741,6 +881,11 @@ class UserPillSensor(SensorEntity):
                 'days_left': progress_data.get('days_left'),
                 'progress_percent': progress_data.get('progress_percent'),
             })
+        elif self.sensor_type in ['latency_p50', 'latency_p95']:
+            base_attrs.update({
+                'histogram': pill_data.get('latency_histogram', {}),
+                'nag_counts': pill_data.get('nag_counts', []),
+            })
         
         return base_attrs
 
@@ -0,0 +1,84 @@
+"""Сервисы интеграции Pills Reminder."""
+import logging
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall
+import homeassistant.helpers.config_validation as cv
+from .const import DOMAIN
+from .profiler import async_profile
+from .runtime import RUNTIME
+from .transfer import DATASETS, DEFAULT_BATCH_SIZE, FORMATS, async_export, async_import
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_PROFILE = "profile"
+SERVICE_EXPORT = "export_data"
+SERVICE_IMPORT = "import_data"
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional("duration", default=30): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+    vol.Optional("name"): cv.slug,
+})
+
+EXPORT_SCHEMA = vol.Schema({
+    vol.Optional("entry_id"): cv.string,
+    vol.Required("dataset"): vol.In(DATASETS),
+    vol.Optional("format", default="jsonl"): vol.In(FORMATS),
+    vol.Optional("name"): cv.slug,
+})
+
+IMPORT_SCHEMA = vol.Schema({
+    vol.Optional("entry_id"): cv.string,
+    vol.Required("dataset"): vol.In(DATASETS),
+    vol.Required("filename"): cv.string,
+    vol.Optional("batch_size", default=DEFAULT_BATCH_SIZE): vol.All(vol.Coerce(int), vol.Range(min=1, max=100000)),
+})
+
+def _bot_for_call(hass: HomeAssistant, call: ServiceCall):
+    """Бот записи entry_id; без entry_id - единственный работающий бот"""
+    runtime = hass.data.get(DOMAIN, {}).get(RUNTIME)
+    if runtime is None:
+        raise ValueError("Pills reminder is not set up")
+    entry_id = call.data.get("entry_id")
+    if entry_id:
+        bot = runtime.bot_for_entry(entry_id)
+        if bot is None:
+            raise ValueError(f"Unknown config entry {entry_id}")
+        return bot
+    bots = {id(bot): bot for bot in runtime.bots()}
+    if len(bots) != 1:
+        raise ValueError("Several bots are running, specify entry_id")
+    return next(iter(bots.values()))
+
+async def async_register_services(hass: HomeAssistant) -> None:
+    """Регистрирует сервисы один раз для всех записей интеграции"""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def handle_profile(call: ServiceCall) -> None:
+        try:
+            await async_profile(hass, call.data["duration"], call.data.get("name"))
+        except RuntimeError as err:
+            _LOGGER.warning(f"Profiling request ignored: {err}")
+
+    async def handle_export(call: ServiceCall) -> None:
+        try:
+            bot = _bot_for_call(hass, call)
+            await async_export(hass, bot, call.data["dataset"], call.data["format"], call.data.get("name"))
+        except (ValueError, OSError) as err:
+            _LOGGER.error(f"Export failed: {err}")
+
+    async def handle_import(call: ServiceCall) -> None:
+        try:
+            bot = _bot_for_call(hass, call)
+            await async_import(hass, bot, call.data["dataset"], call.data["filename"], call.data["batch_size"])
+        except (ValueError, OSError) as err:
+            _LOGGER.error(f"Import failed: {err}")
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, handle_profile, schema=PROFILE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_EXPORT, handle_export, schema=EXPORT_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_IMPORT, handle_import, schema=IMPORT_SCHEMA)
+
+async def async_unregister_services(hass: HomeAssistant) -> None:
+    """Удаляет сервисы после выгрузки последней записи"""
+    for service in (SERVICE_PROFILE, SERVICE_EXPORT, SERVICE_IMPORT):
+        hass.services.async_remove(DOMAIN, service)
@@ -1,73 +1,341 @@
 import asyncio
+import functools
 import json
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.storage import Store
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers import device_registry as dr, entity_registry as er
 from .const import *
+from .adherence import AdherenceTracker
+from .history_stats import HistoryColumns
+from .lifecycle import SHUTDOWN_TIMEOUT, TaskTracker
+from .messages import Markup, MessageCatalog, escape, normalize_locale
+from .metrics import BotMetrics, PillsStore
+from .render_cache import RenderCache, paginate
+from .send_queue import SendQueue
+from .wizard import (
+    SPEC_PAYLOAD_PREFIX,
+    STEP_CONFIRM,
+    STEP_SAVE_EDIT,
+    SetupWizard,
+    StepError,
+    decode_spec_payload,
+    encode_spec_payload,
+    parse_reminder_spec,
+)
+from .schedule import (
+    EVENT_COURSE_END,
+    MAX_TIMES_PER_DAY,
+    WEEKDAYS_ALL,
+    NextDueIndex,
+    as_utc,
+    compile_schedule,
+    course_day,
+    created_at,
+    format_schedule,
+    get_zone,
+    parse_schedule_text,
+    parse_timezone,
+    preload_zones,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Повторы запроса к Bot API после ответа 429 Too Many Requests
+MAX_API_RETRIES = 3
+# Хранилища до разделения по токенам: переносятся в хранилища первого запущенного бота
+LEGACY_STORAGE_KEYS = {
+    "storage": "pills_reminder_global",
+    "users_storage": "pills_reminder_users",
+    "archive_storage": "pills_reminder_archive",
+    "journal_storage": "pills_reminder_journal",
+}
+
+
+def storage_prefix(token):
+    """Префикс хранилищ бота: числовой id бота из токена (без секретной части)"""
+    return f"{DOMAIN}_{token.split(':', 1)[0]}"
+
+# Активные приемы, сохраненные при остановке, восстанавливаются, если им меньше этого времени
+ACTIVE_REMINDER_TTL = timedelta(hours=12)
+# Срабатывания, опоздавшие больше чем на это время (например, после простоя HA), не отправляются
+REMINDER_GRACE = timedelta(minutes=10)
+# Пауза между повторными напоминаниями о неотмеченном приеме
+NAG_INTERVAL = timedelta(minutes=30)
+# Паузы между попытками setMyCommands, если Telegram недоступен при запуске
+COMMANDS_RETRY_DELAYS = (5, 15, 60, 300, 900)
+# Команды меню бота; описания - шаблоны command_<команда>
+BOT_COMMANDS = (
+    "start", "setup", "add", "manage", "status", "history", "archive",
+    "cleanup", "stop", "timezone", "chat", "help",
+)
+
 class PillsReminderBot:
     def __init__(self, hass: HomeAssistant, config: dict):
         self.hass = hass
-        self.config = config
         self.session = async_get_clientsession(hass)
-        self.base_url = f"https://api.telegram.org/bot{config[CONF_BOT_TOKEN]}"
-        self.storage = Store(hass, 1, f"pills_reminder_global")
-        self.users_storage = Store(hass, 1, f"pills_reminder_users")
-        self.archive_storage = Store(hass, 1, f"pills_reminder_archive")
+        self.apply_config(config)
+        self.entry_ids = set()
+        # Имя бота для ссылок t.me: запрашивается getMe при первой необходимости
+        self.username = None
+        self.metrics = BotMetrics()
+        prefix = storage_prefix(config[CONF_BOT_TOKEN])
+        self.storage = PillsStore(hass, f"{prefix}_global", self.metrics)
+        self.users_storage = PillsStore(hass, f"{prefix}_users", self.metrics)
+        self.archive_storage = PillsStore(hass, f"{prefix}_archive", self.metrics)
+        self.journal_storage = PillsStore(hass, f"{prefix}_journal", self.metrics)
+        self.state_storage = PillsStore(hass, f"{prefix}_state", self.metrics)
         self.reminder_task = None
         self.webhook_task = None
+        self.startup_task = None
+        self._sensor_refresh = None
+        self._restored = False
+        self.tasks = TaskTracker(hass)
         self.active_reminders = {}
+        self.history_columns = HistoryColumns()
+        self.renders = RenderCache()
+        self.messages = MessageCatalog()
+        self.adherence = AdherenceTracker()
+        self.next_due = NextDueIndex(hass.config.time_zone)
+        self.outbox = SendQueue(hass, functools.partial(self.api_request, retries=0))
+        self.wizard = SetupWizard(self.messages.render, hooks={"pill_name": self._wizard_course_number})
+        # language_code из последнего апдейта пользователя: язык ответов до сохранения профиля
+        self._languages = {}
+        self._schedule_changed = asyncio.Event()
+        # Сенсоры обновляются сразу после записи истории или напоминаний
+        self.storage.async_add_listener(self._on_data_changed)
+        self.users_storage.async_add_listener(self._on_data_changed)
         
+    def apply_config(self, config):
+        """Применяет настройки записи (токен у бота не меняется)"""
+        self.config = config
+        api_url = (config.get(CONF_API_URL) or DEFAULT_API_URL).rstrip("/")
+        self.base_url = f"{api_url}/bot{config[CONF_BOT_TOKEN]}"
+
+    async def migrate_legacy_storage(self):
+        """Переносит данные из общих хранилищ старых версий в хранилища этого бота"""
+        for attribute, legacy_key in LEGACY_STORAGE_KEYS.items():
+            store = getattr(self, attribute)
+            legacy_store = PillsStore(self.hass, legacy_key)
+            try:
+                legacy_data = await legacy_store.async_load()
+                if legacy_data is None:
+                    continue
+                if await store.async_load() is None:
+                    await store.async_save(legacy_data)
+                    _LOGGER.info(f"Migrated {legacy_key} to {store.key}")
+                await legacy_store.async_remove()
+            except Exception as err:
+                _LOGGER.error(f"Error migrating {legacy_key}: {err}")
+
     async def start(self):
+        """Запускает бота, не дожидаясь Telegram и чтения хранилищ.
+
+        Загрузка данных, восстановление активных приемов и запуск поллера
+        идут фоновой задачей startup, регистрация команд - отдельной задачей
+        с повторами, поэтому недоступный Telegram не ломает настройку записи.
+        """
+        if self.startup_task is not None:
+            return
+        self.outbox.start()
+        self.startup_task = self.tasks.spawn(self._async_startup(), "startup")
+        self.tasks.spawn(self.register_bot_commands(), "commands")
+
+    async def _async_startup(self):
+        started = time.perf_counter()
+        try:
+            # Все хранилища читаются один раз и параллельно, дальше бот и координатор берут их из памяти
+            await asyncio.gather(self.messages.async_load(self.hass), *(store.async_load() for store in (
+                self.storage, self.users_storage, self.archive_storage,
+                self.journal_storage, self.state_storage,
+            )))
+            self.metrics.record_startup('storage_load', time.perf_counter() - started)
+            await self.recover_archive_journal()
+            await self.discard_stored_setup_state()
+            await self.load_adherence()
+            await self.load_schedule()
+            await self.restore_active_reminders()
+            self._restored = True
+        except Exception as err:
+            _LOGGER.error(f"Error loading pills reminder data: {err}")
+        if self.tasks.stopping:
+            return
+        self.webhook_task = self.tasks.spawn(self.poll_updates(), "poller")
+        self.reminder_task = self.tasks.spawn(self.reminder_scheduler(), "scheduler")
+        self.metrics.record_startup('ready', time.perf_counter() - started)
+        _LOGGER.info(f"Pills reminder bot started in {time.perf_counter() - started:.2f}s")
+        # Сенсоры, созданные до загрузки расписания, получают ближайшие приемы
+        await self.update_sensors()
+
+    async def stop(self, timeout=SHUTDOWN_TIMEOUT):
+        """Останавливает бота, не теряя начатую работу.
+
+        Поллер перестает получать апдейты, планировщик - брать новые
+        срабатывания, повторные напоминания снимаются (активные приемы
+        сохраняются и восстанавливаются при следующем запуске). Затем не
+        дольше timeout ждем обработчики апдейтов и отправку очереди.
+        """
+        if self.tasks.stopping:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self.tasks.stopping = True
+        self._schedule_changed.set()
+        self.tasks.cancel("poller", "nag", "commands")
+
+        pending = await self.tasks.wait(deadline - loop.time())
+        if pending:
+            _LOGGER.warning(f"{pending} bot tasks did not finish in {timeout}s and will be cancelled")
+        await self.outbox.drain(deadline - loop.time())
+        await self.outbox.stop()
+        await self.tasks.cancel_all()
+        if self._restored:
+            await self.save_active_reminders()
+        _LOGGER.info("Pills reminder bot stopped")
+
+    async def save_active_reminders(self):
+        """Сохраняет неподтвержденные приемы, чтобы повторы продолжились после перезапуска"""
+        try:
+            await self.state_storage.async_save({'active_reminders': self.active_reminders})
+        except Exception as err:
+            _LOGGER.error(f"Error saving active reminders: {err}")
+
+    async def restore_active_reminders(self):
+        try:
+            state = await self.state_storage.async_load() or {}
+            saved = state.get('active_reminders') or {}
+            if not saved:
+                return
+            users_data = await self.users_storage.async_load() or {}
+            oldest = datetime.now(timezone.utc) - ACTIVE_REMINDER_TTL
+            for reminder_key, dose_info in saved.items():
+                user_data = users_data.get(str(dose_info.get('user_id')))
+                reminder = user_data.get('reminders', {}).get(dose_info.get('reminder_id')) if user_data else None
+                try:
+                    fresh = as_utc(
+                        datetime.fromisoformat(dose_info['scheduled_at']), self.next_due.default_zone
+                    ) >= oldest
+                except (KeyError, TypeError, ValueError):
+                    fresh = False
+                if not fresh or not reminder or not reminder.get('active', True):
+                    continue
+                if dose_info.get('time_index', 0) >= len(reminder.get('times', [])):
+                    continue
+                self.active_reminders[reminder_key] = dose_info
+                self.tasks.spawn(self.repeat_user_reminder(
+                    dose_info['user_id'], user_data, dose_info['reminder_id'], reminder, dose_info['time_index']
+                ), "nag")
+            _LOGGER.info(f"Restored {len(self.active_reminders)} unconfirmed reminders")
+            await self.state_storage.async_save({})
+        except Exception as err:
+            _LOGGER.error(f"Error restoring active reminders: {err}")
+
+    async def discard_stored_setup_state(self):
+        """Убирает из хранилища шаги настройки и недособранные напоминания старых версий.
+
+        Раньше мастер настройки хранил шаг и черновик в данных пользователя,
+        теперь они живут в сессиях SetupWizard и после перезапуска не нужны.
+        """
+        try:
+            users_data = await self.users_storage.async_load() or {}
+            changed = False
+            for user_data in users_data.values():
+                draft_id = user_data.pop("current_reminder_id", None)
+                for key in ("setup_step", "current_time_index", "editing_reminder_id"):
+                    changed |= user_data.pop(key, None) is not None
+                draft = user_data.get("reminders", {}).get(draft_id)
+                if draft is not None and "schedule" not in draft and "active" not in draft:
+                    del user_data["reminders"][draft_id]
+                changed |= draft_id is not None
+            if changed:
+                await self.users_storage.async_save(users_data)
+                _LOGGER.info("Removed stored setup wizard state")
+        except Exception as err:
+            _LOGGER.error(f"Error removing stored setup state: {err}")
+
+    async def load_adherence(self):
+        """Однократно строит статистику соблюдения из сохраненной истории"""
         try:
-            await self.setup_bot_commands()
-            self.webhook_task = self.hass.async_create_task(self.poll_updates())
-            self.reminder_task = self.hass.async_create_task(self.reminder_scheduler())
-            _LOGGER.info("Pills reminder bot started successfully")
+            history_data = await self.storage.async_load() or {'history': []}
+            self.adherence.rebuild(history_data.get('history', []))
         except Exception as err:
-            _LOGGER.error("Failed to start telegram bot: %s", err)
-            raise
+            _LOGGER.error(f"Error building adherence statistics: {err}")
+
+    async def load_schedule(self, now=None):
+        """Однократно строит таблицу ближайших срабатываний из сохраненных напоминаний"""
+        try:
+            users_data = await self.users_storage.async_load() or {}
+            zones = {user_data.get("timezone") for user_data in users_data.values()}
+            await self.hass.async_add_executor_job(preload_zones, zones)
+            self.next_due.rebuild(users_data, now)
+        except Exception as err:
+            _LOGGER.error(f"Error building reminder schedule: {err}")
+
+    def _reschedule(self, user_id, reminder_id, reminder):
+        """Пересчитывает срабатывание после изменения напоминания и будит планировщик"""
+        self.next_due.update(user_id, reminder_id, reminder)
+        self._schedule_changed.set()
+
+    def _unschedule(self, user_id, reminder_id=None):
+        self.next_due.remove(user_id, reminder_id)
+        self._schedule_changed.set()
 
-    async def stop(self):
-        if self.reminder_task:
-            self.reminder_task.cancel()
-        if self.webhook_task:
-            self.webhook_task.cancel()
+    def _user_today(self, user_id):
+        """Текущая дата в часовом поясе пользователя"""
+        return datetime.now(self.next_due.zone_of(user_id)).date()
 
     async def setup_bot_commands(self):
-        url = f"{self.base_url}/setMyCommands"
-        commands = [
-            {"command": "start", "description": "Начать использование бота"},
-            {"command": "setup", "description": "Настроить новое напоминание"},
-            {"command": "manage", "description": "Управление напоминаниями"},
-            {"command": "status", "description": "Показать все напоминания"},
-            {"command": "history", "description": "История активных витаминок"},
-            {"command": "archive", "description": "Архив завершенных курсов"},
-            {"command": "cleanup", "description": "Очистка истории и данных"},
-            {"command": "stop", "description": "Остановить все напоминания"},
-            {"command": "help", "description": "Помощь"}
-        ]
-        async with self.session.post(url, json={"commands": commands}) as response:
-            return await response.json()
+        """Описания команд на языке по умолчанию и отдельно для каждого перевода"""
+        if self.startup_task is not None:
+            # Шаблоны сообщений читаются задачей запуска
+            await asyncio.shield(self.startup_task)
+        result = None
+        for locale in self.messages.locales:
+            commands = [
+                {"command": command, "description": self.messages.plain(locale, f"command_{command}")}
+                for command in BOT_COMMANDS
+            ]
+            params = {"commands": commands}
+            if locale != self.messages.default_locale:
+                params["language_code"] = locale
+            result = await self.api_request("setMyCommands", params)
+            if not result or not result.get("ok"):
+                return result
+        return result
+
+    async def register_bot_commands(self):
+        """Регистрирует команды, повторяя попытки, пока Telegram недоступен"""
+        for delay in COMMANDS_RETRY_DELAYS:
+            try:
+                result = await self.setup_bot_commands()
+                if result and result.get("ok"):
+                    _LOGGER.debug("Bot commands registered")
+                    return
+                _LOGGER.warning(f"setMyCommands failed: {result}")
+            except Exception as err:
+                _LOGGER.warning(f"setMyCommands failed, retrying in {delay}s: {err}")
+            await asyncio.sleep(delay)
+        _LOGGER.error("Giving up registering bot commands")
 
     async def poll_updates(self):
         offset = 0
-        while True:
+        while not self.tasks.stopping:
             try:
                 url = f"{self.base_url}/getUpdates"
                 params = {"offset": offset, "timeout": 10}
+                started = time.perf_counter()
                 async with self.session.get(url, params=params) as response:
+                    self.metrics.record_api("getUpdates", time.perf_counter() - started, response.status)
                     if response.status == 200:
                         data = await response.json()
                         if data.get("ok"):
                             for update in data.get("result", []):
                                 offset = max(offset, update["update_id"] + 1)
-                                await self.handle_update(update)
+                                # Обработчик - отдельная задача: остановка поллера не прерывает
+                                # начатую обработку, ее дожидается stop()
+                                await asyncio.shield(self.tasks.spawn(self.handle_update(update), "handler"))
                 await asyncio.sleep(1)
             except asyncio.CancelledError:
                 break
@@ -76,13 +344,19 @@ class PillsReminderBot:
                 await asyncio.sleep(10)
 
     async def handle_update(self, update):
+        route = self.metrics.route_of(update)
+        started = time.perf_counter()
+        failed = False
         try:
             if "message" in update:
                 await self.handle_message(update["message"])
             elif "callback_query" in update:
                 await self.handle_callback_query(update["callback_query"])
         except Exception as err:
+            failed = True
             _LOGGER.error("Error handling update: %s", err)
+        finally:
+            self.metrics.record_handler(route, time.perf_counter() - started, failed)
 
     async def handle_message(self, message):
         if "text" not in message:
@@ -91,8 +365,15 @@ class PillsReminderBot:
         chat_id = message["chat"]["id"]
         user_id = message["from"]["id"]
         chat_type = message["chat"]["type"]
+        self._remember_language(message["from"])
+
+        # В группах обрабатываем только /chat - выбор чата для напоминаний
+        if chat_type in ("group", "supergroup"):
+            if text.startswith("/chat"):
+                await self.handle_group_chat_command(message)
+            return
 
-        # В канале/группе обрабатываем только callback-и от кнопок
+        # В канале обрабатываем только callback-и от кнопок
         if str(chat_id) == str(self.config[CONF_CHAT_ID]):
             return
 
@@ -103,13 +384,41 @@ class PillsReminderBot:
             else:
                 await self.handle_private_message(message)
 
+    def _remember_language(self, user_info):
+        language_code = user_info.get("language_code")
+        if language_code:
+            self._languages[str(user_info["id"])] = language_code
+
+    def _locale(self, user_id, user_data=None):
+        """Язык ответа: из профиля, а до первого напоминания - из language_code Telegram"""
+        return self.messages.locale_of(user_data, self._languages.get(str(user_id)))
+
+    def _schedule_text(self, locale, reminder):
+        """Расписание напоминания для сообщения на языке пользователя"""
+        return escape(format_schedule(reminder, functools.partial(self.messages.plain, locale)))
+
     async def handle_private_command(self, message):
         text = message["text"]
         chat_id = message["chat"]["id"]
         user_id = message["from"]["id"]
 
         if text.startswith("/start"):
-            await self.handle_start_command(chat_id, user_id, message["from"])
+            parts = text.split(maxsplit=1)
+            payload = parts[1] if len(parts) > 1 else ""
+            if payload.startswith(SPEC_PAYLOAD_PREFIX):
+                # Ссылка t.me/<бот>?start=add_... сразу создает напоминание
+                try:
+                    spec = decode_spec_payload(payload)
+                except StepError as err:
+                    await self.send_message(chat_id, self._step_error(self._locale(user_id), err))
+                    return
+                await self.handle_add_command(chat_id, user_id, message["from"], spec)
+            else:
+                await self.handle_start_command(chat_id, user_id, message["from"])
+        elif text.startswith("/add"):
+            parts = text.split(maxsplit=1)
+            spec = parts[1] if len(parts) > 1 else ""
+            await self.handle_add_command(chat_id, user_id, message["from"], spec)
         elif text.startswith("/setup"):
             await self.handle_setup_command(chat_id, user_id, message["from"])
         elif text.startswith("/manage"):
@@ -124,309 +433,246 @@ class PillsReminderBot:
             await self.handle_cleanup_command(chat_id, user_id)
         elif text.startswith("/stop"):
             await self.handle_stop_command(chat_id, user_id)
+        elif text.startswith("/timezone"):
+            await self.handle_timezone_command(chat_id, user_id, text)
+        elif text.startswith("/chat"):
+            await self.handle_chat_command(chat_id, user_id, text)
         elif text.startswith("/help"):
-            await self.handle_help_command(chat_id)
+            await self.handle_help_command(chat_id, user_id)
 
     async def handle_start_command(self, chat_id, user_id, user_info):
-        username = user_info.get("username", user_info.get("first_name", "пользователь"))
-        text = f"Привет, {username}! 👋\n\n"
-        text += "Я бот для напоминания о приеме витаминок.\n\n"
-        text += "🔧 Доступные команды:\n"
-        text += "/setup - создать новое напоминание\n"
-        text += "/manage - управление напоминаниями\n"
-        text += "/status - показать все напоминания\n"
-        text += "/history - история активных витаминок\n"
-        text += "/archive - архив завершенных курсов\n"
-        text += "/cleanup - очистка истории и данных\n"
-        text += "/stop - остановить все напоминания\n"
-        text += "/help - подробная помощь\n\n"
-        text += "💡 Настройка происходит здесь, в личных сообщениях.\n"
-        text += "📢 Напоминания будут приходить в канал с кнопками."
-        await self.send_message(chat_id, text)
+        locale = self._locale(user_id)
+        username = user_info.get("username") or user_info.get("first_name") or self.messages.render(
+            locale, "default_username"
+        )
+        await self.send_message(chat_id, self.messages.render(locale, "start", username=username))
+
+    @staticmethod
+    def _profile(chat_id, user_info):
+        """Профиль из данных Telegram; без имени подпись берется из шаблонов при отображении"""
+        profile = {
+            "first_name": user_info.get("first_name", ""),
+            "chat_id": chat_id,
+            "language": normalize_locale(user_info.get("language_code")),
+        }
+        username = user_info.get("username") or user_info.get("first_name")
+        if username:
+            profile["username"] = username
+        return profile
+
+    def _step_error(self, locale, err):
+        return self.messages.render(locale, err.key, **err.values)
 
     async def handle_setup_command(self, chat_id, user_id, user_info):
-        username = user_info.get("username", user_info.get("first_name", "пользователь"))
+        # Профиль пользователя сохраняется вместе с напоминанием
+        reminder_id = str(int(datetime.now().timestamp()))
         users_data = await self.users_storage.async_load() or {}
+        session = self.wizard.start(
+            user_id, "pill_name", reminder_id, chat_id=chat_id, profile=self._profile(chat_id, user_info),
+            locale=self._locale(user_id, users_data.get(str(user_id))),
+        )
+        await self.send_message(
+            chat_id, self.messages.render(session["locale"], "setup_title", prompt=self.wizard.prompt(session))
+        )
+
+    async def handle_add_command(self, chat_id, user_id, user_info, spec):
+        """Создает напоминание из одной строки без пошаговой настройки"""
+        locale = self._locale(user_id, (await self.users_storage.async_load() or {}).get(str(user_id)))
+        if not spec.strip():
+            await self.send_message(chat_id, self.messages.render(locale, "add_usage"))
+            return
+        try:
+            draft, schedule_options = parse_reminder_spec(spec)
+        except StepError as err:
+            await self.send_message(
+                chat_id, self.messages.render(locale, "add_error", error=self._step_error(locale, err))
+            )
+            return
         
-        if str(user_id) not in users_data:
-            users_data[str(user_id)] = {
-                "username": username,
-                "first_name": user_info.get("first_name", ""),
-                "chat_id": chat_id,
-                "reminders": {}
-            }
-        else:
-            # Обновляем username если он изменился
-            users_data[str(user_id)]["username"] = username
-            users_data[str(user_id)]["first_name"] = user_info.get("first_name", "")
-            users_data[str(user_id)]["chat_id"] = chat_id
-
-        # Создаем новый ID для напоминания
+        draft["course_number"] = await self.get_next_course_number(user_id, draft["pill_name"])
         reminder_id = str(int(datetime.now().timestamp()))
-        users_data[str(user_id)]["setup_step"] = "pill_name"
-        users_data[str(user_id)]["current_reminder_id"] = reminder_id
-        await self.users_storage.async_save(users_data)
-
-        text = "🆕 Создание нового напоминания\n\n"
-        text += "Шаг 1 из 7: Введите название витаминки\n"
-        text += "Например: Витамин D, Омега-3, Магний и т.д."
+        reminder = await self._commit_reminder(
+            user_id, reminder_id, draft, self._profile(chat_id, user_info), schedule_options
+        )
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(str(user_id))
+        text = self._reminder_created_text(user_id, reminder, user_data)
+        # Ссылкой можно поделиться: она создает такое же напоминание
+        payload = encode_spec_payload(spec)
+        username = await self.get_bot_username() if payload else None
+        if username:
+            text += self.messages.render(
+                self._locale(user_id, user_data), "reminder_share_link",
+                link=f"https://t.me/{username}?start={payload}",
+            )
         await self.send_message(chat_id, text)
 
+    async def get_bot_username(self):
+        """Имя бота (getMe запрашивается один раз); None, если Telegram недоступен"""
+        if self.username is None:
+            try:
+                result = await self.api_request("getMe", {})
+            except Exception as err:
+                _LOGGER.debug(f"getMe failed: {err}")
+                return None
+            bot_info = result.get("result") if result and result.get("ok") else None
+            if not isinstance(bot_info, dict):
+                return None
+            self.username = bot_info.get("username") or ""
+        return self.username or None
+
     async def handle_manage_command(self, chat_id, user_id):
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or not user_data.get("reminders"):
-            text = "❌ У вас нет настроенных напоминаний\n\n"
-            text += "Используйте /setup для создания первого напоминания"
-            await self.send_message(chat_id, text)
+            await self.send_message(chat_id, self.messages.render(locale, "no_reminders"))
             return
 
-        text = "⚙️ Управление напоминаниями:\n\n"
+        version = (self.users_storage.revision_of(user_id), locale)
+        rendered = self.renders.get(user_id, "manage", version)
+        if rendered is None:
+            rendered = self.renders.put(user_id, "manage", version, self._render_manage(locale, user_data))
+        text, keyboard = rendered
+        await self.send_message(chat_id, text, keyboard)
+
+    def _render_manage(self, locale, user_data):
+        render = self.messages.render
+        plain = self.messages.plain
+        text = render(locale, "manage_title")
         keyboard_buttons = []
         
         for reminder_id, reminder in user_data["reminders"].items():
             status_icon = "🟢" if reminder.get("active", True) else "🔴"
-            pill_name = reminder.get("pill_name", "Без названия")
-            
-            # Показываем время первого приема или все времена
-            times_display = []
-            for i, time_slot in enumerate(reminder.get("times", [])):
-                times_display.append(time_slot.get("time", "??:??"))
-            times_str = ", ".join(times_display) if times_display else "Не указано"
-            
-            dosage = reminder.get("dosage", "")
-            course_number = reminder.get("course_number", 1)
-            duration_days = reminder.get("duration_days", "∞")
-            
-            display_text = f"{pill_name}"
-            if dosage:
-                display_text += f" ({dosage})"
-            if course_number > 1:
-                display_text += f" [Курс #{course_number}]"
-                
-            text += f"{status_icon} {display_text}\n"
-            text += f"    ⏰ Время: {times_str}\n"
-            text += f"    📅 Длительность: {duration_days} дн.\n"
+            pill_name = reminder.get("pill_name", "")
+            duration_days = reminder.get("duration_days")
             
-            if reminder.get("description"):
-                text += f"    💡 {reminder['description']}\n"
-            text += "\n"
+            text += render(
+                locale, "manage_item",
+                icon=status_icon,
+                pill=self.messages.pill_of(locale, reminder),
+                schedule=self._schedule_text(locale, reminder),
+                duration=(render(locale, "duration_days", days=duration_days) if duration_days
+                          else render(locale, "duration_infinite")),
+                description=(render(locale, "manage_description", description=reminder["description"])
+                             if reminder.get("description") else ""),
+            )
 
             # Добавляем кнопки для каждого напоминания
+            toggle_key = "button_pause" if reminder.get("active", True) else "button_resume"
             keyboard_buttons.extend([
-                [{"text": f"⏰ Время {pill_name}", "callback_data": f"edit_reminder_{reminder_id}"}],
-                [{"text": f"{'⏸️ Приостановить' if reminder.get('active', True) else '▶️ Включить'} {pill_name}",
+                [{"text": plain(locale, "button_edit_times", pill_name=pill_name),
+                  "callback_data": f"edit_reminder_{reminder_id}"}],
+                [{"text": plain(locale, toggle_key, pill_name=pill_name),
                   "callback_data": f"toggle_reminder_{reminder_id}"}],
-                [{"text": f"✅ Курс завершен {pill_name}", "callback_data": f"archive_reminder_{reminder_id}"}],
+                [{"text": plain(locale, "button_finish_course", pill_name=pill_name),
+                  "callback_data": f"archive_reminder_{reminder_id}"}],
             ])
         
-        keyboard_buttons.append([{"text": "🆕 Создать новое напоминание", "callback_data": "new_reminder"}])
-        keyboard = {"inline_keyboard": keyboard_buttons}
-        await self.send_message(chat_id, text, keyboard)
+        keyboard_buttons.append([{"text": plain(locale, "button_new_reminder"), "callback_data": "new_reminder"}])
+        return text, {"inline_keyboard": keyboard_buttons}
 
     async def handle_private_message(self, message):
         chat_id = message["chat"]["id"]
         user_id = message["from"]["id"]
         text = message["text"]
         
-        users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(str(user_id))
-        
-        if not user_data or "setup_step" not in user_data:
-            text_response = "Используйте команду /setup для создания напоминания или /manage для управления существующими"
-            await self.send_message(chat_id, text_response)
+        session = self.wizard.get(user_id)
+        if session is None:
+            users_data = await self.users_storage.async_load() or {}
+            locale = self._locale(user_id, users_data.get(str(user_id)))
+            await self.send_message(chat_id, self.messages.render(locale, "no_session"))
             return
 
-        setup_step = user_data["setup_step"]
-        reminder_id = user_data.get("current_reminder_id")
-
-        if setup_step == "pill_name":
-            if "reminders" not in user_data:
-                user_data["reminders"] = {}
-            
-            # Проверяем, есть ли уже курсы этой витаминки в архиве
-            course_number = await self.get_next_course_number(user_id, text)
-            
-            user_data["reminders"][reminder_id] = {
-                "pill_name": text,
-                "course_number": course_number,
-                "created": datetime.now().isoformat()
-            }
-            user_data["setup_step"] = "dosage"
-            await self.users_storage.async_save(users_data)
-            
-            response = f"✅ Витаминка '{text}' сохранена!"
-            if course_number > 1:
-                response += f" (Курс #{course_number})"
-            response += "\n\nШаг 2 из 7: Введите дозировку\n"
-            response += "Например: 1000 МЕ, 2 таблетки, 1 капсула\n"
-            response += "Или отправьте '-' чтобы пропустить"
-            await self.send_message(chat_id, response)
-
-        elif setup_step == "dosage":
-            dosage = text if text != "-" else ""
-            user_data["reminders"][reminder_id]["dosage"] = dosage
-            user_data["setup_step"] = "description"
-            await self.users_storage.async_save(users_data)
-            
-            response = "✅ Дозировка сохранена!\n\n"
-            response += "Шаг 3 из 7: Введите описание (для чего принимаете)\n"
-            response += "Например: для иммунитета, для сердца, от врача\n"
-            response += "Или отправьте '-' чтобы пропустить"
-            await self.send_message(chat_id, response)
-
-        elif setup_step == "description":
-            description = text if text != "-" else ""
-            user_data["reminders"][reminder_id]["description"] = description
-            user_data["setup_step"] = "duration_days"
-            await self.users_storage.async_save(users_data)
-            
-            response = "✅ Описание сохранено!\n\n"
-            response += "Шаг 4 из 7: Введите длительность курса в днях\n"
-            response += "Например: 30, 60, 90\n"
-            response += "Или отправьте '-' для бесконечного курса"
-            await self.send_message(chat_id, response)
-
-        elif setup_step == "duration_days":
-            if text == "-":
-                duration_days = None
-            else:
-                try:
-                    duration_days = int(text)
-                    if duration_days <= 0:
-                        await self.send_message(chat_id, "❌ Длительность должна быть положительным числом!")
-                        return
-                except ValueError:
-                    await self.send_message(chat_id, "❌ Введите число или '-' для бесконечного курса!")
-                    return
-            
-            user_data["reminders"][reminder_id]["duration_days"] = duration_days
-            user_data["setup_step"] = "times_per_day"
-            await self.users_storage.async_save(users_data)
-            
-            response = "✅ Длительность сохранена!\n\n"
-            response += "Шаг 5 из 7: Сколько раз в день принимать?\n"
-            response += "Введите число от 1 до 6"
-            await self.send_message(chat_id, response)
+        try:
+            response = await self.wizard.async_advance(session, text)
+        except StepError as err:
+            await self.send_message(chat_id, self._step_error(session.get("locale"), err))
+            return
 
-        elif setup_step == "times_per_day":
-            try:
-                times_per_day = int(text)
-                if times_per_day < 1 or times_per_day > 6:
-                    await self.send_message(chat_id, "❌ Количество приемов должно быть от 1 до 6!")
-                    return
-            except ValueError:
-                await self.send_message(chat_id, "❌ Введите число от 1 до 6!")
-                return
-            
-            user_data["reminders"][reminder_id]["times_per_day"] = times_per_day
-            user_data["reminders"][reminder_id]["times"] = []
-            user_data["setup_step"] = "time_1"
-            user_data["current_time_index"] = 0
-            await self.users_storage.async_save(users_data)
-            
-            response = f"✅ Количество приемов: {times_per_day}\n\n"
-            response += "Шаг 6 из 7: Введите время приемов\n\n"
-            response += f"Время 1-го приема (ЧЧ:ММ):"
+        if session["step"] == STEP_CONFIRM:
+            await self.show_confirmation(chat_id, user_id, session["reminder_id"])
+        elif session["step"] == STEP_SAVE_EDIT:
+            await self.save_edited_times(chat_id, user_id, session)
+        elif response:
             await self.send_message(chat_id, response)
 
-        elif setup_step.startswith("time_"):
-            try:
-                datetime.strptime(text, "%H:%M")
-            except ValueError:
-                await self.send_message(chat_id, "❌ Неверный формат времени! Используйте ЧЧ:ММ")
-                return
-            
-            current_time_index = user_data.get("current_time_index", 0)
-            times_per_day = user_data["reminders"][reminder_id]["times_per_day"]
-            
-            # Добавляем время
-            user_data["reminders"][reminder_id]["times"].append({"time": text})
-            current_time_index += 1
-            
-            if current_time_index < times_per_day:
-                # Запрашиваем следующее время
-                user_data["setup_step"] = f"time_{current_time_index + 1}"
-                user_data["current_time_index"] = current_time_index
-                await self.users_storage.async_save(users_data)
-                
-                response = f"✅ Время {current_time_index}-го приема сохранено!\n\n"
-                response += f"Время {current_time_index + 1}-го приема (ЧЧ:ММ):"
-                await self.send_message(chat_id, response)
-            else:
-                # Все времена собраны, переходим к подтверждению
-                user_data["setup_step"] = "confirm"
-                user_data.pop("current_time_index", None)
-                await self.users_storage.async_save(users_data)
-                
-                await self.show_confirmation(chat_id, user_id, reminder_id)
+    async def _wizard_course_number(self, session):
+        """Номер курса по уже введенному названию витаминки"""
+        draft = session["draft"]
+        draft["course_number"] = await self.get_next_course_number(session["user_id"], draft["pill_name"])
 
-        elif setup_step == "edit_times":
-            # Редактирование времен существующего напоминания
-            times_text = text.strip().replace(" ", "").split(",")
-            times_list = []
-            
-            try:
-                for time_str in times_text:
-                    datetime.strptime(time_str, "%H:%M")
-                    times_list.append({"time": time_str})
-            except ValueError:
-                await self.send_message(chat_id, "❌ Неверный формат! Используйте: ЧЧ:ММ,ЧЧ:ММ,...")
-                return
-            
-            editing_reminder_id = user_data.get("editing_reminder_id")
-            if editing_reminder_id and editing_reminder_id in user_data.get("reminders", {}):
-                user_data["reminders"][editing_reminder_id]["times"] = times_list
-                user_data["reminders"][editing_reminder_id]["times_per_day"] = len(times_list)
-                user_data.pop("setup_step", None)
-                user_data.pop("editing_reminder_id", None)
-                await self.users_storage.async_save(users_data)
-                
-                reminder = user_data["reminders"][editing_reminder_id]
-                times_display = [t["time"] for t in times_list]
-                
-                response = "✅ Времена приема обновлены!\n\n"
-                response += f"💊 Витаминка: {reminder['pill_name']}\n"
-                response += f"⏰ Времена: {', '.join(times_display)}"
-                await self.send_message(chat_id, response)
-
-    async def show_confirmation(self, chat_id, user_id, reminder_id):
+    async def save_edited_times(self, chat_id, user_id, session):
+        """Сохраняет новое расписание существующего напоминания"""
+        self.wizard.finish(user_id)
+        times_list, schedule_options = session["draft"]["schedule_input"]
         users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(str(user_id))
-        reminder = user_data["reminders"][reminder_id]
+        user_data = users_data.get(str(user_id), {})
+        reminder_id = session["reminder_id"]
+        reminder = user_data.get("reminders", {}).get(reminder_id)
+        locale = self._locale(user_id, user_data)
+        if reminder is None:
+            await self.send_message(chat_id, self.messages.render(locale, "reminder_not_found"))
+            return
         
-        response = "✅ Все данные собраны!\n\n"
-        response += f"📋 Проверьте настройки:\n"
-        response += f"💊 Витаминка: {reminder['pill_name']}"
-        if reminder.get('course_number', 1) > 1:
-            response += f" (Курс #{reminder['course_number']})"
-        response += "\n"
+        reminder["times"] = times_list
+        reminder["times_per_day"] = len(times_list)
+        reminder["schedule"] = compile_schedule(reminder, **schedule_options)
+        await self.users_storage.async_save(users_data, changed=[user_id])
+        self._reschedule(user_id, reminder_id, reminder)
         
-        if reminder.get('dosage'):
-            response += f"📏 Дозировка: {reminder['dosage']}\n"
-        if reminder.get('description'):
-            response += f"💡 Описание: {reminder['description']}\n"
-            
-        duration = reminder.get('duration_days')
-        if duration:
-            response += f"📅 Длительность: {duration} дней\n"
-        else:
-            response += f"📅 Длительность: бесконечно\n"
-            
+        await self.send_message(chat_id, self.messages.render(
+            locale, "times_updated",
+            pill_name=reminder['pill_name'], schedule=self._schedule_text(locale, reminder),
+        ))
+
+    async def show_confirmation(self, chat_id, user_id, reminder_id):
+        session = self.wizard.get(user_id)
+        reminder = session["draft"]
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(str(user_id)) or session.get("profile") or {}
+        locale = session.get("locale") or self._locale(user_id, user_data)
+        render = self.messages.render
+        plain = self.messages.plain
+
         times_display = [t["time"] for t in reminder.get("times", [])]
-        response += f"⏰ Времена приема: {', '.join(times_display)}\n"
-        response += f"👤 Пользователь: @{user_data.get('username', user_data.get('first_name', 'безымянный'))}\n\n"
-        response += "📢 Напоминания будут приходить в канал с кнопками для ответа"
+        response = render(
+            locale, "confirmation",
+            pill_name=reminder['pill_name'],
+            course=self._course_suffix(locale, reminder),
+            details=self._reminder_details(locale, reminder),
+            times=", ".join(times_display),
+            username=user_data.get('username', user_data.get('first_name') or render(locale, "anonymous_username")),
+        )
         
         keyboard = {
             "inline_keyboard": [
-                [{"text": "✅ Сохранить напоминание", "callback_data": f"save_reminder_{reminder_id}"}],
-                [{"text": "❌ Отменить", "callback_data": f"cancel_reminder_{reminder_id}"}]
+                [{"text": plain(locale, "button_save"), "callback_data": f"save_reminder_{reminder_id}"}],
+                [{"text": plain(locale, "button_cancel"), "callback_data": f"cancel_reminder_{reminder_id}"}]
             ]
         }
         await self.send_message(chat_id, response, keyboard)
 
+    def _course_suffix(self, locale, reminder):
+        if reminder.get('course_number', 1) > 1:
+            return self.messages.render(locale, "course_suffix", course_number=reminder['course_number'])
+        return ""
+
+    def _reminder_details(self, locale, reminder):
+        """Строки дозировки, описания и длительности для подтверждения и созданного напоминания"""
+        render = self.messages.render
+        lines = []
+        if reminder.get('dosage'):
+            lines.append(render(locale, "line_dosage", dosage=reminder['dosage']))
+        if reminder.get('description'):
+            lines.append(render(locale, "line_description", description=reminder['description']))
+        duration_days = reminder.get('duration_days')
+        duration = (render(locale, "duration_days", days=duration_days) if duration_days
+                    else render(locale, "duration_infinite"))
+        lines.append(render(locale, "line_duration", duration=duration))
+        return Markup("".join(lines))
+
     async def get_next_course_number(self, user_id, pill_name):
         """Получает номер следующего курса для данной витаминки (только родительские курсы)"""
         try:
@@ -458,63 +704,78 @@ class PillsReminderBot:
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or not user_data.get("reminders"):
-            text = "❌ У вас нет настроенных напоминаний\n\n"
-            text += "Используйте /setup для создания напоминания"
-            await self.send_message(chat_id, text)
+            await self.send_message(chat_id, self.messages.render(locale, "no_reminders"))
             return
 
-        text = "📋 Ваши напоминания:\n\n"
+        # Прогресс курса зависит от даты, а "Следующее" - от планировщика,
+        # поэтому они входят в версию ответа вместе с ревизией напоминаний
+        today = self._user_today(user_id)
+        zone = self.next_due.zone_of(user_id)
+        next_fires = tuple(
+            self.next_due.next_due(user_id, reminder_id) if reminder.get("active", True) else None
+            for reminder_id, reminder in user_data["reminders"].items()
+        )
+        version = (self.users_storage.revision_of(user_id), locale, today, str(zone), next_fires)
+        text = self.renders.get(user_id, "status", version)
+        if text is None:
+            text = self.renders.put(
+                user_id, "status", version, self._render_status(locale, user_data, today, zone, next_fires)
+            )
+        await self.send_message(chat_id, text)
+
+    def _render_status(self, locale, user_data, today, zone, next_fires):
+        render = self.messages.render
+        text = render(locale, "status_title")
         active_count = 0
         inactive_count = 0
         
-        for reminder_id, reminder in user_data["reminders"].items():
+        for reminder, next_fire in zip(user_data["reminders"].values(), next_fires):
             is_active = reminder.get("active", True)
-            status_icon = "🟢" if is_active else "🔴"
-            status_text = "Активно" if is_active else "Приостановлено"
-            course_number = reminder.get("course_number", 1)
             duration_days = reminder.get("duration_days")
-            
-            text += f"{status_icon} {reminder.get('pill_name', 'Без названия')}"
-            if reminder.get('dosage'):
-                text += f" ({reminder['dosage']})"
-            if course_number > 1:
-                text += f" [Курс #{course_number}]"
-            text += "\n"
-            
-            times_display = [t["time"] for t in reminder.get("times", [])]
-            text += f"   ⏰ Времена: {', '.join(times_display) if times_display else 'не указано'}\n"
+            details = []
+            if next_fire:
+                next_fire = next_fire.astimezone(zone)
+                details.append(render(locale, "status_next", time=next_fire.strftime('%d.%m %H:%M')))
             
             if duration_days:
-                # Вычисляем прогресс курса
-                start_date = datetime.fromisoformat(reminder.get('created', datetime.now().isoformat()))
-                days_passed = (datetime.now() - start_date).days + 1
+                # Вычисляем прогресс курса по дате в часовом поясе пользователя
+                days_passed = course_day(reminder, today, zone, self.next_due.default_zone)
                 days_left = max(0, duration_days - days_passed + 1)
-                text += f"   📅 Прогресс: {days_passed}/{duration_days} дн. (осталось {days_left} дн.)\n"
+                details.append(render(
+                    locale, "status_progress", day=days_passed, duration_days=duration_days, days_left=days_left
+                ))
             else:
-                text += f"   📅 Длительность: бесконечно\n"
+                details.append(render(locale, "status_infinite"))
                 
             if reminder.get('description'):
-                text += f"   💡 Описание: {reminder['description']}\n"
-            text += f"   📊 Статус: {status_text}\n\n"
+                details.append(render(locale, "status_description", description=reminder['description']))
+
+            text += render(
+                locale, "status_item",
+                icon="🟢" if is_active else "🔴",
+                pill=self.messages.pill_of(locale, reminder),
+                schedule=self._schedule_text(locale, reminder),
+                details=Markup("".join(details)),
+                status=render(locale, "status_active" if is_active else "status_paused"),
+            )
             
             if is_active:
                 active_count += 1
             else:
                 inactive_count += 1
 
-        text += f"📊 Итого: {active_count} активных, {inactive_count} приостановленных\n"
-        text += f"📢 Напоминания приходят в канал\n\n"
-        text += f"💡 Используйте /archive для просмотра завершенных курсов"
-        await self.send_message(chat_id, text)
+        text += render(locale, "status_footer", active=active_count, paused=inactive_count)
+        return text
 
     async def handle_stop_command(self, chat_id, user_id):
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or not user_data.get("reminders"):
-            text = "❌ У вас нет активных напоминаний"
-            await self.send_message(chat_id, text)
+            await self.send_message(chat_id, self.messages.render(locale, "stop_nothing"))
             return
 
         # Останавливаем все напоминания
@@ -524,48 +785,103 @@ class PillsReminderBot:
                 reminder["active"] = False
                 stopped_count += 1
         
-        await self.users_storage.async_save(users_data)
+        await self.users_storage.async_save(users_data, changed=[user_id])
+        self._unschedule(user_id)
 
         # Убираем активные напоминания
         reminders_to_remove = [rid for rid in self.active_reminders.keys() if rid.startswith(f"{user_id}_")]
         for reminder_key in reminders_to_remove:
             del self.active_reminders[reminder_key]
 
-        text = f"🔴 Остановлено {stopped_count} напоминаний\n\n"
-        text += "Используйте /manage для управления напоминаниями"
-        await self.send_message(chat_id, text)
+        await self.send_message(chat_id, self.messages.render(locale, "stopped", count=stopped_count))
+
+    async def handle_timezone_command(self, chat_id, user_id, text):
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(str(user_id))
+        parts = text.split(maxsplit=1)
+        locale = self._locale(user_id, user_data)
+
+        if len(parts) < 2:
+            current = self.next_due.zone_of(user_id)
+            await self.send_message(chat_id, self.messages.render(locale, "timezone_current", zone=str(current)))
+            return
+
+        if not user_data:
+            await self.send_message(chat_id, self.messages.render(locale, "setup_first"))
+            return
+
+        zone_name = await self.hass.async_add_executor_job(parse_timezone, parts[1])
+        if not zone_name:
+            await self.send_message(chat_id, self.messages.render(locale, "timezone_unknown"))
+            return
+
+        user_data["timezone"] = zone_name
+        await self.users_storage.async_save(users_data, changed=[user_id])
+        self.next_due.set_timezone(user_id, zone_name, user_data.get("reminders"))
+        self._schedule_changed.set()
+
+        local_now = datetime.now(get_zone(zone_name))
+        await self.send_message(chat_id, self.messages.render(
+            locale, "timezone_set", zone=zone_name, time=local_now.strftime('%H:%M')
+        ))
+
+    async def handle_chat_command(self, chat_id, user_id, text):
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(str(user_id))
+        parts = text.split(maxsplit=1)
+        locale = self._locale(user_id, user_data)
+
+        if user_data and len(parts) > 1 and parts[1].strip().lower() in ("reset", "сброс"):
+            user_data.pop("reminder_chat_id", None)
+            user_data.pop("reminder_chat_title", None)
+            await self.users_storage.async_save(users_data, changed=[user_id])
+            await self.send_message(chat_id, self.messages.render(locale, "chat_reset"))
+            return
+
+        if user_data and user_data.get("reminder_chat_id"):
+            response = self.messages.render(
+                locale, "chat_current", chat=user_data.get('reminder_chat_title') or user_data['reminder_chat_id']
+            )
+        else:
+            response = self.messages.render(locale, "chat_channel")
+        response += self.messages.render(locale, "chat_hint")
+        await self.send_message(chat_id, response)
+
+    async def handle_group_chat_command(self, message):
+        """/chat в группе: напоминания отправителя будут приходить в эту группу"""
+        chat = message["chat"]
+        user_id = message["from"]["id"]
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(str(user_id))
+
+        locale = self._locale(user_id, user_data)
+        if not user_data:
+            await self.send_message(chat["id"], self.messages.render(locale, "group_setup_first"))
+            return
+
+        user_data["reminder_chat_id"] = chat["id"]
+        user_data["reminder_chat_title"] = chat.get("title", "")
+        await self.users_storage.async_save(users_data, changed=[user_id])
+
+        await self.send_message(chat["id"], self.messages.render(
+            locale, "group_chat_set", username=self._display_name(locale, user_data)
+        ))
+
+    def _reminder_chat(self, user_data):
+        """Чат для напоминаний пользователя: выбранная группа или общий канал"""
+        return user_data.get("reminder_chat_id") or self.config[CONF_CHAT_ID]
 
     async def handle_history_command(self, chat_id, user_id):
         history_text = await self.get_user_history(user_id, active_only=True)
         await self.send_message(chat_id, history_text)
 
     async def handle_archive_command(self, chat_id, user_id):
-        archive_text = await self.get_user_archive(user_id)
-        
-        # Добавляем кнопки для повтора курсов - только родительские курсы (#1)
-        archive_data = await self.archive_storage.async_load() or {'archive': []}
-        user_archive = [
-            entry for entry in archive_data.get('archive', [])
-            if (entry.get('user_id') == str(user_id) and 
-                entry.get('reminder_data', {}).get('course_number', 1) == 1)
-        ]
-        
-        keyboard_buttons = []
-        if user_archive:
-            for entry in user_archive[-5:]:  # Показываем последние 5 родительских курсов для повтора
-                reminder_data = entry.get('reminder_data', {})
-                pill_name = reminder_data.get('pill_name', 'Курс')
-                button_text = f"🔄 Повторить {pill_name}"
-                keyboard_buttons.append([{
-                    "text": button_text,
-                    "callback_data": f"repeat_course_{entry.get('archived_at', '')}"
-                }])
-        
-        if keyboard_buttons:
-            keyboard = {"inline_keyboard": keyboard_buttons}
-            await self.send_message(chat_id, archive_text, keyboard)
-        else:
-            await self.send_message(chat_id, archive_text)
+        text, keyboard = await self.get_archive_page(user_id)
+        await self.send_message(chat_id, text, keyboard)
+
+    async def show_archive_page(self, chat_id, user_id, message_id, page):
+        text, keyboard = await self.get_archive_page(user_id, page)
+        await self.edit_message_text(chat_id, message_id, text, keyboard)
 
     async def handle_cleanup_command(self, chat_id, user_id):
         """Обработка команды очистки истории"""
@@ -578,62 +894,42 @@ class PillsReminderBot:
         user_history = [entry for entry in history_data.get('history', []) if entry.get('user_id') == str(user_id)]
         user_archive = [entry for entry in archive_data.get('archive', []) if entry.get('user_id') == str(user_id)]
         
+        locale = self._locale(user_id, user_data)
+        render = self.messages.render
+        plain = self.messages.plain
         if not user_history and not user_archive and not (user_data and user_data.get('reminders')):
-            text = "❌ У вас нет данных для очистки"
-            await self.send_message(chat_id, text)
+            await self.send_message(chat_id, render(locale, "cleanup_nothing"))
             return
 
-        text = "🧹 Очистка истории и данных\n\n"
-        text += "⚠️ ВНИМАНИЕ! Очистка необратима!\n\n"
-        text += "Что будет удалено:\n"
+        text = render(locale, "cleanup_title")
         if user_history:
-            text += f"📊 Активная история: {len(user_history)} записей\n"
+            text += render(locale, "cleanup_history", count=len(user_history))
         if user_archive:
-            text += f"🗄️ Архив: {len(user_archive)} курсов\n"
+            text += render(locale, "cleanup_archive", count=len(user_archive))
         if user_data and user_data.get('reminders'):
-            text += f"⚙️ Активные напоминания: {len(user_data['reminders'])}\n"
-        text += f"🏠 Устройства и сенсоры в Home Assistant\n\n"
-        text += "Выберите, что очистить:"
+            text += render(locale, "cleanup_reminders", count=len(user_data['reminders']))
+        text += render(locale, "cleanup_devices")
+        text += render(locale, "cleanup_choose")
 
         keyboard_buttons = [
-            [{"text": "🧹 Очистить ВСЁ", "callback_data": f"cleanup_all_{user_id}"}],
+            [{"text": plain(locale, "button_cleanup_all"), "callback_data": f"cleanup_all_{user_id}"}],
         ]
         
         # Добавляем кнопки для очистки отдельных курсов
         if user_archive or (user_data and user_data.get('reminders')):
-            keyboard_buttons.append([{"text": "📋 Выборочная очистка", "callback_data": f"cleanup_selective_{user_id}"}])
+            keyboard_buttons.append([{"text": plain(locale, "button_cleanup_selective"),
+                                      "callback_data": f"cleanup_selective_{user_id}"}])
         
-        keyboard_buttons.append([{"text": "❌ Отмена", "callback_data": "cleanup_cancel"}])
+        keyboard_buttons.append([{"text": plain(locale, "button_cleanup_cancel"), "callback_data": "cleanup_cancel"}])
         keyboard = {"inline_keyboard": keyboard_buttons}
         await self.send_message(chat_id, text, keyboard)
 
-    async def handle_help_command(self, chat_id):
-        text = "🆘 Справка по боту Pills Reminder\n\n"
-        text += "🔧 Команды для управления:\n"
-        text += "/setup - создать новое напоминание\n"
-        text += "/manage - управление напоминаниями\n"
-        text += "/status - список всех напоминаний\n"
-        text += "/history - история активных витаминок\n"
-        text += "/archive - архив завершенных курсов\n"
-        text += "/cleanup - очистка истории и данных\n"
-        text += "/stop - остановить все напоминания\n\n"
-        text += "💡 Как это работает:\n"
-        text += "1️⃣ Настраивайте бота здесь, в личных сообщениях\n"
-        text += "2️⃣ Можно создать несколько напоминаний для разных витаминок\n"
-        text += "3️⃣ Для каждой витаминки можно настроить до 6 приемов в день\n"
-        text += "4️⃣ В указанное время в канал придут напоминания с прогрессом курса\n"
-        text += "5️⃣ Нажимайте кнопки в канале: ✅ Выпил, ❌ Пропустить или 📝 Описание\n"
-        text += "6️⃣ Если не ответите, напоминания повторяются каждые 30 минут\n"
-        text += "7️⃣ Управляйте напоминаниями через /manage\n\n"
-        text += "⚙️ В меню управления можно:\n"
-        text += "• Изменять время приемов\n"
-        text += "• Приостанавливать/включать напоминания\n"
-        text += "• Завершать курс (переносить в архив)\n\n"
-        text += "📊 /history - показывает только активные витаминки\n"
-        text += "🗄️ /archive - показывает все завершенные курсы с возможностью повтора\n"
-        text += "🧹 /cleanup - очистка истории и данных (включая сенсоры Home Assistant)\n\n"
-        text += "🔄 Повтор курсов: можно повторять только родительские курсы (Курс #1)"
-        await self.send_message(chat_id, text)
+    async def handle_help_command(self, chat_id, user_id):
+        users_data = await self.users_storage.async_load() or {}
+        locale = self._locale(user_id, users_data.get(str(user_id)))
+        await self.send_message(chat_id, self.messages.render(
+            locale, "help", max_times=MAX_TIMES_PER_DAY, nag_minutes=int(NAG_INTERVAL.total_seconds() // 60)
+        ))
 
     async def handle_callback_query(self, callback_query):
         await self.answer_callback_query(callback_query["id"])
@@ -641,6 +937,7 @@ class PillsReminderBot:
         chat_id = callback_query["message"]["chat"]["id"]
         user_id = callback_query["from"]["id"]
         message_id = callback_query["message"]["message_id"]
+        self._remember_language(callback_query["from"])
 
         # Создание и настройка напоминаний
         if data.startswith("save_reminder_"):
@@ -668,7 +965,10 @@ class PillsReminderBot:
         elif data.startswith("cancel_archive_"):
             await self.handle_manage_command(chat_id, user_id)
 
-        # Повтор курса из архива
+        # Архив: листание страниц и повтор курса
+        elif data.startswith("archive_page_"):
+            page = int(data.split("_")[2])
+            await self.show_archive_page(chat_id, user_id, message_id, page)
         elif data.startswith("repeat_course_"):
             archived_at = data.split("_", 2)[2]
             await self.repeat_course_from_archive(chat_id, user_id, message_id, archived_at)
@@ -691,7 +991,7 @@ class PillsReminderBot:
             pill_name = parts[4]
             await self.confirm_cleanup_pill_data(chat_id, user_id, message_id, cleanup_user_id, pill_name)
         elif data == "cleanup_cancel":
-            await self.edit_message_text(chat_id, message_id, "❌ Очистка отменена")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "cleanup_cancelled"))
 
         # Действия с напоминаниями в канале
         elif data.startswith("taken_"):
@@ -714,62 +1014,65 @@ class PillsReminderBot:
             reminder_id = parts[2] if len(parts) > 2 else "default"
             await self.show_description(chat_id, reminder_user_id, message_id, user_id, reminder_id)
 
+    async def _user_text(self, user_id, key, **values):
+        """Сообщение на языке пользователя, когда его данные еще не загружены"""
+        users_data = await self.users_storage.async_load() or {}
+        return self.messages.render(self._locale(user_id, users_data.get(str(user_id))), key, **values)
+
     async def cleanup_all_data(self, chat_id, user_id, message_id, cleanup_user_id):
         """Полная очистка всех данных пользователя"""
         try:
             if str(user_id) != str(cleanup_user_id):
-                await self.edit_message_text(chat_id, message_id, "❌ Ошибка: неверный пользователь")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "wrong_user"))
                 return
 
             # Очищаем активную историю
             history_data = await self.storage.async_load() or {'history': []}
             user_history_count = len([entry for entry in history_data.get('history', []) if entry.get('user_id') == str(user_id)])
             history_data['history'] = [entry for entry in history_data.get('history', []) if entry.get('user_id') != str(user_id)]
-            await self.storage.async_save(history_data)
+            await self.storage.async_save(history_data, changed=[user_id])
 
             # Очищаем архив
             archive_data = await self.archive_storage.async_load() or {'archive': []}
             user_archive_count = len([entry for entry in archive_data.get('archive', []) if entry.get('user_id') == str(user_id)])
             archive_data['archive'] = [entry for entry in archive_data.get('archive', []) if entry.get('user_id') != str(user_id)]
-            await self.archive_storage.async_save(archive_data)
+            await self.archive_storage.async_save(archive_data, changed=[user_id])
 
             # Очищаем активные напоминания пользователя
             users_data = await self.users_storage.async_load() or {}
+            locale = self._locale(user_id, users_data.get(str(user_id)))
             reminders_count = 0
             if str(user_id) in users_data:
                 reminders_count = len(users_data[str(user_id)].get('reminders', {}))
                 del users_data[str(user_id)]
-                await self.users_storage.async_save(users_data)
+                await self.users_storage.async_save(users_data, changed=[user_id])
 
             # Убираем активные напоминания из памяти
             reminders_to_remove = [rid for rid in self.active_reminders.keys() if rid.startswith(f"{user_id}_")]
             for reminder_key in reminders_to_remove:
                 del self.active_reminders[reminder_key]
 
+            self.adherence.remove(user_id)
+            self.renders.invalidate(user_id)
+            self._unschedule(user_id)
+
             # Принудительная очистка устройств в HA
             await self.cleanup_ha_devices(user_id=str(user_id))
 
-            # Обновляем сенсоры
-            await self.update_sensors()
-
-            text = "✅ Все данные очищены!\n\n"
-            text += f"🗑️ Удалено:\n"
-            text += f"📊 Активная история: {user_history_count} записей\n"
-            text += f"🗄️ Архив: {user_archive_count} курсов\n"
-            text += f"⚙️ Активные напоминания: {reminders_count}\n"
-            text += f"🏠 Все устройства и сенсоры в Home Assistant\n\n"
-            text += "💡 Используйте /setup для создания новых напоминаний"
-            await self.edit_message_text(chat_id, message_id, text)
+            await self.edit_message_text(chat_id, message_id, self.messages.render(
+                locale, "cleanup_done",
+                history=user_history_count, archive=user_archive_count, reminders=reminders_count,
+            ))
 
         except Exception as err:
             _LOGGER.error(f"Error in cleanup_all_data: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при очистке данных")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "cleanup_failed"))
 
     async def show_selective_cleanup(self, chat_id, user_id, message_id, cleanup_user_id):
         """Показывает меню выборочной очистки"""
         try:
             if str(user_id) != str(cleanup_user_id):
-                await self.edit_message_text(chat_id, message_id, "❌ Ошибка: неверный пользователь")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "wrong_user"))
                 return
 
             # Получаем список всех витаминок пользователя из архива и активных напоминаний
@@ -777,6 +1080,10 @@ class PillsReminderBot:
             users_data = await self.users_storage.async_load() or {}
             user_archive = [entry for entry in archive_data.get('archive', []) if entry.get('user_id') == str(user_id)]
             user_data = users_data.get(str(user_id), {})
+            locale = self._locale(user_id, user_data)
+            render = self.messages.render
+            plain = self.messages.plain
+            unknown_pill = plain(locale, "unknown_pill")
 
             # Собираем уникальные витаминки
             pills_info = {}
@@ -784,45 +1091,41 @@ class PillsReminderBot:
             # Из архива
             for entry in user_archive:
                 reminder_data = entry.get('reminder_data', {})
-                pill_name = reminder_data.get('pill_name', 'Неизвестно')
+                pill_name = reminder_data.get('pill_name', unknown_pill)
                 if pill_name not in pills_info:
                     pills_info[pill_name] = {'archive_count': 0, 'active': False}
                 pills_info[pill_name]['archive_count'] += 1
 
             # Из активных напоминаний
             for reminder in user_data.get('reminders', {}).values():
-                pill_name = reminder.get('pill_name', 'Неизвестно')
+                pill_name = reminder.get('pill_name', unknown_pill)
                 if pill_name not in pills_info:
                     pills_info[pill_name] = {'archive_count': 0, 'active': False}
                 pills_info[pill_name]['active'] = True
 
             if not pills_info:
-                await self.edit_message_text(chat_id, message_id, "❌ Нет данных для очистки")
+                await self.edit_message_text(chat_id, message_id, render(locale, "cleanup_nothing"))
                 return
 
-            text = "📋 Выборочная очистка\n\n"
-            text += "Выберите витаминку для очистки:\n\n"
+            text = render(locale, "selective_title")
 
             keyboard_buttons = []
             for pill_name, info in pills_info.items():
-                status_text = ""
+                status_parts = []
                 if info['active']:
-                    status_text += "🟢 активна"
+                    status_parts.append(render(locale, "selective_active"))
                 if info['archive_count'] > 0:
-                    if status_text:
-                        status_text += f", 🗄️ архив: {info['archive_count']}"
-                    else:
-                        status_text += f"🗄️ архив: {info['archive_count']}"
+                    status_parts.append(render(locale, "selective_archived", count=info['archive_count']))
 
-                text += f"💊 {pill_name} ({status_text})\n"
+                text += render(locale, "selective_item", pill_name=pill_name, status=Markup(", ".join(status_parts)))
                 keyboard_buttons.append([{
-                    "text": f"🗑️ Очистить {pill_name}",
+                    "text": plain(locale, "button_cleanup_pill", pill_name=pill_name),
                     "callback_data": f"cleanup_pill_{user_id}_{pill_name}"
                 }])
 
             keyboard_buttons.extend([
-                [{"text": "🧹 Очистить ВСЁ", "callback_data": f"cleanup_all_{user_id}"}],
-                [{"text": "❌ Отмена", "callback_data": "cleanup_cancel"}]
+                [{"text": plain(locale, "button_cleanup_all"), "callback_data": f"cleanup_all_{user_id}"}],
+                [{"text": plain(locale, "button_cleanup_cancel"), "callback_data": "cleanup_cancel"}]
             ])
 
             keyboard = {"inline_keyboard": keyboard_buttons}
@@ -831,13 +1134,13 @@ class PillsReminderBot:
 
         except Exception as err:
             _LOGGER.error(f"Error in show_selective_cleanup: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при отображении меню")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "selective_failed"))
 
     async def cleanup_pill_data(self, chat_id, user_id, message_id, cleanup_user_id, pill_name):
         """Подтверждение очистки данных конкретной витаминки"""
         try:
             if str(user_id) != str(cleanup_user_id):
-                await self.edit_message_text(chat_id, message_id, "❌ Ошибка: неверный пользователь")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "wrong_user"))
                 return
 
             # Подсчитываем, что будет удалено
@@ -853,29 +1156,33 @@ class PillsReminderBot:
 
             active_reminders = []
             user_data = users_data.get(str(user_id), {})
+            locale = self._locale(user_id, user_data)
+            render = self.messages.render
+            plain = self.messages.plain
             for reminder_id, reminder in user_data.get('reminders', {}).items():
                 if reminder.get('pill_name') == pill_name:
                     active_reminders.append((reminder_id, reminder))
 
             if not user_history and not user_archive and not active_reminders:
-                await self.edit_message_text(chat_id, message_id, f"❌ Нет данных для витаминки '{pill_name}'")
+                await self.edit_message_text(
+                    chat_id, message_id, render(locale, "pill_cleanup_nothing", pill_name=pill_name)
+                )
                 return
 
-            text = f"🗑️ Очистка данных: {pill_name}\n\n"
-            text += "⚠️ Будет удалено:\n"
+            text = render(locale, "pill_cleanup_title", pill_name=pill_name)
             if len(user_history) > 0:
-                text += f"📊 Активная история: {len(user_history)} записей\n"
+                text += render(locale, "cleanup_history", count=len(user_history))
             if len(user_archive) > 0:
-                text += f"🗄️ Архив: {len(user_archive)} курсов\n"
+                text += render(locale, "cleanup_archive", count=len(user_archive))
             if len(active_reminders) > 0:
-                text += f"⚙️ Активные напоминания: {len(active_reminders)}\n"
-            text += f"🏠 Сенсоры для этой витаминки в Home Assistant\n\n"
-            text += "❗ Это действие необратимо!"
+                text += render(locale, "cleanup_reminders", count=len(active_reminders))
+            text += render(locale, "pill_cleanup_devices")
 
             keyboard = {
                 "inline_keyboard": [
-                    [{"text": f"🗑️ Да, удалить {pill_name}", "callback_data": f"confirm_cleanup_pill_{user_id}_{pill_name}"}],
-                    [{"text": "❌ Отмена", "callback_data": "cleanup_cancel"}]
+                    [{"text": plain(locale, "button_confirm_cleanup_pill", pill_name=pill_name),
+                      "callback_data": f"confirm_cleanup_pill_{user_id}_{pill_name}"}],
+                    [{"text": plain(locale, "button_cleanup_cancel"), "callback_data": "cleanup_cancel"}]
                 ]
             }
             await self.edit_message_text(chat_id, message_id, text)
@@ -883,13 +1190,15 @@ class PillsReminderBot:
 
         except Exception as err:
             _LOGGER.error(f"Error in cleanup_pill_data: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при подготовке очистки")
+            await self.edit_message_text(
+                chat_id, message_id, await self._user_text(user_id, "pill_cleanup_prepare_failed")
+            )
 
     async def confirm_cleanup_pill_data(self, chat_id, user_id, message_id, cleanup_user_id, pill_name):
         """Выполняет очистку данных конкретной витаминки"""
         try:
             if str(user_id) != str(cleanup_user_id):
-                await self.edit_message_text(chat_id, message_id, "❌ Ошибка: неверный пользователь")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "wrong_user"))
                 return
 
             deleted_counts = {'history': 0, 'archive': 0, 'active': 0}
@@ -900,7 +1209,7 @@ class PillsReminderBot:
             history_data['history'] = [entry for entry in history_data.get('history', [])
                                      if not (entry.get('user_id') == str(user_id) and entry.get('pill_name') == pill_name)]
             deleted_counts['history'] = original_count - len(history_data.get('history', []))
-            await self.storage.async_save(history_data)
+            await self.storage.async_save(history_data, changed=[user_id])
 
             # Очищаем архив
             archive_data = await self.archive_storage.async_load() or {'archive': []}
@@ -909,11 +1218,12 @@ class PillsReminderBot:
                                      if not (entry.get('user_id') == str(user_id) and
                                            entry.get('reminder_data', {}).get('pill_name') == pill_name)]
             deleted_counts['archive'] = original_archive_count - len(archive_data.get('archive', []))
-            await self.archive_storage.async_save(archive_data)
+            await self.archive_storage.async_save(archive_data, changed=[user_id])
 
             # Очищаем активные напоминания
             users_data = await self.users_storage.async_load() or {}
             user_data = users_data.get(str(user_id), {})
+            locale = self._locale(user_id, user_data)
             reminders_to_delete = []
             
             for reminder_id, reminder in user_data.get('reminders', {}).items():
@@ -930,29 +1240,29 @@ class PillsReminderBot:
 
             if str(user_id) in users_data:
                 users_data[str(user_id)] = user_data
-                await self.users_storage.async_save(users_data)
+                await self.users_storage.async_save(users_data, changed=[user_id])
+
+            self.adherence.remove(user_id, pill_name)
+            for reminder_id in reminders_to_delete:
+                self._unschedule(user_id, reminder_id)
 
             # Принудительная очистка устройства витаминки в HA
             await self.cleanup_ha_devices(user_id=str(user_id), pill_name=pill_name)
 
-            # Обновляем сенсоры
-            await self.update_sensors()
-
-            text = f"✅ Данные для '{pill_name}' очищены!\n\n"
-            text += f"🗑️ Удалено:\n"
+            render = self.messages.render
+            text = render(locale, "pill_cleanup_done", pill_name=pill_name)
             if deleted_counts['history'] > 0:
-                text += f"📊 История: {deleted_counts['history']} записей\n"
+                text += render(locale, "pill_cleanup_history", count=deleted_counts['history'])
             if deleted_counts['archive'] > 0:
-                text += f"🗄️ Архив: {deleted_counts['archive']} курсов\n"
+                text += render(locale, "cleanup_archive", count=deleted_counts['archive'])
             if deleted_counts['active'] > 0:
-                text += f"⚙️ Активные напоминания: {deleted_counts['active']}\n"
-            text += f"🏠 Устройства и сенсоры в Home Assistant\n\n"
-            text += "💡 Устройства удалены автоматически"
+                text += render(locale, "cleanup_reminders", count=deleted_counts['active'])
+            text += render(locale, "pill_cleanup_devices_done")
             await self.edit_message_text(chat_id, message_id, text)
 
         except Exception as err:
             _LOGGER.error(f"Error in confirm_cleanup_pill_data: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при очистке данных")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "cleanup_failed"))
 
     async def cleanup_ha_devices(self, user_id=None, pill_name=None):
         """Принудительная очистка устройств в Home Assistant"""
@@ -960,48 +1270,27 @@ class PillsReminderBot:
             # Получаем доступ к реестрам
             device_registry = dr.async_get(self.hass)
             
-            # Находим интеграцию
-            domain_data = self.hass.data.get(DOMAIN, {})
-            coordinator = None
-            config_entry = None
-            for entry_id, entry_data in domain_data.items():
-                if isinstance(entry_data, dict) and 'coordinator' in entry_data:
-                    coordinator = entry_data['coordinator']
-                    config_entry = coordinator.config_entry
-                    break
-                    
-            if not coordinator:
+            # Координаторы записей, которые обслуживает этот бот
+            coordinators = list(self._coordinators())
+            if not coordinators:
                 _LOGGER.warning("Coordinator not found for device cleanup")
                 return
             
-            if user_id and pill_name:
-                # Очистка устройства конкретной витаминки
-                await coordinator._cleanup_pill_device(user_id, pill_name)
-            elif user_id:
-                # Очистка всех устройств пользователя
-                await coordinator._cleanup_deleted_users([user_id])
-            else:
-                # Полная очистка всех неиспользуемых устройств
-                users_data = await self.users_storage.async_load() or {}
-                all_devices = device_registry.devices
-                
-                for device in all_devices.values():
-                    if device.config_entries and config_entry.entry_id in device.config_entries:
-                        # Проверяем, должно ли устройство существовать
-                        device_should_exist = False
-                        for identifier_set in device.identifiers:
-                            for domain_check, device_id in identifier_set:
-                                if domain_check == DOMAIN:
-                                    if "_user_" in device_id:
-                                        # Проверяем устройства пользователей
-                                        if "_user_" in device_id and not device_id.endswith("_"):
-                                            user_id_from_device = device_id.split("_user_")[1].split("_")[0]
-                                            if user_id_from_device in users_data:
-                                                device_should_exist = True
-                                                break
-                        if not device_should_exist:
-                            device_registry.async_remove_device(device.id)
-                            _LOGGER.info(f"Removed orphaned device: {device.name}")
+            for coordinator in coordinators:
+                if user_id and pill_name:
+                    # Очистка устройства конкретной витаминки
+                    await coordinator._cleanup_pill_device(user_id, pill_name)
+                elif user_id:
+                    # Очистка всех устройств пользователя
+                    await coordinator._cleanup_deleted_users([user_id])
+                else:
+                    # Полная очистка: устройства пользователей, которых больше нет в данных
+                    users_data = await self.users_storage.async_load() or {}
+                    orphaned_users = coordinator.registry_index.users() - set(users_data)
+                    for orphaned_user in orphaned_users:
+                        for device_id in coordinator.registry_index.user_device_ids(orphaned_user):
+                            device_registry.async_remove_device(device_id)
+                            _LOGGER.info(f"Removed orphaned device {device_id} of user {orphaned_user}")
             
             _LOGGER.info("Device cleanup completed")
         except Exception as err:
@@ -1021,18 +1310,19 @@ class PillsReminderBot:
                     break
 
             if not archive_entry:
-                await self.edit_message_text(chat_id, message_id, "❌ Архивная запись не найдена или это не родительский курс")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "repeat_not_found"))
                 return
 
             # Создаем новое напоминание на основе архивного
             users_data = await self.users_storage.async_load() or {}
             user_data = users_data.get(str(user_id), {})
+            locale = self._locale(user_id, user_data)
             
             if "reminders" not in user_data:
                 user_data["reminders"] = {}
 
             reminder_data = archive_entry.get('reminder_data', {})
-            pill_name = reminder_data.get('pill_name', 'Витаминка')
+            pill_name = reminder_data.get('pill_name') or self.messages.plain(locale, "default_pill")
 
             # Получаем следующий номер курса (только для родительских курсов)
             next_course_number = await self.get_next_course_number(user_id, pill_name)
@@ -1048,34 +1338,33 @@ class PillsReminderBot:
                 "times": reminder_data.get('times', [{"time": "09:00"}]),
                 "course_number": next_course_number,
                 "active": True,
-                "created": datetime.now().isoformat()
+                "created": datetime.now(timezone.utc).isoformat()
             }
+            previous_schedule = reminder_data.get('schedule') or {}
+            new_reminder["schedule"] = compile_schedule(
+                new_reminder,
+                weekdays=previous_schedule.get('weekdays', WEEKDAYS_ALL),
+                every_days=previous_schedule.get('every_days', 1),
+                interval_hours=previous_schedule.get('interval_hours'),
+            )
 
             user_data["reminders"][new_reminder_id] = new_reminder
             users_data[str(user_id)] = user_data
-            await self.users_storage.async_save(users_data)
-
-            times_display = [t["time"] for t in new_reminder.get("times", [])]
-            duration_text = f"{new_reminder.get('duration_days')} дней" if new_reminder.get('duration_days') else "бесконечно"
-
-            text = f"✅ Курс повторен!\n\n"
-            text += f"💊 Витаминка: {pill_name} (Курс #{next_course_number})\n"
-            if new_reminder.get('dosage'):
-                text += f"📏 Дозировка: {new_reminder['dosage']}\n"
-            if new_reminder.get('description'):
-                text += f"💡 Описание: {new_reminder['description']}\n"
-            text += f"📅 Длительность: {duration_text}\n"
-            text += f"⏰ Времена приема: {', '.join(times_display)}\n\n"
-            text += f"📢 Напоминания будут приходить в канал каждый день"
-            
+            await self.users_storage.async_save(users_data, changed=[user_id])
+            self._reschedule(user_id, new_reminder_id, new_reminder)
+
+            text = self.messages.render(
+                locale, "course_repeated",
+                pill_name=pill_name,
+                course=self.messages.render(locale, "course_suffix", course_number=next_course_number),
+                details=self._reminder_details(locale, new_reminder),
+                times=self._schedule_text(locale, new_reminder),
+            )
             await self.edit_message_text(chat_id, message_id, text)
 
-            # Обновляем сенсоры
-            await self.update_sensors()
-
         except Exception as err:
             _LOGGER.error(f"Error repeating course: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при повторе курса")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "repeat_failed"))
 
     async def show_description(self, chat_id, reminder_user_id, message_id, action_user_id, reminder_id):
         try:
@@ -1083,7 +1372,7 @@ class PillsReminderBot:
             user_data = users_data.get(str(reminder_user_id))
             
             if not user_data:
-                await self.edit_message_text(chat_id, message_id, "❌ Пользователь не найден")
+                await self.edit_message_text(chat_id, message_id, await self._user_text(action_user_id, "user_not_found"))
                 return
 
             # Находим информацию о витаминке
@@ -1093,43 +1382,55 @@ class PillsReminderBot:
             elif user_data.get("reminders"):
                 pill_info = next(iter(user_data["reminders"].values()))
 
+            # Формируем текст с описанием
+            locale = self.messages.locale_of(user_data)
+            render = self.messages.render
+            plain = self.messages.plain
             if not pill_info:
-                await self.edit_message_text(chat_id, message_id, "❌ Информация о витаминке не найдена")
+                await self.edit_message_text(chat_id, message_id, render(locale, "pill_info_not_found"))
                 return
 
-            # Формируем текст с описанием
-            text = f"📝 Описание витаминки\n\n"
-            text += f"💊 Название: {pill_info.get('pill_name', 'Неизвестно')}\n"
-            
+            details = []
             if pill_info.get('dosage'):
-                text += f"📏 Дозировка: {pill_info['dosage']}\n"
+                details.append(render(locale, "line_dosage", dosage=pill_info['dosage']))
             if pill_info.get('description'):
-                text += f"💡 Для чего: {pill_info['description']}\n"
+                details.append(render(locale, "description_purpose", description=pill_info['description']))
             else:
-                text += f"💡 Описание не указано\n"
-                
-            times_display = [t["time"] for t in pill_info.get("times", [])]
-            text += f"⏰ Времена приема: {', '.join(times_display) if times_display else 'не указано'}\n"
-            
-            if pill_info.get('course_number', 1) > 1:
-                text += f"📚 Курс: #{pill_info['course_number']}\n"
-                
+                details.append(render(locale, "description_missing"))
+
             duration_days = pill_info.get("duration_days")
             if duration_days:
-                start_date = datetime.fromisoformat(pill_info.get('created', datetime.now().isoformat()))
-                days_passed = (datetime.now() - start_date).days + 1
-                days_left = max(0, duration_days - days_passed + 1)
-                text += f"📅 Прогресс: {days_passed}/{duration_days} дн. (осталось {days_left} дн.)\n"
+                days_passed = course_day(
+                    pill_info, self._user_today(reminder_user_id),
+                    self.next_due.zone_of(reminder_user_id), self.next_due.default_zone,
+                )
+                progress = render(
+                    locale, "line_progress",
+                    day=days_passed, duration_days=duration_days, days_left=max(0, duration_days - days_passed + 1),
+                )
             else:
-                text += f"📅 Длительность: бесконечно\n"
+                progress = render(locale, "line_duration", duration=render(locale, "duration_infinite"))
+
+            times_display = [t["time"] for t in pill_info.get("times", [])]
+            course_number = pill_info.get('course_number', 1)
+            text = render(
+                locale, "description",
+                pill_name=pill_info.get('pill_name', ''),
+                details=Markup("".join(details)),
+                times=", ".join(times_display) if times_display else render(locale, "not_specified"),
+                course=render(locale, "description_course", course_number=course_number) if course_number > 1 else "",
+                progress=progress,
+            )
 
             # Добавляем кнопки действий для всех времен приема
             keyboard_buttons = []
             for i, time_slot in enumerate(pill_info.get("times", [])):
                 time_str = time_slot.get("time", "??:??")
                 keyboard_buttons.extend([
-                    [{"text": f"✅ Выпил в {time_str}", "callback_data": f"taken_{reminder_user_id}_{reminder_id}_{i}"}],
-                    [{"text": f"❌ Пропустить {time_str}", "callback_data": f"skip_{reminder_user_id}_{reminder_id}_{i}"}]
+                    [{"text": plain(locale, "button_taken_at", time=time_str),
+                      "callback_data": f"taken_{reminder_user_id}_{reminder_id}_{i}"}],
+                    [{"text": plain(locale, "button_skip_at", time=time_str),
+                      "callback_data": f"skip_{reminder_user_id}_{reminder_id}_{i}"}]
                 ])
 
             keyboard = {"inline_keyboard": keyboard_buttons}
@@ -1138,55 +1439,51 @@ class PillsReminderBot:
 
         except Exception as err:
             _LOGGER.error(f"Error showing description: {err}")
-            await self.edit_message_text(chat_id, message_id, "❌ Ошибка при получении описания")
+            await self.edit_message_text(chat_id, message_id, await self._user_text(action_user_id, "description_failed"))
 
     async def start_new_reminder(self, chat_id, user_id, message_id):
-        users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(str(user_id), {})
-        
         reminder_id = str(int(datetime.now().timestamp()))
-        user_data["setup_step"] = "pill_name"
-        user_data["current_reminder_id"] = reminder_id
-        users_data[str(user_id)] = user_data
-        await self.users_storage.async_save(users_data)
-
-        text = "🆕 Создание нового напоминания\n\n"
-        text += "Введите название витаминки:"
-        await self.edit_message_text(chat_id, message_id, text)
+        users_data = await self.users_storage.async_load() or {}
+        session = self.wizard.start(
+            user_id, "pill_name", reminder_id, chat_id=chat_id,
+            locale=self._locale(user_id, users_data.get(str(user_id))),
+        )
+        await self.edit_message_text(chat_id, message_id, self.messages.render(
+            session["locale"], "setup_title", prompt=self.wizard.prompt(session)
+        ))
 
     async def start_edit_reminder(self, chat_id, user_id, message_id, reminder_id):
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or reminder_id not in user_data.get("reminders", {}):
-            await self.edit_message_text(chat_id, message_id, "❌ Напоминание не найдено")
+            await self.edit_message_text(chat_id, message_id, self.messages.render(locale, "reminder_not_found"))
             return
 
         reminder = user_data["reminders"][reminder_id]
-        user_data["setup_step"] = "edit_times"
-        user_data["editing_reminder_id"] = reminder_id
-        await self.users_storage.async_save(users_data)
+        self.wizard.start(user_id, "edit_times", reminder_id, chat_id=chat_id, locale=locale)
 
-        times_display = [t["time"] for t in reminder.get("times", [])]
-        
-        text = f"⏰ Изменение времен приема\n\n"
-        text += f"Витаминка: {reminder.get('pill_name', 'не указано')}\n"
-        text += f"Текущие времена: {', '.join(times_display) if times_display else 'не указано'}\n\n"
-        text += "Введите новые времена через запятую (ЧЧ:ММ,ЧЧ:ММ):"
-        await self.edit_message_text(chat_id, message_id, text)
+        await self.edit_message_text(chat_id, message_id, self.messages.render(
+            locale, "edit_times",
+            pill_name=reminder.get('pill_name') or self.messages.render(locale, "not_specified"),
+            schedule=self._schedule_text(locale, reminder),
+        ))
 
     async def toggle_reminder(self, chat_id, user_id, message_id, reminder_id):
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or reminder_id not in user_data.get("reminders", {}):
-            await self.edit_message_text(chat_id, message_id, "❌ Напоминание не найдено")
+            await self.edit_message_text(chat_id, message_id, self.messages.render(locale, "reminder_not_found"))
             return
 
         reminder = user_data["reminders"][reminder_id]
         is_active = reminder.get("active", True)
         reminder["active"] = not is_active
-        await self.users_storage.async_save(users_data)
+        await self.users_storage.async_save(users_data, changed=[user_id])
+        self._reschedule(user_id, reminder_id, reminder)
 
         # Убираем из активных если отключили
         if is_active:
@@ -1194,8 +1491,9 @@ class PillsReminderBot:
             if reminder_key in self.active_reminders:
                 del self.active_reminders[reminder_key]
 
-        action = "включено" if not is_active else "приостановлено"
-        text = f"✅ Напоминание '{reminder['pill_name']}' {action}"
+        text = self.messages.render(
+            locale, "reminder_paused" if is_active else "reminder_resumed", pill_name=reminder['pill_name']
+        )
         await self.edit_message_text(chat_id, message_id, text)
 
         # Возвращаемся к меню управления через 2 секунды
@@ -1206,8 +1504,9 @@ class PillsReminderBot:
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or reminder_id not in user_data.get("reminders", {}):
-            await self.edit_message_text(chat_id, message_id, "❌ Напоминание не найдено")
+            await self.edit_message_text(chat_id, message_id, self.messages.render(locale, "reminder_not_found"))
             return
 
         reminder = user_data["reminders"][reminder_id]
@@ -1224,25 +1523,21 @@ class PillsReminderBot:
         taken_count = sum(1 for entry in course_history if entry['status'] == 'taken')
         skipped_count = sum(1 for entry in course_history if entry['status'] == 'skipped')
 
-        text = f"🗄️ Завершение курса\n\n"
-        text += f"Вы действительно хотите завершить курс?\n\n"
-        text += f"💊 {reminder.get('pill_name', 'Без названия')}"
-        if reminder.get('dosage'):
-            text += f" ({reminder['dosage']})"
-        if reminder.get('course_number', 1) > 1:
-            text += f" [Курс #{reminder['course_number']}]"
-        
         times_display = [t["time"] for t in reminder.get("times", [])]
-        text += f"\n⏰ Времена: {', '.join(times_display) if times_display else 'не указано'}\n\n"
-        text += f"📊 Статистика:\n"
-        text += f"✅ Принято: {taken_count}\n"
-        text += f"❌ Пропущено: {skipped_count}\n\n"
-        text += "📝 Курс будет перенесен в архив с сохранением всей истории"
+        text = self.messages.render(
+            locale, "confirm_archive",
+            pill=self.messages.pill_of(locale, reminder),
+            times=", ".join(times_display) if times_display else self.messages.render(locale, "not_specified"),
+            taken=taken_count,
+            skipped=skipped_count,
+        )
 
         keyboard = {
             "inline_keyboard": [
-                [{"text": "✅ Да, завершить курс", "callback_data": f"confirm_archive_{reminder_id}"}],
-                [{"text": "❌ Отмена", "callback_data": f"cancel_archive_{reminder_id}"}]
+                [{"text": self.messages.plain(locale, "button_confirm_archive"),
+                  "callback_data": f"confirm_archive_{reminder_id}"}],
+                [{"text": self.messages.plain(locale, "button_cleanup_cancel"),
+                  "callback_data": f"cancel_archive_{reminder_id}"}]
             ]
         }
         await self.edit_message_text(chat_id, message_id, text)
@@ -1252,43 +1547,75 @@ class PillsReminderBot:
         users_data = await self.users_storage.async_load() or {}
         user_data = users_data.get(str(user_id))
         
+        locale = self._locale(user_id, user_data)
         if not user_data or reminder_id not in user_data.get("reminders", {}):
-            await self.edit_message_text(chat_id, message_id, "❌ Напоминание не найдено")
+            await self.edit_message_text(chat_id, message_id, self.messages.render(locale, "reminder_not_found"))
             return
 
-        reminder = user_data["reminders"][reminder_id]
-        pill_name = reminder.get('pill_name', 'Витаминка')
-        course_number = reminder.get('course_number', 1)
+        archive_entry = await self._archive_course(user_id, reminder_id, users_data)
+        text = self.messages.render(
+            locale, "course_archived", summary=self._archive_summary(locale, archive_entry)
+        )
+        await self.edit_message_text(chat_id, message_id, text)
 
-        # Получаем историю только для этого конкретного курса
-        history_data = await self.storage.async_load() or {'history': []}
-        course_history = [
-            entry for entry in history_data.get('history', [])
-            if (entry.get('user_id') == str(user_id) and
-                entry.get('pill_name') == pill_name and
-                entry.get('reminder_id') == reminder_id)
-        ]
+        # Возвращаемся к меню управления через 3 секунды, если есть другие напоминания
+        await asyncio.sleep(3)
+        if user_data.get("reminders"):
+            await self.handle_manage_command(chat_id, user_id)
+        else:
+            await self.send_message(chat_id, self.messages.render(locale, "no_more_reminders"))
 
-        # Подготавливаем архивную запись
-        archive_data = await self.archive_storage.async_load() or {'archive': []}
+    async def complete_course(self, user_id, reminder_id):
+        """Автоматически завершает курс, у которого истекла длительность"""
+        try:
+            users_data = await self.users_storage.async_load() or {}
+            user_data = users_data.get(str(user_id))
+            if not user_data or reminder_id not in user_data.get("reminders", {}):
+                return
+
+            archive_entry = await self._archive_course(user_id, reminder_id, users_data)
+            _LOGGER.info(f"Course {reminder_id} of user {user_id} finished and archived")
+
+            if user_data.get('chat_id'):
+                locale = self.messages.locale_of(user_data)
+                text = self.messages.render(
+                    locale, "course_completed", summary=self._archive_summary(locale, archive_entry)
+                )
+                await self.send_message(user_data['chat_id'], text)
+        except Exception as err:
+            _LOGGER.error(f"Error completing course {reminder_id} of user {user_id}: {err}")
+
+    async def _archive_course(self, user_id, reminder_id, users_data):
+        """Переносит напоминание с историей курса в архив и возвращает архивную запись"""
+        reminder = users_data[str(user_id)]["reminders"][reminder_id]
+
+        # Один проход по истории: история курса и всё остальное
+        history_data = await self.storage.async_load() or {'history': []}
+        course_history, remaining_history = self._partition_course_history(
+            history_data.get('history', []), user_id, reminder.get('pill_name'), reminder_id
+        )
 
         # Вычисляем даты начала и окончания
         start_date = None
         end_date = datetime.now().isoformat()
+        # Даты архива, как и история, - наивное время зоны HA
+        zone = self.next_due.default_zone
+        created = created_at(reminder, zone)
         if course_history:
-            start_date = min(course_history, key=lambda x: x['date'])['date']
-        elif reminder.get('created'):
-            start_date = reminder['created']
+            start_date = min(entry['date'] for entry in course_history)
+        elif created:
+            start_date = created.astimezone(zone).replace(tzinfo=None).isoformat()
         else:
             start_date = end_date
 
         taken_count = sum(1 for entry in course_history if entry['status'] == 'taken')
-        skipped_count = sum(1 for entry in course_history if entry['status'] == 'skipped')
+        skipped_count = len(course_history) - taken_count
 
         archive_entry = {
             'user_id': str(user_id),
+            'reminder_id': reminder_id,
             'reminder_data': reminder.copy(),
-            'history': course_history.copy(),
+            'history': course_history,
             'start_date': start_date,
             'end_date': end_date,
             'total_taken': taken_count,
@@ -1296,104 +1623,169 @@ class PillsReminderBot:
             'archived_at': datetime.now().isoformat()
         }
 
-        archive_data['archive'].append(archive_entry)
-        await self.archive_storage.async_save(archive_data)
-
-        # Удаляем напоминание из активных
-        del user_data["reminders"][reminder_id]
-        await self.users_storage.async_save(users_data)
+        await self._commit_archive(archive_entry, users_data, history_data, remaining_history)
 
         # Убираем из активных напоминаний
-        reminder_key = f"{user_id}_{reminder_id}"
-        if reminder_key in self.active_reminders:
+        reminders_to_remove = [rid for rid in self.active_reminders.keys() if rid.startswith(f"{user_id}_{reminder_id}_")]
+        for reminder_key in reminders_to_remove:
             del self.active_reminders[reminder_key]
 
-        # Удаляем историю этого курса из основного хранилища
-        updated_history = [
-            entry for entry in history_data.get('history', [])
-            if not (entry.get('user_id') == str(user_id) and
-                   entry.get('pill_name') == pill_name and
-                   entry.get('reminder_id') == reminder_id)
-        ]
-        history_data['history'] = updated_history
-        await self.storage.async_save(history_data)
-
-        text = f"✅ Курс завершен и перенесен в архив\n\n"
-        text += f"💊 {pill_name}"
-        if course_number > 1:
-            text += f" (Курс #{course_number})"
-        text += "\n\n"
-        text += f"📊 Итоговая статистика:\n"
-        text += f"✅ Принято: {taken_count}\n"
-        text += f"❌ Пропущено: {skipped_count}\n\n"
-        text += f"📅 Период: {datetime.fromisoformat(start_date).strftime('%d.%m.%Y')} - {datetime.fromisoformat(end_date).strftime('%d.%m.%Y')}\n\n"
-        text += "🗄️ Используйте /archive для просмотра архива и повтора курсов"
-        
-        await self.edit_message_text(chat_id, message_id, text)
-
-        # Обновляем сенсоры
-        await self.update_sensors()
+        return archive_entry
+
+    def _archive_summary(self, locale, archive_entry):
+        reminder = archive_entry['reminder_data']
+        return self.messages.render(
+            locale, "archive_summary",
+            pill_name=reminder.get('pill_name') or self.messages.render(locale, "default_pill"),
+            course=self._course_suffix(locale, reminder),
+            taken=archive_entry['total_taken'],
+            skipped=archive_entry['total_skipped'],
+            start=datetime.fromisoformat(archive_entry['start_date']).strftime('%d.%m.%Y'),
+            end=datetime.fromisoformat(archive_entry['end_date']).strftime('%d.%m.%Y'),
+        )
+
+    @staticmethod
+    def _partition_course_history(history, user_id, pill_name, reminder_id):
+        """Делит историю за один проход на записи курса и остальные записи"""
+        course_history = []
+        remaining_history = []
+        user_id = str(user_id)
+        for entry in history:
+            if (entry.get('user_id') == user_id and
+                entry.get('pill_name') == pill_name and
+                entry.get('reminder_id') == reminder_id):
+                course_history.append(entry)
+            else:
+                remaining_history.append(entry)
+        return course_history, remaining_history
+
+    async def _commit_archive(self, archive_entry, users_data=None, history_data=None, remaining_history=None):
+        """Переносит курс в архив через журнал.
+
+        Сначала в журнал записывается архивная запись, затем по очереди
+        обновляются архив, напоминания и история, после чего журнал очищается.
+        Если процесс прервется посередине, recover_archive_journal повторит
+        операцию при следующем запуске - все шаги идемпотентны.
+        """
+        await self.journal_storage.async_save({'pending_archive': archive_entry})
+        await self._apply_archive(archive_entry, users_data, history_data, remaining_history)
+        await self.journal_storage.async_save({})
+
+    async def _apply_archive(self, archive_entry, users_data=None, history_data=None, remaining_history=None):
+        user_id = archive_entry['user_id']
+        reminder_id = archive_entry['reminder_id']
+        pill_name = archive_entry.get('reminder_data', {}).get('pill_name')
+
+        # Шаг 1: архив (без дубликатов при повторном применении)
+        archive_data = await self.archive_storage.async_load() or {'archive': []}
+        archive_data.setdefault('archive', [])
+        already_archived = any(
+            entry.get('user_id') == user_id and entry.get('archived_at') == archive_entry['archived_at']
+            for entry in reversed(archive_data['archive'])
+        )
+        if not already_archived:
+            archive_data['archive'].append(archive_entry)
+            await self.archive_storage.async_save(archive_data, changed=[user_id])
+
+        # Шаг 2: удаляем напоминание из активных
+        if users_data is None:
+            users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.get(user_id)
+        if user_data and reminder_id in user_data.get("reminders", {}):
+            del user_data["reminders"][reminder_id]
+            await self.users_storage.async_save(users_data, changed=[user_id])
+        self._unschedule(user_id, reminder_id)
 
-        # Возвращаемся к меню управления через 3 секунды, если есть другие напоминания
-        await asyncio.sleep(3)
-        if user_data.get("reminders"):
-            await self.handle_manage_command(chat_id, user_id)
-        else:
-            await self.send_message(chat_id, "У вас больше нет активных напоминаний.\nИспользуйте /setup для создания нового.")
+        # Шаг 3: удаляем историю курса из основного хранилища
+        if history_data is None:
+            history_data = await self.storage.async_load() or {'history': []}
+        if remaining_history is None:
+            _, remaining_history = self._partition_course_history(
+                history_data.get('history', []), user_id, pill_name, reminder_id
+            )
+        if len(remaining_history) != len(history_data.get('history', [])):
+            history_data['history'] = remaining_history
+            await self.storage.async_save(history_data, changed=[user_id])
+
+    async def recover_archive_journal(self):
+        """Завершает архивацию, прерванную перезапуском"""
+        try:
+            journal = await self.journal_storage.async_load() or {}
+            pending = journal.get('pending_archive')
+            if not pending:
+                return
+            _LOGGER.warning(f"Recovering interrupted archive of reminder {pending.get('reminder_id')} for user {pending.get('user_id')}")
+            await self._apply_archive(pending)
+            await self.journal_storage.async_save({})
+        except Exception as err:
+            _LOGGER.error(f"Error recovering archive journal: {err}")
 
     async def save_reminder(self, chat_id, user_id, message_id, reminder_id):
-        users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(str(user_id))
+        session = self.wizard.get(user_id)
+        if session is None or session["reminder_id"] != reminder_id or session["step"] != STEP_CONFIRM:
+            await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "setup_expired"))
+            return
+        self.wizard.finish(user_id)
         
-        if user_data and reminder_id in user_data.get("reminders", {}):
-            user_data["reminders"][reminder_id]["active"] = True
-            user_data.pop("setup_step", None)
-            user_data.pop("current_reminder_id", None)
-            await self.users_storage.async_save(users_data)
-
-            reminder = user_data["reminders"][reminder_id]
-            times_display = [t["time"] for t in reminder.get("times", [])]
-            duration_text = f"{reminder.get('duration_days')} дней" if reminder.get('duration_days') else "бесконечно"
-
-            text = "✅ Напоминание создано!\n\n"
-            text += f"💊 Витаминка: {reminder['pill_name']}"
-            if reminder.get('course_number', 1) > 1:
-                text += f" (Курс #{reminder['course_number']})"
-            text += "\n"
-            
-            if reminder.get('dosage'):
-                text += f"📏 Дозировка: {reminder['dosage']}\n"
-            if reminder.get('description'):
-                text += f"💡 Описание: {reminder['description']}\n"
-                
-            text += f"📅 Длительность: {duration_text}\n"
-            text += f"⏰ Времена приема: {', '.join(times_display)}\n\n"
-            text += f"📢 Напоминания будут приходить в канал каждый день в указанные времена"
-            
-            await self.edit_message_text(chat_id, message_id, text)
+        profile = session.get("profile") or {"chat_id": session.get("chat_id")}
+        reminder = await self._commit_reminder(user_id, reminder_id, session["draft"], profile)
+        users_data = await self.users_storage.async_load() or {}
+        text = self._reminder_created_text(user_id, reminder, users_data.get(str(user_id)))
+        await self.edit_message_text(chat_id, message_id, text)
 
-            # Обновляем сенсоры
-            await self.update_sensors()
+    async def _commit_reminder(self, user_id, reminder_id, draft, profile=None, schedule_options=None):
+        """Записывает собранное напоминание одним сохранением хранилища"""
+        users_data = await self.users_storage.async_load() or {}
+        user_data = users_data.setdefault(str(user_id), {"reminders": {}})
+        if profile:
+            user_data.update(profile)
+        reminder = {
+            **draft,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "active": True,
+        }
+        reminder["schedule"] = compile_schedule(reminder, **(schedule_options or {}))
+        reminders = user_data.setdefault("reminders", {})
+        # id - время создания в секундах; несколько /add за секунду получают следующие
+        while reminder_id in reminders:
+            reminder_id = str(int(reminder_id) + 1)
+        reminders[reminder_id] = reminder
+        await self.users_storage.async_save(users_data, changed=[user_id])
+        self._reschedule(user_id, reminder_id, reminder)
+        return reminder
+
+    def _reminder_created_text(self, user_id, reminder, user_data=None):
+        locale = self._locale(user_id, user_data)
+        return self.messages.render(
+            locale, "reminder_created",
+            pill_name=reminder['pill_name'],
+            course=self._course_suffix(locale, reminder),
+            details=self._reminder_details(locale, reminder),
+            times=self._schedule_text(locale, reminder),
+            zone=str(self.next_due.zone_of(user_id)),
+        )
 
     async def cancel_reminder(self, chat_id, user_id, message_id, reminder_id):
-        users_data = await self.users_storage.async_load() or {}
-        user_data = users_data.get(str(user_id))
-        
-        if user_data:
-            # Удаляем незавершенное напоминание
-            if reminder_id in user_data.get("reminders", {}):
-                del user_data["reminders"][reminder_id]
-            user_data.pop("setup_step", None)
-            user_data.pop("current_reminder_id", None)
-            await self.users_storage.async_save(users_data)
-
-        text = "❌ Создание напоминания отменено\n\nИспользуйте /setup для создания нового напоминания"
-        await self.edit_message_text(chat_id, message_id, text)
+        # Незавершенное напоминание живет только в сессии - хранилище не трогаем
+        session = self.wizard.get(user_id)
+        if session is not None and session["reminder_id"] == reminder_id:
+            self.wizard.finish(user_id)
+
+        await self.edit_message_text(chat_id, message_id, await self._user_text(user_id, "setup_cancelled"))
 
     async def reminder_scheduler(self):
-        while True:
+        while not self.tasks.stopping:
             try:
-                await asyncio.sleep(60)  # Проверяем каждую минуту
+                # Спим до ближайшего срабатывания (не дольше минуты) или до изменения расписания
+                self._schedule_changed.clear()
+                delay = self.next_due.seconds_until_next(datetime.now(timezone.utc))
+                try:
+                    await asyncio.wait_for(self._schedule_changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                if self.tasks.stopping:
+                    break
+                self.wizard.collect_expired()
                 await self.check_and_send_reminders()
             except asyncio.CancelledError:
                 break
@@ -1401,69 +1793,69 @@ class PillsReminderBot:
                 _LOGGER.error("Error in reminder scheduler: %s", err)
 
     async def check_and_send_reminders(self):
+        now = datetime.now(timezone.utc)
+        due = []
+        for event, user_id, reminder_id, time_indexes, fire_at in self.next_due.pop_due(now):
+            if event == EVENT_COURSE_END:
+                await self.complete_course(user_id, reminder_id)
+                continue
+            if now - fire_at > REMINDER_GRACE:
+                _LOGGER.warning(f"Skipping reminder {reminder_id} of user {user_id} scheduled at {fire_at}: too late")
+                continue
+            due.append((user_id, reminder_id, time_indexes, fire_at))
+        if not due:
+            return
+
         users_data = await self.users_storage.async_load() or {}
-        current_time = datetime.now().strftime("%H:%M")
-        
-        for user_id, user_data in users_data.items():
-            if not user_data.get("reminders"):
+        for user_id, reminder_id, time_indexes, fire_at in due:
+            user_data = users_data.get(user_id)
+            reminder = user_data.get("reminders", {}).get(reminder_id) if user_data else None
+            if not reminder or not reminder.get("active", True):
                 continue
-                
-            for reminder_id, reminder in user_data["reminders"].items():
-                if not reminder.get("active", True):
+
+            for time_index in time_indexes:
+                if time_index >= len(reminder.get("times", [])):
                     continue
-                    
-                # Проверяем все времена приема для этого напоминания
-                for time_index, time_slot in enumerate(reminder.get("times", [])):
-                    if time_slot.get("time") == current_time:
-                        reminder_key = f"{user_id}_{reminder_id}_{time_index}"
-                        if reminder_key not in self.active_reminders:
-                            await self.send_user_reminder(user_id, user_data, reminder_id, reminder, time_index)
-
-    async def send_user_reminder(self, user_id, user_data, reminder_id, reminder, time_index):
+                reminder_key = f"{user_id}_{reminder_id}_{time_index}"
+                if reminder_key not in self.active_reminders:
+                    # Отправка не ждется: лимит чата задерживает только его напоминания
+                    self.tasks.spawn(
+                        self.send_user_reminder(user_id, user_data, reminder_id, reminder, time_index, fire_at), "send"
+                    )
+
+    async def send_user_reminder(self, user_id, user_data, reminder_id, reminder, time_index, scheduled_at=None):
         try:
             reminder_key = f"{user_id}_{reminder_id}_{time_index}"
             time_slot = reminder["times"][time_index]
             
+            now = datetime.now(timezone.utc)
+            scheduled_at = scheduled_at or now
+            self.metrics.scheduler_lag.add(max((now - scheduled_at).total_seconds(), 0))
             self.active_reminders[reminder_key] = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now.isoformat(),
                 'pill_name': reminder['pill_name'],
                 'user_id': user_id,
                 'reminder_id': reminder_id,
-                'time_index': time_index
+                'time_index': time_index,
+                'scheduled_at': scheduled_at.isoformat(),
+                'first_sent_at': None,
+                'nag_count': 0,
+                # Сообщения в канале с кнопками этого приема: повторы правят или
+                # поднимают их, а отметка приема закрывает все копии
+                'chat_id': self._reminder_chat(user_data),
+                'message_ids': [],
             }
 
-            # Формируем сообщение с прогрессом курса
-            username = user_data.get('username', user_data.get('first_name', 'Пользователь'))
-            pill_display = reminder['pill_name']
-            
-            if reminder.get('dosage'):
-                pill_display += f" ({reminder['dosage']})"
-            if reminder.get('course_number', 1) > 1:
-                pill_display += f" [Курс #{reminder['course_number']}]"
+            locale = self.messages.locale_of(user_data)
+            message = self._reminder_text(locale, user_id, user_data, reminder, time_slot)
+            keyboard = self._reminder_keyboard(locale, user_id, reminder_id, time_index)
 
-            # Вычисляем прогресс курса
-            duration_days = reminder.get("duration_days")
-            progress_text = ""
-            if duration_days:
-                start_date = datetime.fromisoformat(reminder.get('created', datetime.now().isoformat()))
-                days_passed = (datetime.now() - start_date).days + 1
-                days_left = max(0, duration_days - days_passed + 1)
-                progress_text = f"\n📅 День {days_passed}/{duration_days} (осталось {days_left} дн.)"
-
-            message = f"@{username} Время принять {pill_display}! 💊"
-            message += f"\n⏰ Прием в {time_slot['time']}"
-            message += progress_text
-
-            keyboard = {
-                "inline_keyboard": [
-                    [{"text": "✅ Выпил", "callback_data": f"taken_{user_id}_{reminder_id}_{time_index}"}],
-                    [{"text": "❌ Пропустить", "callback_data": f"skip_{user_id}_{reminder_id}_{time_index}"}],
-                    [{"text": "📝 Описание", "callback_data": f"description_{user_id}_{reminder_id}"}]
-                ]
-            }
-
-            await self.send_message(self.config[CONF_CHAT_ID], message, keyboard)
-            self.hass.async_create_task(self.repeat_user_reminder(user_id, user_data, reminder_id, reminder, time_index))
+            result = await self.queue_message(self._reminder_chat(user_data), message, keyboard)
+            dose_info = self.active_reminders.get(reminder_key)
+            if dose_info is not None:
+                dose_info['first_sent_at'] = datetime.now(timezone.utc).isoformat()
+                self._track_message(dose_info, result)
+            self.tasks.spawn(self.repeat_user_reminder(user_id, user_data, reminder_id, reminder, time_index), "nag")
 
         except Exception as err:
             _LOGGER.error("Error sending user reminder: %s", err)
@@ -1473,35 +1865,157 @@ class PillsReminderBot:
         
         while reminder_key in self.active_reminders:
             try:
-                await asyncio.sleep(1800)  # 30 минут
-                if reminder_key in self.active_reminders:
-                    time_slot = reminder["times"][time_index]
-                    username = user_data.get('username', user_data.get('first_name', 'Пользователь'))
-                    pill_display = reminder['pill_name']
-                    
-                    if reminder.get('dosage'):
-                        pill_display += f" ({reminder['dosage']})"
-                    if reminder.get('course_number', 1) > 1:
-                        pill_display += f" [Курс #{reminder['course_number']}]"
-
-                    message = f"⏰ @{username} Напоминание: не забудьте принять {pill_display}!"
-                    message += f"\n⏰ Прием в {time_slot['time']}"
-
-                    keyboard = {
-                        "inline_keyboard": [
-                            [{"text": "✅ Выпил", "callback_data": f"taken_{user_id}_{reminder_id}_{time_index}"}],
-                            [{"text": "❌ Пропустить", "callback_data": f"skip_{user_id}_{reminder_id}_{time_index}"}],
-                            [{"text": "📝 Описание", "callback_data": f"description_{user_id}_{reminder_id}"}]
-                        ]
-                    }
-                    
-                    await self.send_message(self.config[CONF_CHAT_ID], message, keyboard)
+                await asyncio.sleep(NAG_INTERVAL.total_seconds())
+                dose_info = self.active_reminders.get(reminder_key)
+                if dose_info is not None:
+                    await self._send_nag(dose_info, user_id, user_data, reminder_id, reminder, time_index)
                     
             except asyncio.CancelledError:
                 break
             except Exception as err:
                 _LOGGER.error("Error in repeat user reminder: %s", err)
 
+    def _reminder_text(self, locale, user_id, user_data, reminder, time_slot):
+        """Сообщение о приеме с прогрессом курса"""
+        duration_days = reminder.get("duration_days")
+        progress = ""
+        if duration_days:
+            days_passed = course_day(
+                reminder, self._user_today(user_id), self.next_due.zone_of(user_id), self.next_due.default_zone
+            )
+            progress = self.messages.render(
+                locale, "reminder_progress",
+                day=days_passed, duration_days=duration_days, days_left=max(0, duration_days - days_passed + 1),
+            )
+        return self.messages.render(
+            locale, "reminder",
+            username=self._display_name(locale, user_data),
+            pill=self.messages.pill_of(locale, reminder),
+            time=time_slot['time'],
+            progress=progress,
+        )
+
+    @staticmethod
+    def _track_message(dose_info, result):
+        """Запоминает message_id отправленного в канал сообщения"""
+        if result and result.get("ok"):
+            message_id = (result.get("result") or {}).get("message_id")
+            if message_id is not None:
+                dose_info.setdefault('message_ids', []).append(message_id)
+
+    async def _send_nag(self, dose_info, user_id, user_data, reminder_id, reminder, time_index):
+        """Повторное напоминание в режиме nag_mode.
+
+        repost - новое сообщение (старые копии остаются до отметки приема),
+        edit - правка исходного сообщения со счетчиком повторов без нового
+        сообщения, bump - удаление последней копии и новое сообщение со
+        счетчиком, чтобы напоминание оказалось внизу чата. Если править или
+        удалять нечего (сообщение удалили вручную), отправляется новое.
+        """
+        mode = self.config.get(CONF_NAG_MODE, DEFAULT_NAG_MODE)
+        locale = self.messages.locale_of(user_data)
+        render = self.messages.render
+        time_slot = reminder["times"][time_index]
+        chat_id = dose_info.get('chat_id') or self._reminder_chat(user_data)
+        message_ids = dose_info.setdefault('message_ids', [])
+        count = dose_info.get('nag_count', 0) + 1
+        keyboard = self._reminder_keyboard(locale, user_id, reminder_id, time_index)
+        counter = render(locale, "nag_counter", count=count)
+
+        if mode == NAG_MODE_EDIT and message_ids:
+            text = self._reminder_text(locale, user_id, user_data, reminder, time_slot) + counter
+            result = await self.outbox.submit("editMessageText", {
+                "chat_id": chat_id,
+                "message_id": message_ids[-1],
+                "text": text,
+                "parse_mode": "HTML",
+                "reply_markup": keyboard,
+            })
+            if result and result.get("ok"):
+                dose_info['nag_count'] = count
+                return
+            _LOGGER.debug(f"Editing reminder message failed, posting a new one: {result}")
+
+        if mode == NAG_MODE_BUMP and message_ids:
+            result = await self.outbox.submit("deleteMessage", {"chat_id": chat_id, "message_id": message_ids[-1]})
+            if result and result.get("ok"):
+                message_ids.pop()
+
+        text = render(
+            locale, "nag",
+            username=self._display_name(locale, user_data),
+            pill=self.messages.pill_of(locale, reminder),
+            time=time_slot['time'],
+        )
+        if mode != NAG_MODE_REPOST:
+            text += counter
+        result = await self.queue_message(chat_id, text, keyboard)
+        self._track_message(dose_info, result)
+        dose_info['nag_count'] = count
+
+    async def _resolve_copies(self, dose_info, clicked_chat_id, clicked_message_id, text):
+        """Заменяет кнопки на всех остальных копиях напоминания итоговым текстом"""
+        chat_id = dose_info.get('chat_id')
+        copies = [
+            copy_id for copy_id in dose_info.get('message_ids', [])
+            if not (str(chat_id) == str(clicked_chat_id) and copy_id == clicked_message_id)
+        ]
+        if not chat_id or not copies:
+            return
+        results = await asyncio.gather(*(
+            self.outbox.submit("editMessageText", {
+                "chat_id": chat_id, "message_id": copy_id, "text": text, "parse_mode": "HTML",
+            })
+            for copy_id in copies
+        ), return_exceptions=True)
+        failed = sum(1 for result in results if isinstance(result, Exception) or not (result or {}).get("ok"))
+        if failed:
+            _LOGGER.debug(f"Could not resolve {failed} of {len(copies)} reminder copies")
+
+    def _display_name(self, locale, user_data):
+        return user_data.get('username', user_data.get('first_name') or self.messages.render(locale, "default_username"))
+
+    def _reminder_keyboard(self, locale, user_id, reminder_id, time_index):
+        render = self.messages.render
+        return {
+            "inline_keyboard": [
+                [{"text": render(locale, "button_taken"), "callback_data": f"taken_{user_id}_{reminder_id}_{time_index}"}],
+                [{"text": render(locale, "button_skip"), "callback_data": f"skip_{user_id}_{reminder_id}_{time_index}"}],
+                [{"text": render(locale, "button_description"), "callback_data": f"description_{user_id}_{reminder_id}"}]
+            ]
+        }
+
+    def _marked_messages(self, user_data, action_user_id, reminder_user_id, action_user_data,
+                         pill_name, dosage, course_number, time, personal_key, channel_key):
+        """Личное сообщение и текст поста в канале после отметки приема"""
+        locale = self.messages.locale_of(user_data)
+        render = self.messages.render
+        pill = self.messages.pill(locale, pill_name, dosage, course_number)
+        personal_msg = render(locale, personal_key, pill=pill, time=time)
+        if str(action_user_id) != str(reminder_user_id):
+            action_username = (action_user_data or {}).get('username') or render(locale, "unknown_username")
+            personal_msg += render(locale, "marked_by", username=action_username)
+        return personal_msg, render(locale, channel_key, pill=pill, time=time)
+
+    def _dose_latency(self, dose_info, confirmed_at):
+        """Поля задержки для записи истории по данным активного напоминания"""
+        if not dose_info.get('scheduled_at'):
+            return {}
+        latency = {
+            'scheduled_at': dose_info['scheduled_at'],
+            'sent_at': dose_info.get('first_sent_at'),
+            'nag_count': dose_info.get('nag_count', 0),
+            'confirmed_at': confirmed_at,
+        }
+        try:
+            zone = self.next_due.default_zone
+            scheduled = as_utc(datetime.fromisoformat(dose_info['scheduled_at']), zone)
+            confirmed = as_utc(datetime.fromisoformat(confirmed_at), zone)
+            latency['latency_seconds'] = round((confirmed - scheduled).total_seconds())
+        except ValueError:
+            pass
+        return latency
+
     async def mark_as_taken(self, chat_id, reminder_user_id, message_id, action_user_id, reminder_id="default", time_index=0):
         try:
             users_data = await self.users_storage.async_load() or {}
@@ -1512,14 +2026,14 @@ class PillsReminderBot:
                 history_data = await self.storage.async_load() or {'history': []}
                 
                 # Находим конкретное напоминание или используем первое доступное
-                pill_name = "витаминка"
+                pill_name = self.messages.plain(self.messages.locale_of(user_data), "default_pill")
                 dosage = ""
                 course_number = 1
                 time_taken = "??:??"
                 
                 if reminder_id != "default" and reminder_id in user_data.get("reminders", {}):
                     reminder_info = user_data["reminders"][reminder_id]
-                    pill_name = reminder_info.get("pill_name", "витаминка")
+                    pill_name = reminder_info.get("pill_name", pill_name)
                     dosage = reminder_info.get("dosage", "")
                     course_number = reminder_info.get("course_number", 1)
                     times_list = reminder_info.get("times", [])
@@ -1527,13 +2041,17 @@ class PillsReminderBot:
                         time_taken = times_list[time_index].get("time", "??:??")
                 elif user_data.get("reminders"):
                     first_reminder = next(iter(user_data["reminders"].values()))
-                    pill_name = first_reminder.get("pill_name", "витаминка")
+                    pill_name = first_reminder.get("pill_name", pill_name)
                     dosage = first_reminder.get("dosage", "")
                     course_number = first_reminder.get("course_number", 1)
                     times_list = first_reminder.get("times", [])
                     if times_list:
                         time_taken = times_list[0].get("time", "??:??")
 
+                # Убираем активное напоминание, сохраняя метрики задержки
+                reminder_key = f"{reminder_user_id}_{reminder_id}_{time_index}"
+                dose_info = self.active_reminders.pop(reminder_key, {})
+
                 entry = {
                     'date': datetime.now().isoformat(),
                     'status': 'taken',
@@ -1546,43 +2064,25 @@ class PillsReminderBot:
                     'time_taken': time_taken,
                     'action_by': action_user_id
                 }
+                entry.update(self._dose_latency(dose_info, entry['date']))
                 
                 history_data['history'].append(entry)
-                await self.storage.async_save(history_data)
-
-                # Убираем активное напоминание
-                reminder_key = f"{reminder_user_id}_{reminder_id}_{time_index}"
-                if reminder_key in self.active_reminders:
-                    del self.active_reminders[reminder_key]
-
+                await self.storage.async_save(history_data, changed=[reminder_user_id])
+                self.adherence.record_entry(entry)
+
+                personal_msg, channel_msg = self._marked_messages(
+                    user_data, action_user_id, reminder_user_id, action_user_data,
+                    pill_name, dosage, course_number, time_taken, "taken_personal", "taken_channel",
+                )
+                self.tasks.spawn(self._resolve_copies(dose_info, chat_id, message_id, channel_msg), "handler")
                 # Уведомляем пользователя в личные сообщения
                 if user_data.get('chat_id'):
-                    pill_display = pill_name
-                    if dosage:
-                        pill_display += f" ({dosage})"
-                    if course_number > 1:
-                        pill_display += f" [Курс #{course_number}]"
-                    
-                    personal_msg = f"✅ Отлично! {pill_display} принята в {time_taken}!"
-                    if str(action_user_id) != str(reminder_user_id):
-                        action_username = action_user_data.get('username', 'кто-то') if action_user_data else 'кто-то'
-                        personal_msg += f"\n(Отмечено пользователем @{action_username})"
-                    
                     await self.send_message(user_data['chat_id'], personal_msg)
 
                 # Обновляем сообщение в канале
-                pill_display = pill_name
-                if dosage:
-                    pill_display += f" ({dosage})"
-                if course_number > 1:
-                    pill_display += f" [Курс #{course_number}]"
-                    
-                channel_msg = f"✅ {pill_display} принята в {time_taken}!"
                 await self.edit_message_text(chat_id, message_id, channel_msg)
 
-                # Обновляем сенсоры
                 _LOGGER.info(f"Pill taken: {pill_name} (course #{course_number}) at {time_taken} by user {reminder_user_id}")
-                await self.update_sensors()
 
         except Exception as err:
             _LOGGER.error("Error marking as taken: %s", err)
@@ -1597,14 +2097,14 @@ class PillsReminderBot:
                 history_data = await self.storage.async_load() or {'history': []}
                 
                 # Находим конкретное напоминание или используем первое доступное
-                pill_name = "витаминка"
+                pill_name = self.messages.plain(self.messages.locale_of(user_data), "default_pill")
                 dosage = ""
                 course_number = 1
                 time_skipped = "??:??"
                 
                 if reminder_id != "default" and reminder_id in user_data.get("reminders", {}):
                     reminder_info = user_data["reminders"][reminder_id]
-                    pill_name = reminder_info.get("pill_name", "витаминка")
+                    pill_name = reminder_info.get("pill_name", pill_name)
                     dosage = reminder_info.get("dosage", "")
                     course_number = reminder_info.get("course_number", 1)
                     times_list = reminder_info.get("times", [])
@@ -1612,13 +2112,17 @@ class PillsReminderBot:
                         time_skipped = times_list[time_index].get("time", "??:??")
                 elif user_data.get("reminders"):
                     first_reminder = next(iter(user_data["reminders"].values()))
-                    pill_name = first_reminder.get("pill_name", "витаминка")
+                    pill_name = first_reminder.get("pill_name", pill_name)
                     dosage = first_reminder.get("dosage", "")
                     course_number = first_reminder.get("course_number", 1)
                     times_list = first_reminder.get("times", [])
                     if times_list:
                         time_skipped = times_list[0].get("time", "??:??")
 
+                # Убираем активное напоминание, сохраняя метрики задержки
+                reminder_key = f"{reminder_user_id}_{reminder_id}_{time_index}"
+                dose_info = self.active_reminders.pop(reminder_key, {})
+
                 entry = {
                     'date': datetime.now().isoformat(),
                     'status': 'skipped',
@@ -1631,43 +2135,25 @@ class PillsReminderBot:
                     'time_taken': time_skipped,
                     'action_by': action_user_id
                 }
+                entry.update(self._dose_latency(dose_info, entry['date']))
                 
                 history_data['history'].append(entry)
-                await self.storage.async_save(history_data)
-
-                # Убираем активное напоминание
-                reminder_key = f"{reminder_user_id}_{reminder_id}_{time_index}"
-                if reminder_key in self.active_reminders:
-                    del self.active_reminders[reminder_key]
-
+                await self.storage.async_save(history_data, changed=[reminder_user_id])
+                self.adherence.record_entry(entry)
+
+                personal_msg, channel_msg = self._marked_messages(
+                    user_data, action_user_id, reminder_user_id, action_user_data,
+                    pill_name, dosage, course_number, time_skipped, "skipped_personal", "skipped_channel",
+                )
+                self.tasks.spawn(self._resolve_copies(dose_info, chat_id, message_id, channel_msg), "handler")
                 # Уведомляем пользователя в личные сообщения
                 if user_data.get('chat_id'):
-                    pill_display = pill_name
-                    if dosage:
-                        pill_display += f" ({dosage})"
-                    if course_number > 1:
-                        pill_display += f" [Курс #{course_number}]"
-                    
-                    personal_msg = f"❌ {pill_display} пропущена в {time_skipped}. Записано в историю."
-                    if str(action_user_id) != str(reminder_user_id):
-                        action_username = action_user_data.get('username', 'кто-то') if action_user_data else 'кто-то'
-                        personal_msg += f"\n(Отмечено пользователем @{action_username})"
-                    
                     await self.send_message(user_data['chat_id'], personal_msg)
 
                 # Обновляем сообщение в канале
-                pill_display = pill_name
-                if dosage:
-                    pill_display += f" ({dosage})"
-                if course_number > 1:
-                    pill_display += f" [Курс #{course_number}]"
-                    
-                channel_msg = f"❌ {pill_display} пропущена в {time_skipped}"
                 await self.edit_message_text(chat_id, message_id, channel_msg)
 
-                # Обновляем сенсоры
                 _LOGGER.info(f"Pill skipped: {pill_name} (course #{course_number}) at {time_skipped} by user {reminder_user_id}")
-                await self.update_sensors()
 
         except Exception as err:
             _LOGGER.error("Error marking as skipped: %s", err)
@@ -1677,176 +2163,318 @@ class PillsReminderBot:
             history_data = await self.storage.async_load() or {'history': []}
             users_data = await self.users_storage.async_load() or {}
             user_data = users_data.get(str(user_id))
-            
-            week_ago = datetime.now() - timedelta(days=7)
-            user_history = [
-                entry for entry in history_data.get('history', [])
-                if (entry.get('user_id') == str(user_id) and
-                    datetime.fromisoformat(entry['date']) >= week_ago)
-            ]
 
-            # Если нужна только история активных витаминок
-            if active_only and user_data and user_data.get("reminders"):
-                active_pills = set()
-                for reminder in user_data["reminders"].values():
-                    active_pills.add(reminder.get("pill_name"))
-                user_history = [
-                    entry for entry in user_history
-                    if entry.get('pill_name') in active_pills
-                ]
+            # Окно "за неделю" сдвигается раз в минуту - в пределах минуты
+            # и без новых записей ответ берется из кэша
+            now = datetime.now().replace(second=0, microsecond=0)
+            locale = self._locale(user_id, user_data)
+            view = "history_active" if active_only else "history"
+            version = (self.storage.revision_of(user_id), self.users_storage.revision_of(user_id), locale, now)
+            history_text = self.renders.get(user_id, view, version)
+            if history_text is None:
+                history_text = self.renders.put(user_id, view, version, self._render_history(
+                    locale, user_id, history_data.get('history', []), user_data, now - timedelta(days=7), active_only
+                ))
+            return history_text
 
-            # Группируем по витаминкам и курсам
-            pills_stats = {}
-            for entry in user_history:
-                pill_name = entry.get('pill_name', 'Неизвестно')
-                course_number = entry.get('course_number', 1)
-                dosage = entry.get('dosage', '')
-                
-                pill_key = pill_name
-                if dosage:
-                    pill_key += f" ({dosage})"
-                if course_number > 1:
-                    pill_key += f" [Курс #{course_number}]"
-                
-                if pill_key not in pills_stats:
-                    pills_stats[pill_key] = {'taken': 0, 'skipped': 0}
-                pills_stats[pill_key][entry['status']] += 1
+        except Exception as err:
+            _LOGGER.error("Error getting user history: %s", err)
+            return await self._user_text(user_id, "history_failed")
 
-            username = user_data.get('username', user_data.get('first_name', 'Пользователь')) if user_data else 'Пользователь'
+    def _render_history(self, locale, user_id, history, user_data, week_ago, active_only):
+        self.history_columns.sync(history)
+        user_history = [
+            history[position]
+            for position in self.history_columns.select(user_id=user_id, since=week_ago)
+        ]
+
+        # Если нужна только история активных витаминок
+        if active_only and user_data and user_data.get("reminders"):
+            active_pills = set()
+            for reminder in user_data["reminders"].values():
+                active_pills.add(reminder.get("pill_name"))
+            user_history = [
+                entry for entry in user_history
+                if entry.get('pill_name') in active_pills
+            ]
+
+        # Группируем по витаминкам и курсам
+        render = self.messages.render
+        pills_stats = {}
+        for entry in user_history:
+            pill_key = self.messages.pill(
+                locale, entry.get('pill_name') or render(locale, "unknown_pill"),
+                entry.get('dosage', ''), entry.get('course_number', 1),
+            )
             
-            if active_only:
-                history_text = f"📊 История активных витаминок {username} за неделю:\n\n"
-            else:
-                history_text = f"📊 История {username} за неделю:\n\n"
-
-            if pills_stats:
-                for pill_key, stats in pills_stats.items():
-                    history_text += f"💊 {pill_key}:\n"
-                    history_text += f"   ✅ Принято: {stats['taken']}\n"
-                    history_text += f"   ❌ Пропущено: {stats['skipped']}\n\n"
-
-                history_text += "📋 Последние записи:\n"
-                # Показываем последние 7 записей
-                recent_entries = sorted(user_history, key=lambda x: x['date'], reverse=True)[:7]
-                for entry in recent_entries:
-                    date = datetime.fromisoformat(entry['date']).strftime("%d.%m %H:%M")
-                    status = "✅" if entry['status'] == 'taken' else "❌"
-                    pill_display = entry['pill_name']
-                    
-                    if entry.get('dosage'):
-                        pill_display += f" ({entry['dosage']})"
-                    if entry.get('course_number', 1) > 1:
-                        pill_display += f" [Курс #{entry['course_number']}]"
-                    
-                    time_info = ""
-                    if entry.get('time_taken'):
-                        time_info = f" в {entry['time_taken']}"
-                    
-                    history_text += f"{status} {date} - {pill_display}{time_info}\n"
-            else:
-                if active_only:
-                    history_text += "Нет записей по активным витаминкам за последнюю неделю"
-                else:
-                    history_text += "Нет записей за последнюю неделю"
+            if pill_key not in pills_stats:
+                pills_stats[pill_key] = {'taken': 0, 'skipped': 0}
+            pills_stats[pill_key][entry['status']] += 1
+
+        username = self._display_name(locale, user_data or {})
+        history_text = render(locale, "history_title_active" if active_only else "history_title", username=username)
+
+        if pills_stats:
+            for pill_key, stats in pills_stats.items():
+                history_text += render(
+                    locale, "history_pill", pill=pill_key, taken=stats['taken'], skipped=stats['skipped']
+                )
+
+            history_text += render(locale, "history_recent")
+            # Показываем последние 7 записей
+            recent_entries = sorted(user_history, key=lambda x: x['date'], reverse=True)[:7]
+            for entry in recent_entries:
+                time_info = ""
+                if entry.get('time_taken'):
+                    time_info = render(locale, "history_entry_time", time=entry['time_taken'])
+                history_text += render(
+                    locale, "history_entry",
+                    status="✅" if entry['status'] == 'taken' else "❌",
+                    date=datetime.fromisoformat(entry['date']).strftime("%d.%m %H:%M"),
+                    pill=self.messages.pill_of(locale, entry),
+                    time=time_info,
+                )
+        else:
+            history_text += render(locale, "history_empty_active" if active_only else "history_empty")
 
-            if active_only:
-                history_text += "\n\n🗄️ Используйте /archive для просмотра завершенных курсов"
+        if active_only:
+            history_text += render(locale, "history_archive_hint")
 
-            return history_text
+        return history_text
 
-        except Exception as err:
-            _LOGGER.error("Error getting user history: %s", err)
-            return "Ошибка при получении истории"
+    async def get_archive_page(self, user_id, page=0):
+        """Страница /archive: (текст, клавиатура).
 
-    async def get_user_archive(self, user_id):
+        Страницы строятся один раз на версию архива, поэтому листание и
+        повторные /archive не зависят от числа курсов.
+        """
         try:
             archive_data = await self.archive_storage.async_load() or {'archive': []}
-            user_archive = [
-                entry for entry in archive_data.get('archive', [])
-                if entry.get('user_id') == str(user_id)
-            ]
-
             users_data = await self.users_storage.async_load() or {}
             user_data = users_data.get(str(user_id))
-            username = user_data.get('username', user_data.get('first_name', 'Пользователь')) if user_data else 'Пользователь'
+            locale = self._locale(user_id, user_data)
+            version = (self.archive_storage.revision_of(user_id), self.users_storage.revision_of(user_id), locale)
+            pages = self.renders.get(user_id, "archive", version)
+            if pages is None:
+                pages = self.renders.put(user_id, "archive", version, self._render_archive(
+                    locale, user_id, archive_data.get('archive', []), user_data
+                ))
+
+            page = min(max(page, 0), len(pages) - 1)
+            text, repeat_buttons = pages[page]
+            keyboard_buttons = list(repeat_buttons)
+            if len(pages) > 1:
+                navigation = []
+                if page > 0:
+                    navigation.append({"text": self.messages.plain(locale, "button_back"),
+                                       "callback_data": f"archive_page_{page - 1}"})
+                if page < len(pages) - 1:
+                    navigation.append({"text": self.messages.plain(locale, "button_next"),
+                                       "callback_data": f"archive_page_{page + 1}"})
+                keyboard_buttons.append(navigation)
+            return text, ({"inline_keyboard": keyboard_buttons} if keyboard_buttons else None)
 
-            archive_text = f"🗄️ Архив завершенных курсов {username}:\n\n"
+        except Exception as err:
+            _LOGGER.error("Error getting user archive: %s", err)
+            return await self._user_text(user_id, "archive_failed"), None
+
+    def _render_archive(self, locale, user_id, archive, user_data):
+        """Страницы архива пользователя: [(текст, кнопки повтора курсов страницы)]"""
+        render = self.messages.render
+        header = render(locale, "archive_title", username=self._display_name(locale, user_data or {}))
+
+        user_archive = [entry for entry in archive if entry.get('user_id') == str(user_id)]
+        if not user_archive:
+            return [(header + render(locale, "archive_empty"), [])]
+
+        # Сортируем по дате завершения (новые сверху)
+        sorted_archive = sorted(user_archive, key=lambda x: x['end_date'], reverse=True)
+        blocks = []
+        for entry in sorted_archive:
+            reminder_data = entry.get('reminder_data', {})
+            description = reminder_data.get('description', '')
+            duration_days = reminder_data.get('duration_days')
+
+            times_display = [t["time"] for t in reminder_data.get("times", [])]
+
+            # Вычисляем процент соблюдения
+            compliance = ""
+            total = entry.get('total_taken', 0) + entry.get('total_skipped', 0)
+            if total > 0:
+                compliance = render(
+                    locale, "archive_compliance", percent=round(entry.get('total_taken', 0) / total * 100, 1)
+                )
+
+            blocks.append(render(
+                locale, "archive_block",
+                pill=self.messages.pill_of(locale, reminder_data),
+                description=render(locale, "archive_description", description=description) if description else "",
+                start=datetime.fromisoformat(entry['start_date']).strftime('%d.%m.%Y'),
+                end=datetime.fromisoformat(entry['end_date']).strftime('%d.%m.%Y'),
+                duration=render(locale, "archive_duration", days=duration_days) if duration_days else "",
+                times=render(locale, "archive_times", times=", ".join(times_display)) if times_display else "",
+                taken=entry.get('total_taken', 0),
+                skipped=entry.get('total_skipped', 0),
+                compliance=compliance,
+            ))
+
+        layout = paginate(blocks)
+        pages = []
+        for number, parts in enumerate(layout, 1):
+            # Курс, разделенный на несколько страниц, встречается на каждой из них один раз
+            indexes = list(dict.fromkeys(index for index, _ in parts))
+            # Повторять можно только родительские курсы (#1)
+            repeat_buttons = [
+                [{
+                    "text": self.messages.plain(
+                        locale, "button_repeat_course",
+                        pill_name=sorted_archive[index].get('reminder_data', {}).get('pill_name', ''),
+                    ),
+                    "callback_data": f"repeat_course_{sorted_archive[index].get('archived_at', '')}",
+                }]
+                for index in indexes
+                if sorted_archive[index].get('reminder_data', {}).get('course_number', 1) == 1
+            ]
+            text = header + Markup("".join(part for _, part in parts))
+            text += render(locale, "archive_total", count=len(sorted_archive))
+            if len(layout) > 1:
+                text += render(locale, "archive_page", number=number, pages=len(layout))
+            if repeat_buttons:
+                text += render(locale, "archive_repeat_hint")
+            pages.append((text, repeat_buttons))
+        return pages
+
+    def _coordinators(self):
+        """Координаторы сенсоров всех записей, подключенных к этому боту"""
+        domain_data = self.hass.data.get(DOMAIN, {})
+        for entry_id in self.entry_ids:
+            entry_data = domain_data.get(entry_id)
+            if isinstance(entry_data, dict) and entry_data.get('coordinator'):
+                yield entry_data['coordinator']
+
+    async def async_snapshot(self):
+        """Данные для сенсоров из памяти бота, без чтения диска.
+
+        users и history - те же объекты, что у бота, их нельзя изменять.
+        revisions растут с каждой записью хранилища: по ним читатель
+        понимает, изменилось ли что-то с прошлого раза.
+        """
+        history_data = await self.storage.async_load() or {}
+        users_data = await self.users_storage.async_load() or {}
+        return {
+            'users': users_data,
+            'history': history_data.get('history', []),
+            'revisions': {
+                'history': self.storage.revision,
+                'users': self.users_storage.revision,
+            },
+        }
 
-            if user_archive:
-                # Сортируем по дате завершения (новые сверху)
-                sorted_archive = sorted(user_archive, key=lambda x: x['end_date'], reverse=True)
-                
-                for entry in sorted_archive:
-                    reminder_data = entry.get('reminder_data', {})
-                    pill_name = reminder_data.get('pill_name', 'Неизвестно')
-                    dosage = reminder_data.get('dosage', '')
-                    description = reminder_data.get('description', '')
-                    course_number = reminder_data.get('course_number', 1)
-                    duration_days = reminder_data.get('duration_days')
-                    
-                    start_date = datetime.fromisoformat(entry['start_date']).strftime('%d.%m.%Y')
-                    end_date = datetime.fromisoformat(entry['end_date']).strftime('%d.%m.%Y')
-
-                    archive_text += f"💊 {pill_name}"
-                    if dosage:
-                        archive_text += f" ({dosage})"
-                    if course_number > 1:
-                        archive_text += f" [Курс #{course_number}]"
-                    archive_text += "\n"
-                    
-                    if description:
-                        archive_text += f"   💡 {description}\n"
-                        
-                    archive_text += f"   📅 {start_date} - {end_date}"
-                    if duration_days:
-                        archive_text += f" ({duration_days} дн.)"
-                    archive_text += "\n"
-                    
-                    times_display = [t["time"] for t in reminder_data.get("times", [])]
-                    if times_display:
-                        archive_text += f"   ⏰ Времена: {', '.join(times_display)}\n"
-                    
-                    archive_text += f"   ✅ Принято: {entry.get('total_taken', 0)}\n"
-                    archive_text += f"   ❌ Пропущено: {entry.get('total_skipped', 0)}\n"
-                    
-                    # Вычисляем процент соблюдения
-                    total = entry.get('total_taken', 0) + entry.get('total_skipped', 0)
-                    if total > 0:
-                        compliance = round(entry.get('total_taken', 0) / total * 100, 1)
-                        archive_text += f"   📊 Соблюдение: {compliance}%\n"
-                    archive_text += "\n"
-
-                archive_text += f"📋 Всего завершенных курсов: {len(sorted_archive)}\n\n"
-                archive_text += "🔄 Используйте кнопки ниже для повтора родительских курсов (Курс #1)"
+    async def import_reminders(self, reminders):
+        """Добавляет пачку импортированных напоминаний одной записью хранилища.
+
+        reminders - кортежи (user_id, reminder_id, reminder, profile). Новый
+        пользователь получает профиль целиком; у существующего заполняются
+        только незаданные поля (зона, язык, чат напоминаний), настройки,
+        сделанные в боте, не перезаписываются. Напоминания с уже занятым id
+        пропускаются. Возвращает число добавленных.
+        """
+        users_data = await self.users_storage.async_load() or {}
+        added = []
+        restored = set()
+        for user_id, reminder_id, reminder, profile in reminders:
+            user_data = users_data.get(user_id)
+            if user_data is None:
+                user_data = users_data[user_id] = {
+                    **{key: value for key, value in profile.items() if value not in (None, "")},
+                    "reminders": {},
+                }
+                restored.add(user_id)
             else:
-                archive_text += "Архив пуст\n\n"
-                archive_text += "Завершенные курсы будут отображаться здесь"
+                for key in ("timezone", "language", "reminder_chat_id", "reminder_chat_title"):
+                    if profile.get(key) and not user_data.get(key):
+                        user_data[key] = profile[key]
+                        restored.add(user_id)
+            user_reminders = user_data.setdefault("reminders", {})
+            if reminder_id in user_reminders:
+                continue
+            user_reminders[reminder_id] = reminder
+            added.append((user_id, reminder_id, reminder))
+
+        if added or restored:
+            await self.users_storage.async_save(users_data, changed=list({*restored, *(key[0] for key in added)}))
+            # Зона пересчитывает все напоминания пользователя, включая добавленные
+            for user_id in restored:
+                user_data = users_data[user_id]
+                self.next_due.set_timezone(user_id, user_data.get("timezone"), user_data.get("reminders"))
+            for user_id, reminder_id, reminder in added:
+                if user_id not in restored:
+                    self.next_due.update(user_id, reminder_id, reminder)
+            self._schedule_changed.set()
+        return len(added)
+
+    async def import_history(self, entries):
+        """Дописывает пачку записей истории одной записью хранилища"""
+        if not entries:
+            return 0
+        history_data = await self.storage.async_load() or {'history': []}
+        history_data.setdefault('history', []).extend(entries)
+        await self.storage.async_save(history_data)
+        return len(entries)
 
-            return archive_text
+    async def import_archive(self, entries):
+        """Дописывает пачку архивных курсов одной записью хранилища"""
+        if not entries:
+            return 0
+        archive_data = await self.archive_storage.async_load() or {'archive': []}
+        archive_data.setdefault('archive', []).extend(entries)
+        await self.archive_storage.async_save(archive_data)
+        return len(entries)
 
-        except Exception as err:
-            _LOGGER.error("Error getting user archive: %s", err)
-            return "Ошибка при получении архива"
+    def _on_data_changed(self, store):
+        # Несколько записей подряд (история и напоминания) дают одно обновление
+        if self._sensor_refresh is None and not self.tasks.stopping:
+            self._sensor_refresh = self.tasks.spawn(self._async_refresh_sensors(), "sensors")
+
+    async def _async_refresh_sensors(self):
+        await asyncio.sleep(0)
+        # Записи во время обновления запланируют следующее
+        self._sensor_refresh = None
+        for coordinator in list(self._coordinators()):
+            await coordinator.async_refresh()
 
     async def update_sensors(self):
-        """Update Home Assistant sensors."""
-        try:
-            # Находим координатор для этой интеграции
-            domain_data = self.hass.data.get(DOMAIN, {})
-            for entry_id, entry_data in domain_data.items():
-                if isinstance(entry_data, dict) and 'coordinator' in entry_data:
-                    coordinator = entry_data['coordinator']
-                    if coordinator:
-                        await coordinator.async_request_refresh()
-                        _LOGGER.debug("Sensors updated successfully")
-                        break
-            else:
-                _LOGGER.warning("Coordinator not found for sensor update")
-        except Exception as err:
-            _LOGGER.error("Error updating sensors: %s", err)
+        """Обновляет сенсоры без записи данных (после загрузки расписания).
+
+        Записи в хранилища обновляют сенсоры сами через _on_data_changed,
+        поэтому после сохранений этот метод не вызывается.
+        """
+        self._on_data_changed(None)
+
+    async def api_request(self, method, data, retries=MAX_API_RETRIES):
+        """POST-запрос к Bot API с повтором после 429 (retry_after).
+
+        Очередь отправки передает retries=0: ответ 429 она обрабатывает
+        сама, не останавливая отправку в другие чаты.
+        """
+        url = f"{self.base_url}/{method}"
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                async with self.session.post(url, json=data) as response:
+                    result = await response.json()
+                    status = response.status
+            except Exception:
+                self.metrics.record_api(method, time.perf_counter() - started, failed=True)
+                raise
+            self.metrics.record_api(method, time.perf_counter() - started, status, retry=attempt > 0)
+            if status != 429 or attempt == retries:
+                return result
+            retry_after = (result.get("parameters") or {}).get("retry_after", 1)
+            _LOGGER.debug(f"Telegram rate limit on {method}, retrying in {retry_after}s")
+            await asyncio.sleep(retry_after)
 
     async def send_message(self, chat_id, text, reply_markup=None):
-        url = f"{self.base_url}/sendMessage"
         data = {
             "chat_id": chat_id,
             "text": text,
@@ -1854,22 +2482,30 @@ class PillsReminderBot:
         }
         if reply_markup:
             data["reply_markup"] = reply_markup
-        async with self.session.post(url, json=data) as response:
-            return await response.json()
+        return await self.api_request("sendMessage", data)
 
-    async def edit_message_text(self, chat_id, message_id, text):
-        url = f"{self.base_url}/editMessageText"
+    async def queue_message(self, chat_id, text, reply_markup=None):
+        """sendMessage через общую очередь с ограничением частоты по чатам"""
+        data = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        if reply_markup:
+            data["reply_markup"] = reply_markup
+        return await self.outbox.submit("sendMessage", data)
+
+    async def edit_message_text(self, chat_id, message_id, text, reply_markup=None):
         data = {
             "chat_id": chat_id,
             "message_id": message_id,
             "text": text,
             "parse_mode": "HTML"
         }
-        async with self.session.post(url, json=data) as response:
-            return await response.json()
+        if reply_markup:
+            data["reply_markup"] = reply_markup
+        return await self.api_request("editMessageText", data)
 
     async def answer_callback_query(self, callback_query_id):
-        url = f"{self.base_url}/answerCallbackQuery"
         data = {"callback_query_id": callback_query_id}
-        async with self.session.post(url, json=data) as response:
-            return await response.json()
\ No newline at end of file
+        return await self.api_request("answerCallbackQuery", data)
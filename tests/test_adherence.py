@@ -0,0 +1,33 @@
+"""Рекорд серии не растет от дня, прерванного пропуском."""
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+adherence = importlib.import_module(f"{stubs.PACKAGE_NAME}.adherence")
+
+
+def test_day_with_skip_does_not_extend_longest_streak():
+    pill = adherence.PillAdherence()
+    for day in (1, 2):
+        pill.record(day, True)
+        pill.record(day, True)
+    # Третий день: первая доза принята, вторая пропущена
+    pill.record(3, True)
+    pill.record(3, False)
+    assert pill.longest_streak == 2
+    assert pill.current_streak(3) == 0
+
+
+def test_open_day_counts_until_broken():
+    pill = adherence.PillAdherence()
+    pill.record(1, True)
+    pill.record(2, True)
+    assert pill.longest_streak == 2
+    pill.record(5, True)
+    assert pill.longest_streak == 2
+    assert pill.current_streak(5) == 1
@@ -0,0 +1,41 @@
+"""Курс заканчивается в полночь после последнего дня по календарю пользователя."""
+import importlib
+import os
+import sys
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+schedule = importlib.import_module(f"{stubs.PACKAGE_NAME}.schedule")
+
+TOKYO = schedule.get_zone("Asia/Tokyo")
+# 2026-01-01 15:30 в Токио, прием в 20:00
+REMINDER = {
+    "pill_name": "Магний",
+    "duration_days": 3,
+    "created": "2026-01-01T06:30:00+00:00",
+    "times": [{"time": "20:00"}],
+}
+
+
+def test_course_ends_at_local_midnight_after_last_day():
+    ends_at = schedule.course_end(REMINDER, TOKYO)
+    assert ends_at == datetime(2026, 1, 3, 15, 0, tzinfo=timezone.utc)  # 2026-01-04 00:00 в Токио
+
+
+def test_last_day_doses_fire_and_next_day_does_not():
+    reminder = {**REMINDER, "schedule": schedule.compile_schedule(REMINDER)}
+    index = schedule.NextDueIndex("UTC")
+    index.set_timezone("1", "Asia/Tokyo", {"r1": reminder}, now=datetime(2026, 1, 3, 10, 0, tzinfo=timezone.utc))
+    # 20:00 третьего дня курса в Токио
+    assert index.next_due("1", "r1") == datetime(2026, 1, 3, 11, 0, tzinfo=timezone.utc)
+    index.update("1", "r1", reminder, now=datetime(2026, 1, 3, 11, 0, tzinfo=timezone.utc))
+    assert index.next_due("1", "r1") is None
+
+
+def test_course_day_is_clamped_to_duration():
+    assert schedule.course_day(REMINDER, date(2026, 1, 3), TOKYO) == 3
+    assert schedule.course_day(REMINDER, date(2026, 1, 4), TOKYO) == 3
@@ -0,0 +1,37 @@
+"""Предел приемов в сутки одинаков для мастера, /add и импорта."""
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+schedule = importlib.import_module(f"{stubs.PACKAGE_NAME}.schedule")
+transfer = importlib.import_module(f"{stubs.PACKAGE_NAME}.transfer")
+wizard = importlib.import_module(f"{stubs.PACKAGE_NAME}.wizard")
+
+SEVEN_TIMES = "08:00,09:00,10:00,11:00,12:00,13:00,14:00"
+
+
+def test_intervals_fit_times_per_day():
+    for hours in schedule.INTERVAL_HOURS:
+        times, _ = schedule.parse_schedule_text(f"каждые {hours} часов с 08:00")
+        assert len(times) == 24 // hours <= schedule.MAX_TIMES_PER_DAY
+
+
+@pytest.mark.parametrize("text", ["каждые 2 часа с 08:00", SEVEN_TIMES])
+def test_edit_times_rejects_what_add_and_import_reject(text):
+    with pytest.raises(wizard.StepError):
+        wizard.SETUP_STEPS["edit_times"]["parse"](text)
+    with pytest.raises(wizard.StepError):
+        wizard.parse_reminder_spec(f"Магний {text}")
+
+
+def test_import_rejects_too_many_times():
+    row = {"user_id": "1", "reminder_id": "r1", "pill_name": "Магний", "times": SEVEN_TIMES}
+    with pytest.raises(transfer.RowError):
+        transfer.validate_reminder(row)
@@ -0,0 +1,34 @@
+"""Параметр deep link /start для /add: кодирование и лимит Telegram в 64 символа."""
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+wizard = importlib.import_module(f"{stubs.PACKAGE_NAME}.wizard")
+
+
+def test_payload_round_trip():
+    spec = 'Магний 21:00 "на ночь"'
+    payload = wizard.encode_spec_payload(spec)
+    assert payload.startswith(wizard.SPEC_PAYLOAD_PREFIX)
+    assert wizard.decode_spec_payload(payload) == spec
+
+
+def test_payload_within_telegram_limit():
+    spec = "D3 " + "a" * 42
+    payload = wizard.encode_spec_payload(spec)
+    assert len(payload) == wizard.MAX_START_PAYLOAD
+    assert all(char.isalnum() or char in "_-" for char in payload)
+
+
+def test_payload_too_long():
+    assert wizard.encode_spec_payload('Vitamin D 1000ME 30d 08:00,20:00 "for immunity"') is None
+    assert wizard.encode_spec_payload('Витамин D 08:00 "для иммунитета"') is None
+
+
+def test_payload_normalizes_spaces():
+    assert wizard.encode_spec_payload("Omega  3   09:00 ") == wizard.encode_spec_payload("Omega 3 09:00")
@@ -0,0 +1,26 @@
+"""Наивные метки времени читаются в зоне Home Assistant, а не в зоне процесса."""
+import importlib
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+schedule = importlib.import_module(f"{stubs.PACKAGE_NAME}.schedule")
+
+TOKYO = schedule.get_zone("Asia/Tokyo")
+
+
+def test_as_utc_and_created_at_agree_on_naive_values():
+    naive = datetime(2026, 1, 1, 9, 0)
+    expected = datetime(2026, 1, 1, 0, 0, tzinfo=timezone.utc)
+    assert schedule.as_utc(naive, TOKYO) == expected
+    assert schedule.created_at({"created": naive.isoformat()}, TOKYO) == expected
+
+
+def test_aware_values_keep_their_offset():
+    value = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+    assert schedule.as_utc(value, TOKYO) == value
@@ -0,0 +1,57 @@
+"""Проверка строк импорта: профиль пользователя и расписание архивных курсов."""
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import stubs  # noqa: E402
+
+stubs.install()
+transfer = importlib.import_module(f"{stubs.PACKAGE_NAME}.transfer")
+
+REMINDER = {"user_id": "42", "reminder_id": "r1", "pill_name": "Магний", "times": "08:00 20:00"}
+ARCHIVE = {
+    "user_id": "42", "reminder_id": "r1", "archived_at": "2026-01-31T10:00:00",
+    "start_date": "2026-01-01T09:00:00", "end_date": "2026-01-31T10:00:00",
+}
+
+
+def test_profile_fields_survive_import():
+    row = {**REMINDER, "timezone": "Asia/Tokyo", "language": "en",
+           "reminder_chat_id": "-100500", "reminder_chat_title": "Семья"}
+    _, _, _, profile = transfer.validate_reminder(row, locales=["en", "ru"])
+    assert profile["timezone"] == "Asia/Tokyo"
+    assert profile["language"] == "en"
+    assert profile["reminder_chat_id"] == -100500
+    assert profile["reminder_chat_title"] == "Семья"
+
+
+def test_profile_rejects_unknown_timezone():
+    with pytest.raises(transfer.RowError):
+        transfer.validate_reminder({**REMINDER, "timezone": "Mars/Olympus"})
+
+
+def test_profile_language_without_templates_falls_back():
+    _, _, _, profile = transfer.validate_reminder({**REMINDER, "language": "de"}, locales=["en", "ru"])
+    assert profile["language"] is None
+
+
+@pytest.mark.parametrize("reminder_data", [
+    {"pill_name": "Магний"},
+    {"pill_name": "Магний", "times": [{"hour": 8}]},
+    {"pill_name": "Магний", "times": [{"time": "08:00"}], "schedule": {"every_days": 90}},
+    {"pill_name": "Магний", "times": [{"time": "08:00"}], "schedule": {"interval_hours": 2}},
+])
+def test_archive_checks_reminder_schedule(reminder_data):
+    with pytest.raises(transfer.RowError):
+        transfer.validate_archive({**ARCHIVE, "reminder_data": reminder_data})
+
+
+def test_archive_keeps_valid_schedule():
+    reminder_data = {"pill_name": "Магний", "times": [{"time": "08:00"}], "schedule": {"weekdays": 0b0010101}}
+    entry = transfer.validate_archive({**ARCHIVE, "reminder_data": reminder_data})
+    assert entry["reminder_data"]["schedule"]["weekdays"] == 0b0010101
+    assert entry["reminder_data"]["times"] == [{"time": "08:00"}]
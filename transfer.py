@@ -0,0 +1,509 @@
+"""Потоковый экспорт и импорт напоминаний, истории и архива в JSONL и CSV."""
+import csv
+import functools
+import io
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from .schedule import (
+    INTERVAL_HOURS,
+    MAX_EVERY_DAYS,
+    MAX_TIMES_PER_DAY,
+    WEEKDAYS_ALL,
+    compile_schedule,
+    get_zone,
+    parse_hhmm,
+    preload_zones,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+TRANSFER_DIR = "pills_reminder_exports"
+
+DATASETS = ("reminders", "history", "archive")
+FORMATS = ("jsonl", "csv")
+DEFAULT_BATCH_SIZE = 1000
+# Строк экспорта, сериализуемых за один заход в event loop
+EXPORT_CHUNK_SIZE = 1000
+# Сколько ошибок проверки импорта выводится в лог построчно
+MAX_LOGGED_ERRORS = 20
+
+HISTORY_STATUSES = ("taken", "skipped")
+
+# Колонки CSV; в JSONL строка - сама запись со всеми полями
+COLUMNS = {
+    "reminders": [
+        "user_id", "reminder_id", "username", "first_name", "chat_id",
+        "timezone", "language", "reminder_chat_id", "reminder_chat_title",
+        "pill_name", "dosage", "description", "duration_days", "course_number",
+        "active", "created", "times", "weekdays", "every_days", "interval_hours",
+    ],
+    "history": [
+        "date", "status", "user_id", "reminder_id", "pill_name", "dosage", "course_number",
+        "time_index", "time_taken", "action_by", "scheduled_at", "sent_at", "nag_count",
+        "confirmed_at", "latency_seconds",
+    ],
+    "archive": [
+        "user_id", "reminder_id", "start_date", "end_date", "total_taken", "total_skipped",
+        "archived_at", "reminder_data", "history",
+    ],
+}
+
+# Вложенные поля архива в CSV хранятся как JSON в ячейке
+_JSON_FIELDS = {"reminder_data", "history"}
+
+# Поля профиля пользователя в строках напоминаний
+PROFILE_FIELDS = (
+    "username", "first_name", "chat_id", "timezone", "language", "reminder_chat_id", "reminder_chat_title",
+)
+
+
+class RowError(ValueError):
+    """Строка импорта не прошла проверку"""
+
+
+def _reminder_rows(users):
+    for user_id, user_data in users:
+        profile = {key: user_data.get(key) for key in PROFILE_FIELDS}
+        for reminder_id, reminder in list(user_data.get("reminders", {}).items()):
+            schedule = reminder.get("schedule") or {}
+            yield {
+                "user_id": user_id,
+                "reminder_id": reminder_id,
+                **profile,
+                **{key: value for key, value in reminder.items() if key != "schedule"},
+                "weekdays": schedule.get("weekdays", WEEKDAYS_ALL),
+                "every_days": schedule.get("every_days", 1),
+                "interval_hours": schedule.get("interval_hours"),
+            }
+
+
+async def async_export_rows(bot, dataset):
+    """Генератор строк набора данных по памяти бота.
+
+    Копируется только список ссылок на записи; сами записи читает
+    encode_rows в event loop, где их меняют обработчики бота, поэтому
+    в файл не попадает запись, измененная посередине сериализации.
+    """
+    if dataset == "reminders":
+        users_data = await bot.users_storage.async_load() or {}
+        return _reminder_rows(list(users_data.items()))
+    if dataset == "history":
+        history_data = await bot.storage.async_load() or {}
+        return iter(list(history_data.get("history", [])))
+    archive_data = await bot.archive_storage.async_load() or {}
+    return iter(list(archive_data.get("archive", [])))
+
+
+def _csv_cell(key, value):
+    if value is None:
+        return ""
+    if key in _JSON_FIELDS:
+        return json.dumps(value, ensure_ascii=False)
+    if key == "times":
+        return " ".join(slot.get("time", "") for slot in value)
+    return value
+
+
+def encode_rows(fmt, columns, rows, header=False):
+    """Текст файла для пачки строк (вызывается в event loop)"""
+    buffer = io.StringIO()
+    if fmt == "jsonl":
+        for row in rows:
+            buffer.write(json.dumps(row, ensure_ascii=False))
+            buffer.write("\n")
+    else:
+        writer = csv.DictWriter(buffer, columns, extrasaction="ignore")
+        if header:
+            writer.writeheader()
+        for row in rows:
+            writer.writerow({key: _csv_cell(key, row.get(key)) for key in columns})
+    return buffer.getvalue()
+
+
+def open_export(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def read_rows(path, fmt):
+    """Генератор (номер строки, запись) из файла; файл закрывается вместе с генератором"""
+    with open(path, encoding="utf-8", newline="") as file:
+        if fmt == "jsonl":
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as err:
+                    yield line_number, RowError(f"invalid JSON: {err}")
+        else:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+
+
+def take(rows, count):
+    """Следующие count строк генератора (пустой список - файл закончился)"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= count:
+            break
+    return batch
+
+
+def _int(row, key, default=None):
+    value = row.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} must be an integer")
+
+
+def _text(row, key, required=False):
+    value = row.get(key)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"{key} is required")
+        return ""
+    return str(value)
+
+
+def _timestamp(row, key, required=False):
+    value = _text(row, key, required)
+    if value:
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise RowError(f"{key} must be an ISO date")
+    return value or None
+
+
+def _user_id(row):
+    user_id = _text(row, "user_id", required=True)
+    if not user_id.lstrip("-").isdigit():
+        raise RowError("user_id must be a Telegram id")
+    return user_id
+
+
+def _json(row, key, kind):
+    value = row.get(key)
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise RowError(f"{key} must be JSON")
+    if not isinstance(value, kind):
+        raise RowError(f"{key} has wrong type")
+    return value
+
+
+def _times(value):
+    if isinstance(value, str):
+        value = [{"time": item} for item in value.replace(",", " ").split()]
+    if not isinstance(value, list) or not value:
+        raise RowError("times is required")
+    times = []
+    for slot in value:
+        text = slot.get("time") if isinstance(slot, dict) else slot
+        if not isinstance(text, str) or parse_hhmm(text) is None:
+            raise RowError(f"invalid time {text!r}")
+        times.append({"time": text})
+    return times
+
+
+def validate_history(row):
+    """Проверенная запись истории в формате mark_as_taken/mark_as_skipped"""
+    status = _text(row, "status", required=True)
+    if status not in HISTORY_STATUSES:
+        raise RowError(f"unknown status {status!r}")
+    entry = {
+        "date": _timestamp(row, "date", required=True),
+        "status": status,
+        "user_id": _user_id(row),
+        "reminder_id": _text(row, "reminder_id"),
+        "pill_name": _text(row, "pill_name", required=True),
+        "dosage": _text(row, "dosage"),
+        "course_number": _int(row, "course_number", 1),
+        "time_index": _int(row, "time_index", 0),
+        "time_taken": _text(row, "time_taken"),
+    }
+    action_by = _int(row, "action_by")
+    if action_by is not None:
+        entry["action_by"] = action_by
+    # Поля задержки есть только у записей с известным временем срабатывания
+    if row.get("scheduled_at"):
+        entry.update({
+            "scheduled_at": _timestamp(row, "scheduled_at"),
+            "sent_at": _timestamp(row, "sent_at"),
+            "nag_count": _int(row, "nag_count", 0),
+            "confirmed_at": _timestamp(row, "confirmed_at"),
+        })
+        latency_seconds = _int(row, "latency_seconds")
+        if latency_seconds is not None:
+            entry["latency_seconds"] = latency_seconds
+    return entry
+
+
+def _reminder(row):
+    """Напоминание из полей строки с теми же пределами, что в мастере настройки.
+
+    Поля расписания (weekdays, every_days, interval_hours) берутся из row;
+    created без значения - текущий момент.
+    """
+    duration_days = _int(row, "duration_days")
+    if duration_days is not None and duration_days <= 0:
+        raise RowError("duration_days must be positive")
+    active = row.get("active", True)
+    if isinstance(active, str):
+        active = active.strip().lower() not in ("false", "0", "no", "")
+    times = _times(row.get("times"))
+    if len(times) > MAX_TIMES_PER_DAY:
+        raise RowError(f"at most {MAX_TIMES_PER_DAY} times per day")
+    interval_hours = _int(row, "interval_hours")
+    if interval_hours is not None and interval_hours not in INTERVAL_HOURS:
+        raise RowError(f"interval_hours must be one of {', '.join(map(str, INTERVAL_HOURS))}")
+    reminder = {
+        "pill_name": _text(row, "pill_name", required=True),
+        "dosage": _text(row, "dosage"),
+        "description": _text(row, "description"),
+        "duration_days": duration_days,
+        "times_per_day": len(times),
+        "times": times,
+        "course_number": _int(row, "course_number", 1),
+        "active": bool(active),
+        "created": _timestamp(row, "created") or datetime.now(timezone.utc).isoformat(),
+    }
+    weekdays = _int(row, "weekdays", WEEKDAYS_ALL)
+    if not 0 <= weekdays <= WEEKDAYS_ALL:
+        raise RowError("weekdays must be a 7-bit mask")
+    every_days = _int(row, "every_days", 1)
+    if not 1 <= every_days <= MAX_EVERY_DAYS:
+        raise RowError(f"every_days must be between 1 and {MAX_EVERY_DAYS}")
+    reminder["schedule"] = compile_schedule(
+        reminder,
+        weekdays=weekdays or WEEKDAYS_ALL,
+        every_days=every_days,
+        interval_hours=interval_hours,
+    )
+    return reminder
+
+
+def _profile(row, user_id, locales):
+    """Профиль пользователя: зона проверяется get_zone, язык - по шаблонам бота.
+
+    Язык без шаблонов не ошибка: Telegram сообщает любой language_code,
+    а бот для него все равно выберет язык по умолчанию.
+    """
+    zone_name = _text(row, "timezone")
+    if zone_name and get_zone(zone_name) is None:
+        raise RowError(f"unknown timezone {zone_name!r}")
+    language = _text(row, "language").lower()
+    if language and not language.isalpha():
+        raise RowError(f"invalid language {language!r}")
+    return {
+        "username": _text(row, "username") or _text(row, "first_name") or "пользователь",
+        "first_name": _text(row, "first_name"),
+        "chat_id": _int(row, "chat_id", int(user_id)),
+        "timezone": zone_name or None,
+        "language": language if language in locales else None,
+        "reminder_chat_id": _int(row, "reminder_chat_id"),
+        "reminder_chat_title": _text(row, "reminder_chat_title"),
+    }
+
+
+def validate_reminder(row, locales=()):
+    """(user_id, reminder_id, напоминание, профиль) из строки экспорта напоминаний.
+
+    locales - языки, для которых у бота есть шаблоны сообщений.
+    """
+    user_id = _user_id(row)
+    reminder_id = _text(row, "reminder_id", required=True)
+    return user_id, reminder_id, _reminder(row), _profile(row, user_id, locales)
+
+
+def validate_archive(row):
+    """Проверенный архивный курс в формате archive_completed_course"""
+    raw = _json(row, "reminder_data", dict)
+    schedule = raw.get("schedule") or {}
+    if not isinstance(schedule, dict):
+        raise RowError("reminder_data.schedule must be an object")
+    try:
+        # Архивный курс можно повторить, поэтому проверки те же, что у напоминаний
+        reminder_data = {**raw, **_reminder({**raw, **schedule})}
+    except RowError as err:
+        raise RowError(f"reminder_data: {err}")
+    user_id = _user_id(row)
+    history = []
+    for item in _json(row, "history", list) if row.get("history") else []:
+        if not isinstance(item, dict):
+            raise RowError("history must contain objects")
+        history.append(validate_history({"user_id": user_id, "pill_name": reminder_data["pill_name"], **item}))
+    taken = sum(1 for entry in history if entry["status"] == "taken")
+    return {
+        "user_id": user_id,
+        "reminder_id": _text(row, "reminder_id", required=True),
+        "reminder_data": reminder_data,
+        "history": history,
+        "start_date": _timestamp(row, "start_date", required=True),
+        "end_date": _timestamp(row, "end_date", required=True),
+        "total_taken": _int(row, "total_taken", taken),
+        "total_skipped": _int(row, "total_skipped", len(history) - taken),
+        "archived_at": _timestamp(row, "archived_at", required=True),
+    }
+
+
+def history_key(entry):
+    return (str(entry.get("user_id")), entry.get("reminder_id"), entry.get("date"), entry.get("status"),
+            entry.get("time_index"))
+
+
+def archive_key(entry):
+    return (str(entry.get("user_id")), entry.get("reminder_id"), entry.get("archived_at"))
+
+
+def transfer_path(hass, filename):
+    """Файл в <config>/pills_reminder_exports; другие каталоги недоступны сервисам"""
+    if not filename or os.path.basename(filename) != filename or filename.startswith("."):
+        raise ValueError(f"Invalid file name: {filename!r}")
+    return hass.config.path(TRANSFER_DIR, filename)
+
+
+def format_of(filename):
+    extension = os.path.splitext(filename)[1].lstrip(".").lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file format: {filename!r}")
+    return extension
+
+
+async def async_export(hass, bot, dataset, fmt, name=None):
+    """Выгружает набор данных в <config>/pills_reminder_exports; возвращает путь и число строк.
+
+    Пачки по EXPORT_CHUNK_SIZE строк сериализуются в event loop и пишутся
+    в файл в потоке исполнителя, в памяти одновременно только одна пачка.
+    """
+    rows = await async_export_rows(bot, dataset)
+    filename = f"{name or dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    path = transfer_path(hass, filename)
+    columns = COLUMNS[dataset]
+    count = 0
+    file = await hass.async_add_executor_job(open_export, path)
+    try:
+        # Заголовок CSV пишется и в пустую выгрузку
+        chunk = take(rows, EXPORT_CHUNK_SIZE)
+        header = True
+        while chunk or header:
+            text = encode_rows(fmt, columns, chunk, header)
+            if text:
+                await hass.async_add_executor_job(file.write, text)
+            count += len(chunk)
+            header = False
+            chunk = take(rows, EXPORT_CHUNK_SIZE)
+    finally:
+        await hass.async_add_executor_job(file.close)
+    _LOGGER.warning(f"Exported {count} {dataset} rows to {path}")
+    return path, count
+
+
+class _Importer:
+    """Проверка строк и пропуск уже имеющихся записей для одного импорта"""
+
+    def __init__(self, bot, dataset):
+        self.bot = bot
+        self.dataset = dataset
+        self.seen = None
+
+    async def async_prepare(self):
+        # Ключи существующих записей собираются один раз на весь импорт
+        if self.dataset == "history":
+            history_data = await self.bot.storage.async_load() or {}
+            self.seen = {history_key(entry) for entry in history_data.get("history", [])}
+        elif self.dataset == "archive":
+            archive_data = await self.bot.archive_storage.async_load() or {}
+            self.seen = {archive_key(entry) for entry in archive_data.get("archive", [])}
+
+    def _new(self, key):
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    async def async_apply(self, records):
+        """Сохраняет пачку одной записью хранилища; возвращает число добавленных"""
+        if self.dataset == "reminders":
+            return await self.bot.import_reminders(records)
+        if self.dataset == "history":
+            return await self.bot.import_history(
+                [entry for entry in records if self._new(history_key(entry))]
+            )
+        return await self.bot.import_archive(
+            [entry for entry in records if self._new(archive_key(entry))]
+        )
+
+
+VALIDATORS = {
+    "reminders": validate_reminder,
+    "history": validate_history,
+    "archive": validate_archive,
+}
+
+
+async def async_import(hass, bot, dataset, filename, batch_size=DEFAULT_BATCH_SIZE):
+    """Загружает файл из <config>/pills_reminder_exports пачками.
+
+    Файл читается генератором в потоке исполнителя по batch_size строк, в
+    памяти одновременно только одна пачка. Строки с ошибками пропускаются
+    и попадают в лог, существующие записи не перезаписываются. Каждая
+    пачка сохраняется одной записью хранилища. Возвращает сводку.
+    """
+    fmt = format_of(filename)
+    path = transfer_path(hass, filename)
+    validate = VALIDATORS[dataset]
+    if dataset == "reminders":
+        validate = functools.partial(validate, locales=bot.messages.locales)
+    importer = _Importer(bot, dataset)
+    await importer.async_prepare()
+
+    summary = {"read": 0, "imported": 0, "invalid": 0, "batches": 0}
+    rows = read_rows(path, fmt)
+    try:
+        while True:
+            batch = await hass.async_add_executor_job(take, rows, batch_size)
+            if not batch:
+                break
+            if dataset == "reminders":
+                # Новые зоны читаются с диска - загружаем их до проверки в event loop
+                zones = {row.get("timezone") for _, row in batch
+                         if isinstance(row, dict) and isinstance(row.get("timezone"), str)}
+                await hass.async_add_executor_job(preload_zones, zones)
+            records = []
+            for line_number, row in batch:
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    if not isinstance(row, dict):
+                        raise RowError("row must be an object")
+                    records.append(validate(row))
+                except RowError as err:
+                    summary["invalid"] += 1
+                    if summary["invalid"] <= MAX_LOGGED_ERRORS:
+                        _LOGGER.warning(f"Skipped {filename} line {line_number}: {err}")
+            summary["read"] += len(batch)
+            summary["imported"] += await importer.async_apply(records)
+            summary["batches"] += 1
+    finally:
+        await hass.async_add_executor_job(rows.close)
+
+    # Статистика соблюдения строится по истории по порядку дат - пересобираем один раз
+    if dataset == "history" and summary["imported"]:
+        await bot.load_adherence()
+    _LOGGER.warning(
+        f"Imported {summary['imported']} of {summary['read']} {dataset} rows from {path} "
+        f"({summary['invalid']} invalid, {summary['batches']} batches)"
+    )
+    return summary
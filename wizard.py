@@ -0,0 +1,334 @@
+"""Пошаговая настройка напоминаний: сессии в памяти и таблица шагов."""
+import base64
+import binascii
+import logging
+import re
+import time
+from datetime import datetime
+
+from .schedule import INTERVAL_HOURS, MAX_EVERY_DAYS, MAX_TIMES_PER_DAY, parse_schedule_text
+
+_LOGGER = logging.getLogger(__name__)
+
+# Сессия без ввода дольше этого времени считается брошенной и удаляется
+SESSION_TTL = 30 * 60
+
+# Шаги, на которых сессия завершается: подтверждение нового напоминания и сохранение правки
+STEP_CONFIRM = "confirm"
+STEP_SAVE_EDIT = "save_edit"
+
+# Параметр /start (deep link), несущий описание напоминания для /add.
+# Telegram принимает в start не больше 64 символов A-Z, a-z, 0-9, _ и -
+SPEC_PAYLOAD_PREFIX = "add_"
+MAX_START_PAYLOAD = 64
+
+_QUOTED_RE = re.compile(r'"([^"]*)"|«([^»]*)»|“([^”]*)”')
+_DURATION_RE = re.compile(r"(\d+)(?:d|days?|д|дн|дня|дней|день)", re.IGNORECASE)
+
+
+class StepError(ValueError):
+    """Неверный ввод на шаге мастера: ключ шаблона сообщения для пользователя и его значения"""
+
+    def __init__(self, key, **values):
+        super().__init__(key)
+        self.key = key
+        self.values = values
+
+
+def _optional_text(text):
+    return "" if text == "-" else text
+
+
+def _duration_days(text):
+    if text == "-":
+        return None
+    try:
+        duration_days = int(text)
+    except ValueError:
+        raise StepError("error_duration_number")
+    if duration_days <= 0:
+        raise StepError("error_duration_positive")
+    return duration_days
+
+
+def _times_per_day(text):
+    try:
+        times_per_day = int(text)
+    except ValueError:
+        raise StepError("error_times_number", max_times=MAX_TIMES_PER_DAY)
+    if times_per_day < 1 or times_per_day > MAX_TIMES_PER_DAY:
+        raise _limit_error("times_per_day")
+    return times_per_day
+
+
+def _time(text):
+    try:
+        datetime.strptime(text, "%H:%M")
+    except ValueError:
+        raise StepError("error_time_format")
+    return {"time": text}
+
+
+def _limit_error(reason):
+    """StepError для ошибки parse_schedule_text о нарушенном пределе расписания или None"""
+    if reason == "times_per_day":
+        return StepError("error_times_per_day", max_times=MAX_TIMES_PER_DAY)
+    if reason == "interval_hours":
+        return StepError("error_interval_hours", intervals=", ".join(map(str, INTERVAL_HOURS)))
+    if reason == "every_days":
+        return StepError("error_every_days", max_days=MAX_EVERY_DAYS)
+    return None
+
+
+def _schedule(text):
+    try:
+        return parse_schedule_text(text)
+    except ValueError as err:
+        raise _limit_error(err.args[0] if err.args else None) or StepError(
+            "error_schedule_format", intervals=", ".join(map(str, INTERVAL_HOURS))
+        )
+
+
+def _pill_saved(draft):
+    if draft.get("course_number", 1) > 1:
+        return "step_pill_name_saved_course", {"pill_name": draft["pill_name"], "course_number": draft["course_number"]}
+    return "step_pill_name_saved", {"pill_name": draft["pill_name"]}
+
+
+def _time_prompt(draft):
+    number = len(draft.get("times", [])) + 1
+    if number == 1:
+        return "step_time_first"
+    return "step_time_next", {"number": number}
+
+
+def _after_time(draft):
+    return "time" if len(draft["times"]) < draft["times_per_day"] else STEP_CONFIRM
+
+
+# Шаг: parse (ввод -> значение или StepError), field (поле черновика; append - дописать
+# в список), saved (ответ после ввода), next (следующий шаг) и prompt (вопрос шага).
+# saved и prompt - ключи шаблонов messages/*.json или функции черновика, возвращающие
+# ключ либо (ключ, значения); next может быть функцией черновика.
+SETUP_STEPS = {
+    "pill_name": {
+        "parse": str.strip,
+        "field": "pill_name",
+        "saved": _pill_saved,
+        "next": "dosage",
+        "prompt": "step_pill_name",
+    },
+    "dosage": {
+        "parse": _optional_text,
+        "field": "dosage",
+        "saved": "step_dosage_saved",
+        "next": "description",
+        "prompt": "step_dosage",
+    },
+    "description": {
+        "parse": _optional_text,
+        "field": "description",
+        "saved": "step_description_saved",
+        "next": "duration_days",
+        "prompt": "step_description",
+    },
+    "duration_days": {
+        "parse": _duration_days,
+        "field": "duration_days",
+        "saved": "step_duration_days_saved",
+        "next": "times_per_day",
+        "prompt": "step_duration_days",
+    },
+    "times_per_day": {
+        "parse": _times_per_day,
+        "field": "times_per_day",
+        "saved": lambda draft: ("step_times_per_day_saved", {"count": draft["times_per_day"]}),
+        "next": "time",
+        "prompt": lambda draft: ("step_times_per_day", {"max_times": MAX_TIMES_PER_DAY}),
+    },
+    "time": {
+        "parse": _time,
+        "field": "times",
+        "append": True,
+        "saved": lambda draft: ("step_time_saved", {"number": len(draft["times"])}),
+        "next": _after_time,
+        "prompt": _time_prompt,
+    },
+    "edit_times": {
+        "parse": _schedule,
+        "field": "schedule_input",
+        "saved": None,
+        "next": STEP_SAVE_EDIT,
+        "prompt": None,
+    },
+}
+
+
+def parse_reminder_spec(text):
+    """Разбирает напоминание из одной строки для /add.
+
+    Формат: название [дозировка] [длительность] расписание ["описание"],
+    например: Витамин D 1000МЕ 30д 08:00,20:00 "для иммунитета".
+    Дозировка - слова после названия, начиная с цифры; длительность - 30d
+    или 30д (без нее курс бесконечный); расписание - все, что понимает
+    parse_schedule_text. Проверки те же, что в мастере настройки.
+    Возвращает (черновик напоминания, параметры compile_schedule) или StepError.
+    """
+    description = ""
+    match = _QUOTED_RE.search(text)
+    if match:
+        description = next(group for group in match.groups() if group is not None).strip()
+        text = text[:match.start()] + " " + text[match.end():]
+
+    duration_days = None
+    tokens = []
+    for token in text.split():
+        match = _DURATION_RE.fullmatch(token)
+        if match:
+            duration_days = _duration_days(match.group(1))
+        else:
+            tokens.append(token)
+
+    # Расписание - самый длинный хвост, который разбирается как расписание.
+    # Хвост с неверным интервалом или числом приемов - ошибка, а не часть названия
+    for start in range(1, len(tokens)):
+        try:
+            times, schedule_options = parse_schedule_text(" ".join(tokens[start:]))
+            break
+        except ValueError as err:
+            limit_error = _limit_error(err.args[0] if err.args else None)
+            if limit_error:
+                raise limit_error
+    else:
+        raise StepError("error_spec_no_time")
+
+    head = tokens[:start]
+    dosage_start = next((index for index in range(1, len(head)) if head[index][0].isdigit()), len(head))
+    return {
+        "pill_name": " ".join(head[:dosage_start]),
+        "dosage": " ".join(head[dosage_start:]),
+        "description": description,
+        "duration_days": duration_days,
+        "times_per_day": len(times),
+        "times": times,
+    }, schedule_options
+
+
+def encode_spec_payload(spec):
+    """Параметр deep link t.me/<бот>?start=... для описания /add.
+
+    Возвращает None, если параметр длиннее MAX_START_PAYLOAD: в base64
+    помещается около 45 латинских символов описания или 22 кириллических.
+    """
+    spec = " ".join(spec.split())
+    encoded = base64.urlsafe_b64encode(spec.encode("utf-8")).decode("ascii").rstrip("=")
+    payload = SPEC_PAYLOAD_PREFIX + encoded
+    return payload if len(payload) <= MAX_START_PAYLOAD else None
+
+
+def decode_spec_payload(payload):
+    encoded = payload[len(SPEC_PAYLOAD_PREFIX):]
+    try:
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        raise StepError("error_spec_link")
+
+
+def _resolve(value, draft):
+    return value(draft) if callable(value) else value
+
+
+def _message(value, draft):
+    """(ключ шаблона, значения) для saved или prompt шага"""
+    value = _resolve(value, draft)
+    return (value, {}) if isinstance(value, str) else value
+
+
+class SetupWizard:
+    """Сессии мастера настройки по пользователям.
+
+    Сессия живет только в памяти: текущий шаг, id напоминания и черновик.
+    В хранилище пользователей попадает лишь сохраненное напоминание, а
+    брошенные сессии удаляются по истечении SESSION_TTL. hooks - корутины
+    hook(session), вызываемые после принятого ввода на шаге с тем же именем.
+    render(locale, key, **values) отрисовывает тексты шагов на языке сессии
+    (session["locale"]).
+    """
+
+    def __init__(self, render, steps=SETUP_STEPS, hooks=None, ttl=SESSION_TTL):
+        self.render = render
+        self.steps = steps
+        self.hooks = hooks or {}
+        self.ttl = ttl
+        self._sessions = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def start(self, user_id, step, reminder_id, draft=None, **extra):
+        """Начинает сессию, заменяя незавершенную"""
+        session = {
+            **extra,
+            "user_id": str(user_id),
+            "step": step,
+            "reminder_id": reminder_id,
+            "draft": draft if draft is not None else {},
+            "expires": time.monotonic() + self.ttl,
+        }
+        self._sessions[str(user_id)] = session
+        return session
+
+    def get(self, user_id):
+        session = self._sessions.get(str(user_id))
+        if session is not None and session["expires"] < time.monotonic():
+            del self._sessions[str(user_id)]
+            return None
+        return session
+
+    def finish(self, user_id):
+        return self._sessions.pop(str(user_id), None)
+
+    def collect_expired(self):
+        """Удаляет брошенные сессии; возвращает их число"""
+        now = time.monotonic()
+        expired = [user_id for user_id, session in self._sessions.items() if session["expires"] < now]
+        for user_id in expired:
+            del self._sessions[user_id]
+        if expired:
+            _LOGGER.debug(f"Dropped {len(expired)} abandoned setup sessions")
+        return len(expired)
+
+    def _text(self, session, value):
+        key, values = _message(value, session["draft"])
+        return self.render(session.get("locale"), key, **values)
+
+    def prompt(self, session):
+        return self._text(session, self.steps[session["step"]]["prompt"])
+
+    async def async_advance(self, session, text):
+        """Применяет ввод к текущему шагу и переводит сессию на следующий.
+
+        Возвращает ответ пользователю (подтверждение и вопрос следующего
+        шага) или None, если следующий шаг вне таблицы - его выполняет
+        вызывающий. Неверный ввод - StepError, шаг не меняется.
+        """
+        step_name = session["step"]
+        step = self.steps.get(step_name)
+        if step is None:
+            raise StepError("wizard_confirm_pending")
+        value = step["parse"](text)
+        draft = session["draft"]
+        if step.get("append"):
+            draft.setdefault(step["field"], []).append(value)
+        else:
+            draft[step["field"]] = value
+
+        hook = self.hooks.get(step_name)
+        if hook:
+            await hook(session)
+
+        session["step"] = _resolve(step["next"], draft)
+        session["expires"] = time.monotonic() + self.ttl
+        if session["step"] not in self.steps:
+            return None
+        return f"{self._text(session, step['saved'])}\n\n{self.prompt(session)}"